@@ -7,44 +7,176 @@ from dotenv import load_dotenv
 
 from common.Logger import logger
 from core.media.MediaEditor import MediaEditor
+from core.media.S3Uploader import S3Uploader
 from core.lipsync.LipSync import LibSync
+from core.media.VideoText import VideoText
+from core.llm.TextGen import TextGen
+from core.llm.SpeechTimer import SpeechTimer
+from core.elevenlabs.ElevenlabsClient import ElevenlabsClient
+from core.pipeline.Pipeline import Pipeline
+from core.pipeline.Checkpoint import CheckpointStore
+from core.pipeline.Batch import BatchRunner
 
 # .env 파일 로드
 load_dotenv(override=True)
 
-def main(args):
-    # if args.file:
-    #     process_urls_from_file(args.file)
-    video_path = "data/dr_m_02_vertical.mp4"
-    # audio_path = "result/save.mp3"
-    audio_path = "temp/woman_voice_50sec.mp3"
-
-    audio_editor = MediaEditor(audio_path)
-    info = audio_editor.get_info()
-    audio_duration = info.get("duration", 0)
-
-    if audio_duration > 0:
-        logger.error("Audio duration should be less than 10 seconds")
-        sys.exit(1)
+def build_short_pipeline(checkpoint: CheckpointStore = None, limits: dict = None) -> Pipeline:
+    """
+    숏폼 하나를 만드는 stage 그래프
+
+        script → estimate → cut ──────────┐
+           └──→ tts → duration ──────────┴→ fit → upload_video ┐
+                         └──→ upload_audio ────────────────────┴→ lipsync → final
+
+    템플릿은 TTS를 기다리지 않고 추정 발화 시간(SpeechTimer)보다 조금 길게 먼저 잘라 두고(cut),
+    TTS가 끝나면 실제 길이로 다시 맞춘다(fit, 대부분 stream copy). audio 업로드도 자르기와 동시에 진행된다.
+    입력: contents, who, time, engine, voice_id, video_path, workdir, title, output
+    (script 또는 tts를 입력으로 주면 해당 stage는 건너뜀, tts = {"path", "timings"},
+     tts를 줄 때는 길이를 알고 있으므로 estimate에 오디오 길이를 함께 넘김)
+
+    :param checkpoint: 지정하면 stage 결과를 저장해 두고, 다시 실행할 때 유효한 결과는 재사용
+                       (예: lipsync가 시간 초과되어도 자르기/업로드는 다시 하지 않음)
+    :param limits: 자원별 semaphore (llm, tts, render, s3, lipsync), 배치에서 작업들이 공유
+    """
+    # 로컬 발화 시간 추정으로 길이를 맞춘 뒤 TTS로 넘김
+    def script(contents, who, time, engine, voice_id):
+        return TextGen(engine).genText(who=who, time=time, contents=contents, voice_id=voice_id)
+
+    # 새로 합성한 문장 길이로 voice별 발화 속도 보정 (estimate/script에서 사용)
+    def tts(script, voice_id, workdir):
+        client = ElevenlabsClient(timer=SpeechTimer())
+        client.setVoiceId(voice_id)
+        path = os.path.join(workdir, "tts.mp3")
+        timings = client.generate_sentences(script, path)
+        return {"path": path, "timings": timings}
+
+    def estimate(script, voice_id):
+        return SpeechTimer().estimate(script, voice_id)
+
+    # 문장별 타이밍이 있으면 별도 probe 없이 마지막 문장의 끝이 전체 길이
+    def duration(tts):
+        if tts.get("timings"):
+            return tts["timings"][-1]["end"]
+        return MediaEditor.probe(tts["path"]).get("duration", 0)
+
+    # 작업별 workdir에 저장 (배치에서 동시에 자르는 작업끼리 파일이 겹치지 않도록)
+    # 추정이 조금 짧아도 fit에서 다시 자르지 않도록 여유를 둠
+    def cut(video_path, estimate, workdir):
+        if estimate <= 0:
+            raise ValueError("오디오 길이를 추정할 수 없습니다.")
+        os.makedirs(workdir, exist_ok=True)
+        return MediaEditor(video_path).cut_duration(estimate * 1.15 + 1.0,
+                                                    output_path=os.path.join(workdir, "cut_draft.mp4"))
 
-    video_editor = MediaEditor(video_path)
-    cutoff_video_path = video_editor.cut_duration(audio_duration)
-    print(cutoff_video_path)
+    # 먼저 자른 영상을 실제 오디오 길이에 맞춤. 추정이 짧았으면 템플릿에서 다시 자름
+    def fit(cut, video_path, duration, workdir):
+        if duration <= 0:
+            raise ValueError("오디오 길이를 알 수 없습니다.")
+        length = MediaEditor.probe(cut).get("duration", 0)
+        if length > duration + 0.05:
+            source = cut
+        elif length < duration - 0.05 and length < MediaEditor.probe(video_path).get("duration", 0) - 0.05:
+            logger.info(f"추정 길이({length:.2f}s)가 오디오({duration:.2f}s)보다 짧아 템플릿에서 다시 자릅니다.")
+            source = video_path
+        else:
+            return cut
+        return MediaEditor(source).cut_duration(duration, output_path=os.path.join(workdir, "cut.mp4"))
 
-    lipsync = LibSync()
-    response = lipsync.runSyncAndMonitor(cutoff_video_path, audio_path)
-    print(response)
+    # presigned URL은 lipsync가 끝날 때까지 유효해야 함
+    def upload_audio(tts, duration):
+        return S3Uploader(content_addressed=True).upload_presigned_url(
+            tts["path"], duration, min_validity=LibSync.MAX_DURATION)
 
-    # download to local
+    def upload_video(fit, duration):
+        return S3Uploader(content_addressed=True).upload_presigned_url(
+            fit, duration, min_validity=LibSync.MAX_DURATION)
+
+    def lipsync(upload_video, upload_audio):
+        response = LibSync().runSyncAndMonitor(upload_video["presigned_url"], upload_audio["presigned_url"])
+        if not response or not response.get("outputUrl"):
+            raise RuntimeError(f"LipSync 실패: {response}")
+        return response
+
+    # lipsync 결과를 받으면서 자막까지 한 번에 인코딩
+    def final(lipsync, tts, title, output):
+        video = VideoText(lipsync["outputUrl"])
+        if title:
+            video.상단자막(title)
+        if tts.get("timings"):
+            video.하단자막(ElevenlabsClient.toSubtitles(tts["timings"]))
+        return video.make_final(output)
+
+    # 재사용하는 presigned URL도 lipsync가 끝날 때까지 유효해야 함
+    def url_valid(upload):
+        return CheckpointStore.not_expired(upload, LibSync.MAX_DURATION)
+
+    return (Pipeline("short", checkpoint=checkpoint, limits=limits)
+            .add("script", script, deps=["contents", "who", "time", "engine", "voice_id"], resource="llm")
+            .add("tts", tts, deps=["script", "voice_id", "workdir"], resource="tts")
+            .add("estimate", estimate, deps=["script", "voice_id"])
+            .add("duration", duration, deps=["tts"], files=["tts"])
+            .add("cut", cut, deps=["video_path", "estimate", "workdir"], resource="render", files=["video_path"])
+            .add("fit", fit, deps=["cut", "video_path", "duration", "workdir"], resource="render",
+                 files=["cut", "video_path"])
+            .add("upload_audio", upload_audio, deps=["tts", "duration"], validate=url_valid, resource="s3",
+                 files=["tts"])
+            .add("upload_video", upload_video, deps=["fit", "duration"], validate=url_valid, resource="s3",
+                 files=["fit"])
+            .add("lipsync", lipsync, deps=["upload_video", "upload_audio"], resource="lipsync")
+            .add("final", final, deps=["lipsync", "tts", "title", "output"], resource="render"))
+
+def main(args):
+    checkpoint = None if args.fresh else CheckpointStore()
+
+    if args.file:
+        # 배치: manifest의 작업들을 동시에 처리하고 결과를 JSONL로 기록
+        summary = BatchRunner(build_short_pipeline, max_jobs=args.jobs, checkpoint=checkpoint).run(args.file, args.out)
+        sys.exit(1 if summary["failed"] else 0)
+
+    inputs = {
+        "who": args.who,
+        "time": args.time,
+        "engine": args.engine,
+        "voice_id": args.voice or os.getenv("ELEVENLABS_VOICE_ID"),
+        "video_path": args.video,
+        "workdir": os.path.dirname(os.path.abspath(args.output)),
+        "title": args.title,
+        "output": args.output,
+    }
+    if args.audio:
+        # 이미 만든 음성으로 시작 (script/tts 생략)
+        inputs["tts"] = {"path": args.audio, "timings": []}
+        inputs["estimate"] = MediaEditor.probe(args.audio).get("duration", 0)
+    elif args.txt:
+        with open(args.txt, "r", encoding="utf-8") as f:
+            inputs["contents"] = f.read()
+    else:
+        logger.error("--txt, --audio 또는 --file이 필요합니다.")
+        sys.exit(1)
 
+    result = build_short_pipeline(checkpoint).run(**inputs)
+    logger.info(f"최종 영상: {result['outputs']['final']} ({result['total_time']:.2f}s)")
+    for stage, timing in result["timings"].items():
+        logger.info(f"  {stage}: {timing['duration']:.2f}s{' (checkpoint)' if timing['cached'] else ''}")
 
 
 if __name__ == "__main__":
     # ArgumentParser를 사용하여 커맨드라인 인자 받아오기
     parser = argparse.ArgumentParser(description="Generate short AI videos")
     # parser.add_argument("--conf", required=False, help="The URL to process")
-    # parser.add_argument("--file", required=False, help="File containing a list of URLs to process")
-    # parser.add_argument("--txt", required=False, help="contents file")
+    parser.add_argument("--file", required=False, help="배치 manifest (.yaml/.yml/.jsonl)")
+    parser.add_argument("--out", required=False, default="result/batch/results.jsonl", help="배치 결과 JSONL")
+    parser.add_argument("--jobs", required=False, type=int, help="동시에 진행할 배치 작업 수 (기본값: BATCH_MAX_JOBS)")
+    parser.add_argument("--txt", required=False, help="contents file")
+    parser.add_argument("--audio", required=False, help="이미 생성한 음성 파일 (지정 시 대본/TTS 생략)")
+    parser.add_argument("--video", required=False, default="data/dr_m_02_vertical.mp4", help="영상 템플릿")
+    parser.add_argument("--who", required=False, default="", help="화자 소개")
+    parser.add_argument("--time", required=False, type=int, default=30, help="목표 길이(초)")
+    parser.add_argument("--engine", required=False, default="gemini", help="gemini 또는 openai")
+    parser.add_argument("--voice", required=False, help="ElevenLabs voice id (기본값: ELEVENLABS_VOICE_ID)")
+    parser.add_argument("--title", required=False, default="", help="상단 자막")
+    parser.add_argument("--output", required=False, default="result/final.mp4", help="최종 영상 경로")
+    parser.add_argument("--fresh", action="store_true", help="저장된 stage 결과(checkpoint)를 쓰지 않고 처음부터 실행")
         
     args = parser.parse_args()
     
@@ -0,0 +1,73 @@
+import os
+import threading
+
+import boto3
+from botocore.config import Config
+
+class AwsClients:
+    """
+    프로세스 전역에서 공유하는 boto3 client 팩토리.
+
+    client 생성(endpoint 해석, credential chain, 커넥션 풀)은 비용이 크므로
+    (service, region, endpoint)별로 한 번만 만들어 S3Uploader, Transcript 등이 함께 사용한다.
+    - boto3 client는 thread-safe 하므로 스레드 풀에서 공유 가능
+    - fork 후 자식 프로세스에서는 부모의 소켓을 공유하지 않도록 캐시를 비우고 새로 만든다
+    """
+
+    _clients = {}
+    _lock = threading.Lock()
+    _pid = os.getpid()
+
+    @staticmethod
+    def _config() -> Config:
+        return Config(
+            max_pool_connections=int(os.getenv("AWS_MAX_POOL_CONNECTIONS", "50")),
+            tcp_keepalive=True,
+            retries={"max_attempts": int(os.getenv("AWS_MAX_ATTEMPTS", "5")), "mode": "adaptive"},
+        )
+
+    @staticmethod
+    def get(service: str, region_name: str = None, endpoint_url: str = None):
+        """
+        :param service: 's3', 'transcribe' 등
+        :param region_name: 기본값 AWS_REGION 환경변수 또는 ap-northeast-2
+        :return: 공유 boto3 client
+        """
+        region_name = region_name or os.getenv("AWS_REGION", "ap-northeast-2")
+        key = (service, region_name, endpoint_url)
+
+        with AwsClients._lock:
+            if AwsClients._pid != os.getpid():
+                # fork로 생긴 자식 프로세스 (register_at_fork가 없는 환경 대비)
+                AwsClients._clients = {}
+                AwsClients._pid = os.getpid()
+
+            client = AwsClients._clients.get(key)
+            if client is None:
+                # boto3.client()가 쓰는 기본 Session은 thread-safe 하지 않으므로 전용 Session을 lock 안에서 생성
+                session = boto3.session.Session(
+                    aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+                    aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+                    region_name=region_name
+                )
+                client = session.client(service, endpoint_url=endpoint_url, config=AwsClients._config())
+                AwsClients._clients[key] = client
+            return client
+
+    @staticmethod
+    def s3():
+        return AwsClients.get("s3", endpoint_url=os.getenv("AWS_S3_ENDPOINT", "https://s3.ap-northeast-2.amazonaws.com"))
+
+    @staticmethod
+    def transcribe():
+        return AwsClients.get("transcribe")
+
+    @staticmethod
+    def _reset_after_fork():
+        AwsClients._lock = threading.Lock()
+        AwsClients._clients = {}
+        AwsClients._pid = os.getpid()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=AwsClients._reset_after_fork)
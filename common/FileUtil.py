@@ -0,0 +1,84 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+from functools import lru_cache
+
+class FileUtil:
+    @staticmethod
+    def sha256_file(path: str) -> str:
+        """
+        파일 내용의 sha256 hex digest.
+        (경로, mtime, size) 단위로 캐시되므로 같은 파일을 반복해서 해시해도 비용이 없다.
+        """
+        stat = os.stat(path)
+        return FileUtil._sha256_cached(os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _sha256_cached(path: str, mtime_ns: int, size: int) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def sha256_json(data) -> str:
+        """
+        dict/list 등을 정렬된 JSON으로 직렬화한 뒤 sha256 (캐시 키 생성용)
+        """
+        payload = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def atomic_write(path: str, data: bytes):
+        """
+        같은 디렉토리의 임시 파일에 쓴 뒤 os.replace로 교체.
+        동시에 읽는 쪽은 이전 파일 또는 완성된 파일만 보게 된다.
+        """
+        dir_path = os.path.dirname(os.path.abspath(path))
+        os.makedirs(dir_path, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=dir_path, prefix=".tmp_")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def write_json(path: str, data):
+        FileUtil.atomic_write(path, json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8"))
+
+    @staticmethod
+    def read_json(path: str, default=None):
+        """
+        JSON 파일 읽기. 파일이 없거나 깨졌으면 default
+        """
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return default
+
+    @staticmethod
+    def link_or_copy(src: str, dst: str, link: bool = False):
+        """
+        src를 dst로 복사. link=True면 하드링크를 먼저 시도(같은 파일시스템일 때)하고 실패하면 복사.
+        """
+        dir_path = os.path.dirname(os.path.abspath(dst))
+        os.makedirs(dir_path, exist_ok=True)
+        if link:
+            try:
+                if os.path.exists(dst):
+                    os.remove(dst)
+                os.link(src, dst)
+                return dst
+            except OSError:
+                pass
+        shutil.copyfile(src, dst)
+        return dst
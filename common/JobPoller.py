@@ -0,0 +1,172 @@
+import time
+import random
+import asyncio
+import threading
+from collections import defaultdict, deque
+
+from common.Logger import logger
+
+class RetryableError(Exception):
+    """
+    일시적인 오류(429, 5xx, throttling 등). JobPoller가 제한된 횟수만큼 재시도한다.
+    """
+    pass
+
+
+class JobPoller:
+    """
+    비동기 작업(LipSync 생성, Transcribe 잡 등)의 상태를 확인하는 공용 폴러.
+
+    - 짧은 간격으로 시작해서 지수적으로 늘림 (jitter 포함)
+    - 작업이 진행률(progress, 0~1)을 알려주면 남은 시간을 추정해 다음 확인 시점을 정함
+    - 같은 이름(name)으로 끝난 작업들의 소요 시간을 기억해 두고,
+      보통 끝나는 시점(하위 percentile) 전에는 불필요하게 자주 확인하지 않음
+    - RetryableError는 연속 max_retries 회까지 재시도
+    """
+
+    RETRYABLE_HTTP_STATUS = (408, 425, 429, 500, 502, 503, 504)
+
+    # {name: deque([소요 시간(초), ...])} 프로세스 전역 기록
+    _history = defaultdict(lambda: deque(maxlen=50))
+    _history_lock = threading.Lock()
+
+    def __init__(self, name: str, initial_interval: float = 2, max_interval: float = 60,
+                 factor: float = 1.6, jitter: float = 0.2, timeout: float = 1200, max_retries: int = 5):
+        """
+        :param name: 작업 종류 (소요 시간 기록 키, 예: 'lipsync', 'transcribe')
+        :param initial_interval: 첫 확인 간격(초)
+        :param max_interval: 최대 확인 간격(초)
+        :param factor: 간격 증가 배수
+        :param jitter: 간격에 곱할 무작위 비율 (±)
+        :param timeout: 최대 대기 시간(초)
+        :param max_retries: 연속 RetryableError 허용 횟수
+        """
+        self.name = name
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.factor = factor
+        self.jitter = jitter
+        self.timeout = timeout
+        self.max_retries = max_retries
+
+    @staticmethod
+    def is_retryable_status(status_code: int) -> bool:
+        return status_code in JobPoller.RETRYABLE_HTTP_STATUS
+
+    def record(self, duration: float):
+        with self._history_lock:
+            self._history[self.name].append(duration)
+
+    def percentile(self, q: float) -> float:
+        """
+        기록된 소요 시간의 q(0~100) percentile. 기록이 5개 미만이면 None
+        """
+        with self._history_lock:
+            samples = sorted(self._history[self.name])
+        if len(samples) < 5:
+            return None
+        idx = min(len(samples) - 1, max(0, round(q / 100 * (len(samples) - 1))))
+        return samples[idx]
+
+    def next_delay(self, attempt: int, elapsed: float, progress: float = None) -> float:
+        """
+        다음 확인까지 기다릴 시간(초)
+        :param attempt: 지금까지 확인한 횟수
+        :param elapsed: 작업 시작 후 경과 시간
+        :param progress: 작업이 알려준 진행률 (0~1), 없으면 None
+        """
+        delay = min(self.max_interval, self.initial_interval * (self.factor ** attempt))
+
+        if progress is not None and 0 < progress < 1:
+            # 진행률로 남은 시간을 추정하고, 그 절반쯤 뒤에 다시 확인
+            remaining = elapsed * (1 - progress) / progress
+            delay = min(self.max_interval, max(self.initial_interval, remaining / 2))
+        else:
+            p10 = self.percentile(10)
+            if p10 is not None and elapsed + delay < p10:
+                # 대부분의 작업이 끝나는 시점 전까지는 한 번에 기다림
+                delay = min(self.max_interval, p10 - elapsed)
+
+        delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        return max(0.0, min(delay, self.timeout - elapsed))
+
+    def poll(self, fetch, is_done, get_progress=None, is_success=None):
+        """
+        is_done(data)가 True가 될 때까지 fetch()를 반복 호출
+        :param fetch: 상태 조회 함수. 일시적 오류면 RetryableError 발생
+        :param is_done: 종료 상태 판별 함수
+        :param get_progress: data에서 진행률(0~1)을 꺼내는 함수 (선택)
+        :param is_success: 성공 판별 함수. 지정하면 성공한 작업의 소요 시간만 기록
+                           (금방 끝나는 실패가 percentile을 끌어내리지 않도록)
+        :return: 마지막 data, 시간 초과면 None
+        :raises RuntimeError: RetryableError가 max_retries 회를 넘게 연속으로 발생한 경우
+        """
+        start_time = time.time()
+        attempt = 0
+        retries = 0
+
+        while True:
+            elapsed = time.time() - start_time
+            if elapsed > self.timeout:
+                logger.error(f"[{self.name}] polling timed out after {self.timeout} seconds.")
+                return None
+
+            progress = None
+            try:
+                data = fetch()
+                retries = 0
+                if is_done(data):
+                    if is_success is None or is_success(data):
+                        self.record(time.time() - start_time)
+                    return data
+                progress = get_progress(data) if get_progress else None
+            except RetryableError as e:
+                retries += 1
+                if retries > self.max_retries:
+                    raise RuntimeError(f"[{self.name}] {self.max_retries}회 재시도 후에도 실패: {e}")
+                logger.warning(f"[{self.name}] retryable error ({retries}/{self.max_retries}): {e}")
+
+            delay = self.next_delay(attempt, time.time() - start_time, progress)
+            attempt += 1
+            logger.debug(f"[{self.name}] next check in {delay:.1f}s")
+            time.sleep(delay)
+
+    async def poll_async(self, fetch, is_done, get_progress=None, is_success=None, sleep=None):
+        """
+        poll의 asyncio 버전 (같은 간격/재시도 규칙)
+        :param fetch: 상태 조회 coroutine 함수. 일시적 오류면 RetryableError 발생
+        :param sleep: 다음 확인까지 기다리는 coroutine 함수 sleep(delay) (기본값: asyncio.sleep),
+                      웹훅 등으로 일찍 깨워 바로 다시 확인하고 싶을 때 지정
+        :return: 마지막 data, 시간 초과면 None
+        :raises RuntimeError: RetryableError가 max_retries 회를 넘게 연속으로 발생한 경우
+        """
+        sleep = sleep or asyncio.sleep
+        start_time = time.time()
+        attempt = 0
+        retries = 0
+
+        while True:
+            elapsed = time.time() - start_time
+            if elapsed > self.timeout:
+                logger.error(f"[{self.name}] polling timed out after {self.timeout} seconds.")
+                return None
+
+            progress = None
+            try:
+                data = await fetch()
+                retries = 0
+                if is_done(data):
+                    if is_success is None or is_success(data):
+                        self.record(time.time() - start_time)
+                    return data
+                progress = get_progress(data) if get_progress else None
+            except RetryableError as e:
+                retries += 1
+                if retries > self.max_retries:
+                    raise RuntimeError(f"[{self.name}] {self.max_retries}회 재시도 후에도 실패: {e}")
+                logger.warning(f"[{self.name}] retryable error ({retries}/{self.max_retries}): {e}")
+
+            delay = self.next_delay(attempt, time.time() - start_time, progress)
+            attempt += 1
+            logger.debug(f"[{self.name}] next check in {delay:.1f}s")
+            await sleep(delay)
@@ -1,52 +1,254 @@
+import io
 import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 from elevenlabs import Voice, VoiceSettings, play, save
 from elevenlabs.client import ElevenLabs
+from pydub import AudioSegment
+
+from common.FileUtil import FileUtil
+from common.Logger import logger
+from core.elevenlabs.StreamingAudio import StreamingAudio
+from core.elevenlabs.TTSCache import TTSCache
+from core.elevenlabs.VoiceRegistry import VoiceRegistry
 
 class ElevenlabsClient:
-    def __init__(self):
+    def __init__(self, cache: TTSCache = None, registry: VoiceRegistry = None, timer=None):
+        """
+        :param cache: TTS 결과 캐시 (기본값: TTSCache())
+        :param registry: 복제한 voice 레지스트리 (기본값: VoiceRegistry())
+        :param timer: 발화 시간 estimator (calibrate_timings 제공, 예: SpeechTimer).
+                      지정하면 generate_sentences에서 새로 합성한 문장 길이로 voice 속도를 보정
+        """
         self.client = ElevenLabs(
             api_key=self._getApiKey()
         )
+        self.model_id = os.getenv("ELEVENLABS_MODEL", "eleven_multilingual_v2")
+        # 출력 형식 (스트리밍 시 길이 추정에 비트레이트 사용)
+        self.output_format = os.getenv("ELEVENLABS_OUTPUT_FORMAT", "mp3_44100_128")
+        self.cache = cache or TTSCache()
+        self.registry = registry or VoiceRegistry()
+        self.timer = timer
+        self.audio = None
+        self.audio_path = None   # 캐시에 저장된(또는 히트한) 오디오 파일 경로
         # defulat voice setting
         self.setVoiceSettings()
 
     def _getApiKey(self):
         return os.getenv("ELEVENLABS_API_KEY")
-    
+
     def setVoiceSettings(self, stability=0.71, similarity=0.5, style=0.0, speaker=True):
         self.voice_settings = VoiceSettings(
-                                stability=stability, 
-                                similarity_boost=similarity, 
-                                style=style, 
+                                stability=stability,
+                                similarity_boost=similarity,
+                                style=style,
                                 use_speaker_boost=speaker
                               )
 
     def setVoiceId(self, vid):
         self.voice_id = vid
 
-    def clone(self, name, desc, fpath):
+    def clone(self, name, desc, fpath, use_registry=True):
+        """
+        :param fpath: 샘플 파일 경로 (또는 경로 목록)
+        :param use_registry: 같은 샘플/파라미터로 복제한 voice가 레지스트리에 있으면 업로드 없이 재사용
+        """
+        files = [fpath] if isinstance(fpath, str) else list(fpath)
+
+        key = VoiceRegistry.make_key(files, name, desc) if use_registry else None
+        if key:
+            voice_id = self.registry.lookup(key)
+            if voice_id:
+                logger.info(f"등록된 voice 사용: {name} ({voice_id})")
+                self.setVoiceId(voice_id)
+                return
+
         voice = self.client.clone(
             name=name,
             description=desc,
-            files=[fpath],
+            files=files,
         )
         self.setVoiceId(voice.voice_id)
 
-    def generate(self, content):
-        self.audio = self.client.generate(
-                        text=content,
-                        voice=Voice(
-                                voice_id=self.voice_id,
-                                settings=self.voice_settings
-                            )
-                     )
+        if key:
+            self.registry.register(key, voice.voice_id, name, desc, files)
 
-    def saveAudio(self, path):
-        if (self.audio):
+    def _cacheKey(self, content):
+        settings = {**self.voice_settings.model_dump(), "output_format": self.output_format}
+        return TTSCache.make_key(self.voice_id, content, settings, self.model_id)
+
+    def _request(self, content, stream=False):
+        return self.client.generate(
+                    text=content,
+                    voice=Voice(
+                            voice_id=self.voice_id,
+                            settings=self.voice_settings
+                        ),
+                    model=self.model_id,
+                    output_format=self.output_format,
+                    stream=stream
+                )
+
+    def generate(self, content, use_cache=True):
+        """
+        :param content: 음성으로 변환할 텍스트
+        :param use_cache: 같은 (voice, 텍스트, 설정, 모델)로 생성한 적이 있으면 API를 호출하지 않음
+        """
+        self.audio = None
+        self.audio_path = None
+
+        key = self._cacheKey(content)
+        if use_cache:
+            self.audio_path = self.cache.get(key)
+            if self.audio_path:
+                logger.info(f"TTS 캐시 사용: {self.audio_path} {self.cache.stats()}")
+                return
+
+        self.audio = b"".join(self._request(content))
+
+        if use_cache:
+            self.audio_path = self.cache.put(key, self.audio)
+
+    def _synthesize(self, content, use_cache=True) -> tuple:
+        """
+        텍스트 하나를 합성 (캐시 사용, 인스턴스 상태를 바꾸지 않으므로 스레드에서 호출 가능)
+        :return: (오디오 bytes, API로 새로 합성했는지)
+        """
+        key = self._cacheKey(content)
+        cached = self.cache.get(key) if use_cache else None
+        if cached:
+            with open(cached, "rb") as f:
+                return f.read(), False
+
+        audio = b"".join(self._request(content))
+        if use_cache:
+            self.cache.put(key, audio)
+        return audio, True
+
+    @staticmethod
+    def splitSentences(content) -> list:
+        """
+        문장 경계(. ? ! 및 줄바꿈)에서 스크립트를 나눈다.
+        """
+        sentences = re.split(r"(?<=[.?!。？！])\s+|\n+", content.strip())
+        return [s.strip() for s in sentences if s and s.strip()]
+
+    def generate_sentences(self, content, path, max_workers=None, crossfade_ms=30, use_cache=True) -> list:
+        """
+        긴 스크립트를 문장 단위로 나눠 동시에 합성한 뒤, 음량을 맞추고 crossfade로 이어 붙여 path에 저장.
+        동시 요청 수는 max_workers(기본값: ELEVENLABS_MAX_CONCURRENCY, 계정의 동시 요청 제한에 맞출 것)로 제한한다.
+
+        :param path: 최종 오디오 파일 경로 (mp3)
+        :param crossfade_ms: 문장 사이 crossfade 길이(ms)
+        :return: 문장별 타이밍 [{"index", "text", "start", "end"}, ...] (초)
+        """
+        sentences = self.splitSentences(content)
+        if not sentences:
+            raise ValueError("합성할 문장이 없습니다.")
+
+        max_workers = max_workers or int(os.getenv("ELEVENLABS_MAX_CONCURRENCY", "2"))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(lambda text: self._synthesize(text, use_cache), sentences))
+
+        segments = [AudioSegment.from_file(io.BytesIO(chunk), format="mp3") for chunk, _ in results]
+
+        # 음량 맞춤: 문장별 평균 음량(dBFS)을 전체 평균으로 정렬
+        levels = [seg.dBFS for seg in segments if seg.dBFS != float("-inf")]
+        target = sum(levels) / len(levels) if levels else 0
+        segments = [seg.apply_gain(target - seg.dBFS) if seg.dBFS != float("-inf") else seg
+                    for seg in segments]
+
+        combined = AudioSegment.empty()
+        timings = []
+        for i, (text, seg) in enumerate(zip(sentences, segments)):
+            fade = min(crossfade_ms, len(combined), len(seg))
+            start_ms = len(combined) - fade
+            combined = combined.append(seg, crossfade=fade) if len(combined) else seg
+            timings.append({"index": i, "text": text,
+                            "start": start_ms / 1000, "end": (start_ms + len(seg)) / 1000})
+
+        bitrate = self.output_format.rsplit("_", 1)[-1] if self.output_format.startswith("mp3") else "128"
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        combined.export(path, format="mp3", bitrate=f"{bitrate}k")
+
+        self.audio = None
+        self.audio_path = path
+        if self.timer:
+            # 캐시에서 가져온 문장은 이미 보정에 쓰였으므로 새로 합성한 문장만 표본으로 추가
+            self.timer.calibrate_timings(self.voice_id, [t for t, (_, fresh) in zip(timings, results) if fresh])
+        logger.info(f"문장 단위 TTS 완료: {len(sentences)}문장, {len(combined) / 1000:.2f}s {self.cache.stats()}")
+        return timings
+
+    @staticmethod
+    def toSubtitles(timings, fontsize=40, color='white') -> list:
+        """
+        generate_sentences의 타이밍을 VideoText.하단자막 형식으로 변환
+        :return: [(start, end, text, fontsize, color), ...]
+        """
+        return [(t["start"], t["end"], t["text"], fontsize, color) for t in timings]
+
+    def generate_stream(self, content, path, use_cache=True, on_chunk=None, background=True) -> StreamingAudio:
+        """
+        스트리밍 TTS: 오디오 청크가 도착하는 대로 path에 기록한다.
+        반환된 StreamingAudio의 duration / wait_for(초)로 합성 중에도 현재까지의 길이를 확인할 수 있다.
+
+        :param path: 오디오를 기록할 파일 경로
+        :param on_chunk: 청크 기록 후 호출되는 콜백 on_chunk(StreamingAudio)
+        :param background: True면 별도 스레드에서 기록하고 바로 반환
+        StreamingAudio는 캐시 저장까지 끝난 뒤 완료되며, 실패하면 wait()가 예외를 다시 발생시킨다.
+        """
+        self.audio = None
+        self.audio_path = None
+
+        bitrate = int(self.output_format.rsplit("_", 1)[-1]) if self.output_format.startswith("mp3") else 128
+        stream = StreamingAudio(path, bitrate_kbps=bitrate)
+
+        key = self._cacheKey(content)
+        cached = self.cache.get(key) if use_cache else None
+        if cached:
+            # 캐시 히트: 스트리밍 없이 바로 완료
+            FileUtil.link_or_copy(cached, path)
+            stream.bytes_written = os.path.getsize(path)
+            stream.finish()
+            self.audio_path = cached
+            logger.info(f"TTS 캐시 사용: {cached} {self.cache.stats()}")
+            return stream
+
+        def run():
+            error = None
+            try:
+                audio = stream.write_all(self._request(content, stream=True), on_chunk=on_chunk)
+                if use_cache:
+                    self.audio_path = self.cache.put(key, audio)
+                self.audio = audio
+            except Exception as e:
+                error = e
+                logger.error(f"TTS 스트리밍 실패: {e}")
+            finally:
+                # client.audio / audio_path / 캐시가 모두 준비된 뒤에 완료 신호
+                stream.finish(error)
+
+        if background:
+            threading.Thread(target=run, daemon=True).start()
+        else:
+            run()
+        return stream
+
+    def saveAudio(self, path, link=False):
+        """
+        :param link: 캐시 파일이 있으면 복사 대신 하드링크 시도
+        """
+        if self.audio_path:
+            FileUtil.link_or_copy(self.audio_path, path, link=link)
+        elif (self.audio):
             save(self.audio, path)
 
     def playAudio(self):
+        if self.audio is None and self.audio_path:
+            with open(self.audio_path, "rb") as f:
+                self.audio = f.read()
         if (self.audio):
             play(self.audio)
@@ -0,0 +1,96 @@
+import os
+import time
+import threading
+
+from common.Logger import logger
+
+class StreamingAudio:
+    """
+    스트리밍 TTS 결과를 파일에 조금씩 기록하면서 진행 상황(현재까지의 길이)을 노출하는 객체.
+    합성이 끝나기 전에 wait_for(초)로 필요한 길이만큼 기다렸다가 후속 작업(비디오 자르기 등)을 시작할 수 있다.
+    """
+
+    def __init__(self, path: str, bitrate_kbps: int = 128):
+        """
+        :param path: 오디오를 기록할 파일 경로
+        :param bitrate_kbps: CBR mp3 비트레이트 (길이 추정용, 예: mp3_44100_128 → 128)
+        """
+        self.path = path
+        self.bitrate_kbps = bitrate_kbps
+        self.bytes_written = 0
+        self.error = None
+        self.started_at = time.time()
+        self.first_chunk_at = None
+        self._done = threading.Event()
+        self._cond = threading.Condition()
+
+    @property
+    def duration(self) -> float:
+        """
+        지금까지 기록된 오디오 길이(초, CBR 기준 추정치)
+        """
+        return self.bytes_written * 8 / (self.bitrate_kbps * 1000)
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def write_all(self, chunks, on_chunk=None):
+        """
+        chunks(bytes iterator)를 파일에 순서대로 기록. 청크마다 flush 하므로 다른 프로세스도 읽을 수 있다.
+        완료 신호는 보내지 않으므로, 후처리(캐시 저장 등)까지 끝난 뒤 호출 측에서 finish()를 호출해야 한다.
+        :param on_chunk: 청크 기록 후 호출되는 콜백 on_chunk(self)
+        :return: 기록한 전체 바이트
+        """
+        data = bytearray()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "wb") as f:
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                f.write(chunk)
+                f.flush()
+                data.extend(chunk)
+                with self._cond:
+                    if self.first_chunk_at is None:
+                        self.first_chunk_at = time.time()
+                        logger.info(f"TTS 첫 청크 수신: {self.first_chunk_at - self.started_at:.2f}s")
+                    self.bytes_written += len(chunk)
+                    self._cond.notify_all()
+                if on_chunk:
+                    on_chunk(self)
+        return bytes(data)
+
+    def finish(self, error: Exception = None):
+        """
+        합성 완료(또는 실패) 신호. 대기 중인 wait/wait_for를 깨운다.
+        :param error: 실패 원인. 지정하면 wait()가 이 예외를 다시 발생
+        """
+        with self._cond:
+            self.error = error
+            self._done.set()
+            self._cond.notify_all()
+
+    def wait_for(self, seconds: float, timeout: float = None) -> bool:
+        """
+        기록된 길이가 seconds 이상이 되거나 합성이 끝날 때까지 대기
+        :return: seconds 만큼 확보되었으면 True
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while self.duration < seconds and not self._done.is_set():
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return self.duration >= seconds
+
+    def wait(self, timeout: float = None) -> str:
+        """
+        합성이 끝날 때까지 대기 후 파일 경로 반환. 실패했으면 예외를 다시 발생
+        """
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"TTS 스트리밍이 {timeout}초 안에 끝나지 않았습니다.")
+        if self.error:
+            raise self.error
+        return self.path
@@ -0,0 +1,102 @@
+import os
+import threading
+import unicodedata
+
+from common.FileUtil import FileUtil
+from common.Logger import logger
+
+class TTSCache:
+    """
+    TTS 결과(오디오 파일)를 내용 기반 키로 디스크에 저장하는 캐시.
+
+    - 키: (voice_id, 정규화된 텍스트, VoiceSettings, model) 의 해시
+    - 저장: root_dir/<키 앞 2자리>/<키>.mp3, 임시 파일에 쓴 뒤 교체(atomic)
+    - 용량: 전체 크기가 max_bytes를 넘으면 가장 오래 사용하지 않은 파일부터 삭제(LRU, mtime 기준)
+    """
+
+    def __init__(self, root_dir: str = None, max_bytes: int = None, ext: str = 'mp3'):
+        self.root_dir = root_dir or os.getenv("ELEVENLABS_CACHE_DIR", "cache/tts")
+        self.max_bytes = max_bytes or int(os.getenv("ELEVENLABS_CACHE_MAX_MB", "1024")) * 1024 * 1024
+        self.ext = ext
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        # 유니코드 정규화 + 공백 정리 (줄바꿈/중복 공백 차이로 캐시가 갈리지 않도록)
+        return " ".join(unicodedata.normalize("NFC", text).split())
+
+    @staticmethod
+    def make_key(voice_id: str, text: str, settings: dict, model: str) -> str:
+        return FileUtil.sha256_json({
+            "voice_id": voice_id,
+            "text": TTSCache.normalize_text(text),
+            "settings": settings,
+            "model": model,
+        })
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root_dir, key[:2], f"{key}.{self.ext}")
+
+    def get(self, key: str) -> str:
+        """
+        :return: 캐시된 오디오 파일 경로, 없으면 None
+        """
+        path = self._path(key)
+        with self._lock:
+            if not os.path.isfile(path):
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        # 최근 사용 시각 갱신 (LRU)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def put(self, key: str, data: bytes) -> str:
+        """
+        오디오 데이터를 저장하고 경로를 반환
+        """
+        path = self._path(key)
+        FileUtil.atomic_write(path, data)
+        self._evict()
+        return path
+
+    def _evict(self):
+        """
+        전체 용량이 max_bytes를 넘으면 오래된 파일부터 삭제
+        """
+        entries = []
+        total = 0
+        for dirpath, _, filenames in os.walk(self.root_dir):
+            for name in filenames:
+                if name.startswith(".tmp_"):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            logger.debug(f"TTS 캐시 삭제: {path}")
+            if total <= self.max_bytes:
+                break
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
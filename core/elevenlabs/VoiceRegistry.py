@@ -0,0 +1,68 @@
+import os
+import threading
+from datetime import datetime
+
+from common.FileUtil import FileUtil
+
+class VoiceRegistry:
+    """
+    복제(clone)한 voice를 저장해 두는 JSON 레지스트리.
+    샘플 파일 내용의 해시 + 복제 파라미터(name, description)를 키로 voice_id를 찾으므로,
+    같은 화자 샘플로는 한 번만 업로드/복제하면 된다.
+
+    파일 형식: {key: {"voice_id", "name", "description", "files", "created_at"}, ...}
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv("ELEVENLABS_VOICE_REGISTRY", "cache/voices.json")
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(files: list, name: str, description: str = '') -> str:
+        return FileUtil.sha256_json({
+            "files": [FileUtil.sha256_file(f) for f in files],
+            "name": name,
+            "description": description,
+        })
+
+    def _load(self) -> dict:
+        return FileUtil.read_json(self.path, default={})
+
+    def lookup(self, key: str) -> str:
+        """
+        :return: 등록된 voice_id, 없으면 None
+        """
+        entry = self._load().get(key)
+        return entry["voice_id"] if entry else None
+
+    def register(self, key: str, voice_id: str, name: str, description: str = '', files: list = None):
+        with self._lock:
+            voices = self._load()
+            voices[key] = {
+                "voice_id": voice_id,
+                "name": name,
+                "description": description,
+                "files": [os.path.basename(f) for f in (files or [])],
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+            }
+            FileUtil.write_json(self.path, voices)
+
+    def invalidate(self, key: str = None, voice_id: str = None) -> int:
+        """
+        키 또는 voice_id로 항목 삭제 (예: ElevenLabs에서 voice를 지운 경우)
+        :return: 삭제된 항목 수
+        """
+        with self._lock:
+            voices = self._load()
+            remaining = {k: v for k, v in voices.items()
+                         if k != key and (voice_id is None or v.get("voice_id") != voice_id)}
+            removed = len(voices) - len(remaining)
+            if removed:
+                FileUtil.write_json(self.path, remaining)
+            return removed
+
+    def list(self) -> list:
+        """
+        :return: [{"key", "voice_id", "name", ...}, ...]
+        """
+        return [{"key": k, **v} for k, v in self._load().items()]
@@ -0,0 +1,144 @@
+import os
+import asyncio
+
+import httpx
+
+from common.JobPoller import JobPoller, RetryableError
+from common.Logger import logger
+from core.lipsync.LipSync import LibSync
+from core.lipsync.WebhookServer import WebhookServer
+
+class AsyncLibSync:
+    """
+    asyncio 기반 LipSync 클라이언트.
+
+    하나의 event loop와 공유 HTTP 세션(httpx.AsyncClient)으로 수백 개의 generation을 동시에 추적한다.
+    run()으로 처리하는 generation 수는 max_concurrency(계정의 동시 처리 제한)로 제한되며,
+    슬롯은 run() 안에서만 잡고 반환한다 (submit()/result()를 따로 쓰면 호출 측에서 제한).
+
+        sync = AsyncLibSync()
+        response = await sync.run(video_url, audio_url)
+    """
+
+    def __init__(self, max_concurrency: int = None, webhook: WebhookServer = None, poll_interval=60):
+        """
+        :param max_concurrency: 동시에 진행할 generation 수 (기본값: SYNC_SO_MAX_CONCURRENCY 또는 10)
+        :param webhook: 웹훅 서버. 지정하면 폴링은 느린 fallback으로만 사용
+        :param poll_interval: 최대 폴링 간격(초)
+        """
+        self._sync = LibSync(webhook=webhook)
+        self.webhook = webhook
+        self.poll_interval = poll_interval
+        self.max_concurrency = max_concurrency or int(os.getenv("SYNC_SO_MAX_CONCURRENCY", "10"))
+
+        self._semaphore = None
+        self._client = None
+        self._waiters = {}              # {generation_id: asyncio.Event} 웹훅 대기
+        self._loop = None
+
+    async def _session(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._loop = asyncio.get_running_loop()
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._client = httpx.AsyncClient(
+                headers={"x-api-key": self._sync.apikey},
+                timeout=httpx.Timeout(30.0),
+                limits=httpx.Limits(max_connections=self.max_concurrency * 2, max_keepalive_connections=self.max_concurrency)
+            )
+            if self.webhook:
+                self.webhook.subscribe(self._on_webhook)
+        return self._client
+
+    def _on_webhook(self, generation_id, data):
+        # 웹훅 서버 스레드에서 호출됨 → event loop로 넘겨서 대기 중인 폴링을 깨움 (깨우는 신호로만 사용)
+        event = self._waiters.get(generation_id)
+        if event and data.get("status") in WebhookServer.TERMINAL_STATUSES:
+            self._loop.call_soon_threadsafe(event.set)
+
+    async def submit(self, video_url, audio_url) -> str:
+        """
+        생성 요청 후 generation_id 반환 (동시 처리 슬롯은 잡지 않음, 제한이 필요하면 run() 사용)
+        """
+        client = await self._session()
+        logger.info("Requesting LipSync API (async)...")
+        response = await client.post(self._sync.endpoint, json=self._sync._makePayload(video_url, audio_url))
+        generation_id = response.json().get("id")
+        if not generation_id:
+            raise RuntimeError(f"No 'id' found in response: {response.text}")
+        return generation_id
+
+    async def _fetch(self, generation_id) -> dict:
+        """
+        LibSync._fetchGeneration의 async 버전. 429/5xx 는 RetryableError, 그 밖의 오류는 status='ERROR'
+        """
+        try:
+            response = await self._client.get(self._sync._getGeneratedEndpoint(generation_id))
+        except httpx.HTTPError as e:
+            raise RetryableError(str(e))
+        if response.status_code != 200:
+            logger.error(f"Error: {response.status_code} - {response.text}")
+            if JobPoller.is_retryable_status(response.status_code):
+                raise RetryableError(f"HTTP {response.status_code}")
+            return {"status": "ERROR"}
+        return response.json()
+
+    async def result(self, generation_id: str, max_duration=LibSync.MAX_DURATION) -> dict:
+        """
+        generation이 끝날 때까지 기다린 뒤 LibSync.monitor_status와 같은 형식으로 반환
+        웹훅이 오면 바로 상태를 다시 조회하며, 결과는 항상 API에서 조회한 값을 사용한다.
+        """
+        await self._session()
+        if self.webhook:
+            # 가장 느린 fallback 폴링 간격
+            poller = JobPoller("lipsync", initial_interval=self.poll_interval * 5,
+                               max_interval=self.poll_interval * 5, timeout=max_duration)
+        else:
+            poller = JobPoller("lipsync", max_interval=self.poll_interval, timeout=max_duration)
+        wake = asyncio.Event()
+        self._waiters[generation_id] = wake
+
+        # 다음 확인 시점까지 기다리되, 웹훅이 오면 바로 깨어나 다시 조회
+        async def sleep(delay):
+            try:
+                await asyncio.wait_for(wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                return
+            wake.clear()
+            self.webhook.discard(generation_id)
+
+        try:
+            data = await poller.poll_async(
+                lambda: self._fetch(generation_id),
+                lambda d: d.get("status") in (*WebhookServer.TERMINAL_STATUSES, "ERROR"),
+                LibSync._getProgress,
+                is_success=lambda d: d.get("status") == "COMPLETED",
+                sleep=sleep
+            )
+        except RuntimeError as e:
+            logger.error(f"LipSync {generation_id} 상태 조회가 계속 실패합니다: {e}")
+            return {"outputUrl": None, "status": "ERROR", "total_time": None}
+        finally:
+            self._waiters.pop(generation_id, None)
+            if self.webhook:
+                self.webhook.discard(generation_id)
+
+        if data is None:
+            logger.error(f"LipSync {generation_id} timed out ({max_duration}s).")
+            return {"outputUrl": None, "status": "TIMEOUT", "total_time": None}
+        return self._sync._makeResult(data)
+
+    async def run(self, video_url, audio_url, max_duration=LibSync.MAX_DURATION) -> dict:
+        """
+        submit + result. 동시 처리 슬롯을 요청부터 결과 조회까지 잡고 있다가 취소/예외에도 반환
+        """
+        await self._session()
+        async with self._semaphore:
+            generation_id = await self.submit(video_url, audio_url)
+            return await self.result(generation_id, max_duration)
+
+    async def close(self):
+        if self.webhook:
+            self.webhook.unsubscribe(self._on_webhook)
+        if self._client:
+            await self._client.aclose()
+            self._client = None
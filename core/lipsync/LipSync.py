@@ -3,12 +3,21 @@ import requests
 import time
 from datetime import datetime, timezone, timedelta
 
+from common.JobPoller import JobPoller, RetryableError
 from common.Logger import logger
+from core.lipsync.WebhookServer import WebhookServer
 
 class LibSync():
-    def __init__(self):
+    # 한 작업을 기다리는 최대 시간(초). 입력 presigned URL은 최소 이 시간 동안 유효해야 한다.
+    MAX_DURATION = 1200
+
+    def __init__(self, webhook: WebhookServer = None):
+        """
+        :param webhook: 완료 알림을 받을 웹훅 서버. 지정하면 runSyncAndMonitor가 폴링 대신 웹훅을 기다린다.
+        """
         self.endpoint = self._getEndpoint()
         self.apikey = self._getApiKey()
+        self.webhook = webhook
 
     def _getEndpoint(self):
         return os.getenv("SYNC_SO_API_ENDPOINT")
@@ -18,9 +27,52 @@ class LibSync():
     
     def _getGeneratedEndpoint(self, id: str) -> str:
         return f'{self.endpoint}/{id}'
+
+    def _getWebhookUrl(self):
+        # 외부 공개 URL(SYNC_SO_WEBHOOK)이 없으면 로컬 웹훅 서버 주소 사용
+        webhook_url = os.getenv("SYNC_SO_WEBHOOK")
+        if self.webhook:
+            webhook_url = self.webhook.with_token(webhook_url) if webhook_url else self.webhook.url
+        return webhook_url
+
+    def _makeResult(self, data: dict) -> dict:
+        """
+        generation 데이터 → {"outputUrl", "status", "total_time"}
+        """
+        current_status = data.get("status", "UNKNOWN")
+        if current_status != "COMPLETED":
+            return {
+                "outputUrl": None,
+                "status": current_status,
+                "total_time": None
+            }
+
+        created_at_utc = data.get("createdAt")  # 예: "2025-01-10T04:04:53.706Z"
+        total_time_str = "N/A"
+        if created_at_utc:
+            created_at_dt = datetime.fromisoformat(created_at_utc.replace("Z", "+00:00"))
+            now_local = datetime.now(timezone(timedelta(hours=9)))
+            diff = now_local - created_at_dt
+            total_time_str = str(diff)
+
+        return {
+            "outputUrl": data.get("outputUrl"),
+            "status": current_status,
+            "total_time": total_time_str
+        }
     
-    def reqLibSync(self, video_url, audio_url):
-        payload = {
+    @staticmethod
+    def _getProgress(data: dict) -> float:
+        """
+        generation 데이터의 진행률 (0~1), 없으면 None
+        """
+        progress = data.get("progress")
+        if isinstance(progress, (int, float)):
+            return progress / 100 if progress > 1 else progress
+        return None
+
+    def _makePayload(self, video_url, audio_url) -> dict:
+        return {
             "model": os.getenv("SYNC_SO_MODEL"),
             "input": [
                 {
@@ -33,8 +85,11 @@ class LibSync():
                 }
             ],
             "options": {"output_format": "mp4"},
-            "webhookUrl": os.getenv("SYNC_SO_WEBHOOK")
+            "webhookUrl": self._getWebhookUrl()
         }
+
+    def reqLibSync(self, video_url, audio_url):
+        payload = self._makePayload(video_url, audio_url)
         headers = {
             'Content-Type': 'application/json',
             'x-api-key': self.apikey
@@ -44,84 +99,94 @@ class LibSync():
         response = requests.request("POST", self.endpoint, json=payload, headers=headers)
         return response.json()
     
-    def monitor_status(self, generation_id: str, poll_interval=60, max_duration=1200):
+    def _fetchGeneration(self, generation_id: str) -> dict:
         """
-        1) poll_interval 간격으로 GET 요청하여 상태를 확인
-        2) 최대 max_duration(초)까지만 폴링 (기본값 900초 = 15분)
-        3) 상태가 'COMPLETED'면 outputUrl, status, total_time 반환
-        4) 상태가 'CANCELED', 'FAILED', 'REJECTED'면 즉시 반환
-        5) 'PENDING', 'PROCESSING'는 poll_interval만큼 대기 후 재시도
-        6) 15분 넘으면 TIMEOUT 처리
+        generation 상태 조회. 429/5xx 는 RetryableError, 그 밖의 오류는 status='ERROR'
         """
-        import time
-        from datetime import datetime, timezone, timedelta
-
         headers = {"x-api-key": self.apikey}
+        url = self._getGeneratedEndpoint(generation_id)
+        try:
+            response = requests.get(url, headers=headers)
+        except requests.RequestException as e:
+            raise RetryableError(str(e))
 
-        start_time = time.time()  # 폴링 시작 시점 (epoch time)
+        if response.status_code != 200:
+            logger.error(f"Error: {response.status_code} - {response.text}")
+            if JobPoller.is_retryable_status(response.status_code):
+                raise RetryableError(f"HTTP {response.status_code}")
+            return {"status": "ERROR"}
+
+        data = response.json()
+        logger.info(f"Now status: {data.get('status', 'UNKNOWN')}")
+        return data
+
+    def monitor_status(self, generation_id: str, poll_interval=60, max_duration=MAX_DURATION):
+        """
+        1) 짧은 간격부터 시작해 poll_interval(최대 간격)까지 늘려가며 GET 요청으로 상태를 확인 (JobPoller)
+        2) 최대 max_duration(초)까지만 폴링 (기본값 1200초 = 20분)
+        3) 상태가 'COMPLETED'면 outputUrl, status, total_time 반환
+        4) 상태가 'CANCELED', 'FAILED', 'REJECTED'(또는 재시도할 수 없는 오류)면 즉시 반환
+        5) 'PENDING', 'PROCESSING' 등은 계속 대기, 429/5xx는 제한된 횟수만큼 재시도
+           (재시도를 다 써도 예외 대신 status='ERROR' 반환)
+        6) max_duration 넘으면 TIMEOUT 처리
+        """
+        poller = JobPoller("lipsync", max_interval=poll_interval, timeout=max_duration)
+        try:
+            data = poller.poll(
+                lambda: self._fetchGeneration(generation_id),
+                lambda d: d.get("status") in (*WebhookServer.TERMINAL_STATUSES, "ERROR"),
+                self._getProgress,
+                is_success=lambda d: d.get("status") == "COMPLETED"
+            )
+        except RuntimeError as e:
+            logger.error(f"LipSync {generation_id} status check failed: {e}")
+            data = {"status": "ERROR"}
+        if data is None:
+            return {
+                "outputUrl": None,
+                "status": "TIMEOUT",
+                "total_time": None
+            }
+        return self._makeResult(data)
+    
+    def wait_webhook(self, generation_id: str, fallback_interval=300, max_duration=MAX_DURATION):
+        """
+        웹훅으로 완료 알림을 기다린다. 웹훅이 유실된 경우를 대비해 fallback_interval마다 한 번씩 GET으로 확인.
+        웹훅은 깨우는 신호로만 쓰고, 결과는 항상 GET으로 다시 조회한 값을 반환한다.
+        :return: monitor_status와 같은 형식
+        """
+        start_time = time.time()
 
         while True:
-            # 진행 시간 계산
-            elapsed = time.time() - start_time
-            if elapsed > max_duration:
-                # 15분(900초) 초과 시 타임아웃 처리
-                logger.error("Polling timed out (exceeded 15 minutes).")
+            remaining = max_duration - (time.time() - start_time)
+            if remaining <= 0:
+                logger.error(f"Webhook wait timed out ({max_duration}s).")
                 return {
                     "outputUrl": None,
                     "status": "TIMEOUT",
                     "total_time": None
                 }
 
-            url = self._getGeneratedEndpoint(generation_id)
-            response = requests.get(url, headers=headers)
-
-            if response.status_code != 200:
-                logger.error(f"Error: {response.status_code} - {response.text}")
-                time.sleep(poll_interval)
+            # 웹훅이 오거나 fallback_interval이 지나면 상태 조회
+            woke = self.webhook.wait(generation_id, timeout=min(fallback_interval, remaining)) is not None
+            try:
+                data = self._fetchGeneration(generation_id)
+            except RetryableError as e:
+                logger.warning(f"Fallback poll failed: {e}")
+                if woke:
+                    # 웹훅은 남겨 두고 잠시 뒤 다시 조회
+                    time.sleep(min(5, remaining))
                 continue
-            
-            data = response.json()
-            current_status = data.get("status", "UNKNOWN")
-            
-            logger.info(f"Now status: {current_status}")
-            
-            if current_status == "COMPLETED":
-                output_url = data.get("outputUrl")
-                created_at_utc = data.get("createdAt")  # 예: "2025-01-10T04:04:53.706Z"
-
-                total_time_str = "N/A"
-                if created_at_utc:
-                    created_at_dt = datetime.fromisoformat(created_at_utc.replace("Z", "+00:00"))
-                    now_local = datetime.now(timezone(timedelta(hours=9)))
-                    diff = now_local - created_at_dt
-                    total_time_str = str(diff)
+            self.webhook.discard(generation_id)
 
-                return {
-                    "outputUrl": output_url,
-                    "status": current_status,
-                    "total_time": total_time_str
-                }
+            # ERROR: 재시도할 수 없는 API 오류 (monitor_status와 동일하게 종료)
+            if data.get("status") in (*WebhookServer.TERMINAL_STATUSES, "ERROR"):
+                return self._makeResult(data)
 
-            elif current_status in ["CANCELED", "FAILED", "REJECTED", "PENDING"]:
-                return {
-                    "outputUrl": None,
-                    "status": current_status,
-                    "total_time": None
-                }
-            elif current_status == "PROCESSING":
-                time.sleep(poll_interval)
-                continue
-            
-            else:
-                # 예기치 못한 상태
-                logger.warning(f"Unexpected status: {current_status}. Retrying...")
-                time.sleep(poll_interval)
-                continue
-    
     def runSyncAndMonitor(self, video_url, audio_url, poll_interval=60):
         """
         1) reqLibSync() 호출 -> generation_id 획득
-        2) generation_id 기반으로 monitor_status() 진행
+        2) 웹훅 서버가 있으면 wait_webhook(), 없으면 generation_id 기반으로 monitor_status() 진행
         3) 최종 결과(완료 시점 정보) 반환
         """
         # 1) 비디오/오디오를 합성(또는 싱크)하도록 요청
@@ -134,7 +199,10 @@ class LibSync():
             return None
         
         # 2) 특정 id가 COMPLETED 될 때까지 모니터링
-        final_result = self.monitor_status(generation_id, poll_interval)
+        if self.webhook:
+            final_result = self.wait_webhook(generation_id)
+        else:
+            final_result = self.monitor_status(generation_id, poll_interval)
         
         # 3) 최종 완료 정보를 반환
         return final_result
\ No newline at end of file
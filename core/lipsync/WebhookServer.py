@@ -0,0 +1,184 @@
+import os
+import hmac
+import json
+import secrets
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, urlencode
+
+from common.Logger import logger
+
+class WebhookServer:
+    """
+    sync.so 웹훅(생성 완료 알림)을 받는 작은 HTTP 서버.
+
+    reqLibSync가 보낸 webhookUrl로 POST가 들어오면 generation id별로 결과를 저장하고,
+    wait(id)로 기다리던 쪽을 바로 깨운다. 웹훅이 먼저 도착해도(등록 전) 결과를 보관해 둔다.
+
+    웹훅 URL에는 공유 비밀값(token 쿼리)을 붙이고, token이 맞지 않는 POST는 403으로 거절한다.
+    웹훅 내용(outputUrl 등)은 그대로 믿지 않고 깨우는 신호로만 쓰며, 최종 결과는 API에서 다시 조회해야 한다.
+    """
+
+    TERMINAL_STATUSES = ("COMPLETED", "CANCELED", "FAILED", "REJECTED")
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, host: str = None, port: int = None, path: str = None, max_results: int = 1000,
+                 secret: str = None):
+        """
+        :param host: 바인딩 주소 (기본값: SYNC_SO_WEBHOOK_HOST 또는 127.0.0.1, 외부 공개 시 리버스 프록시 사용)
+        :param port: 포트 (기본값: SYNC_SO_WEBHOOK_PORT 또는 8787, 0이면 임의 포트)
+        :param path: 웹훅 경로 (기본값: SYNC_SO_WEBHOOK URL의 path)
+        :param max_results: 보관할 최대 결과 수 (오래된 것부터 삭제)
+        :param secret: 웹훅 URL의 token 값 (기본값: SYNC_SO_WEBHOOK_SECRET, 없으면 프로세스마다 무작위 생성)
+        """
+        self.host = host or os.getenv("SYNC_SO_WEBHOOK_HOST", "127.0.0.1")
+        self.port = int(port if port is not None else os.getenv("SYNC_SO_WEBHOOK_PORT", "8787"))
+        self.path = path or urlparse(os.getenv("SYNC_SO_WEBHOOK", "")).path or "/"
+        self.max_results = max_results
+        self.secret = secret or os.getenv("SYNC_SO_WEBHOOK_SECRET") or secrets.token_urlsafe(24)
+
+        self._results = OrderedDict()   # {generation_id: payload}
+        self._listeners = []            # resolve 시 호출할 콜백 listener(generation_id, data)
+        self._cond = threading.Condition()
+        self._httpd = None
+        self._thread = None
+
+    @classmethod
+    def shared(cls):
+        """
+        프로세스 전역에서 하나만 띄우는 서버 (처음 호출 시 시작)
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls().start()
+            return cls._shared
+
+    @property
+    def url(self) -> str:
+        """
+        로컬에서 접근 가능한 웹훅 URL (외부 공개 URL은 SYNC_SO_WEBHOOK 환경변수 사용)
+        """
+        host = "127.0.0.1" if self.host in ("0.0.0.0", "") else self.host
+        return self.with_token(f"http://{host}:{self.port}{self.path}")
+
+    def with_token(self, url: str) -> str:
+        """
+        url에 token 쿼리를 붙여 반환 (sync.so에 넘기는 webhookUrl)
+        """
+        return f"{url}{'&' if '?' in url else '?'}{urlencode({'token': self.secret})}"
+
+    def verify(self, request_path: str) -> bool:
+        """
+        요청 경로의 token 쿼리가 secret과 같은지 확인
+        """
+        token = parse_qs(urlparse(request_path).query).get("token", [""])[0]
+        return hmac.compare_digest(token.encode(), self.secret.encode())
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if urlparse(self.path).path != server.path:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                if not server.verify(self.path):
+                    logger.warning("Webhook rejected: invalid token")
+                    self.send_response(403)
+                    self.end_headers()
+                    return
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                except (ValueError, json.JSONDecodeError):
+                    self.send_response(400)
+                    self.end_headers()
+                    return
+
+                server.resolve(payload)
+                self.send_response(200)
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                logger.debug(f"Webhook: {format % args}")
+
+        self._httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Webhook server started: {self.url}")
+        return self
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def resolve(self, payload: dict):
+        """
+        웹훅 payload로 대기 중인 generation을 완료 처리
+        payload는 generation 객체 자체 또는 {"result": generation} 형태
+        """
+        data = payload.get("result", payload) if isinstance(payload, dict) else None
+        if not isinstance(data, dict):
+            logger.warning(f"Webhook payload is not a generation: {payload}")
+            return
+        generation_id = data.get("id")
+        if not generation_id:
+            logger.warning(f"Webhook payload without id: {payload}")
+            return
+
+        logger.info(f"Webhook received: {generation_id} {data.get('status')}")
+        with self._cond:
+            self._results[generation_id] = data
+            self._results.move_to_end(generation_id)
+            while len(self._results) > self.max_results:
+                self._results.popitem(last=False)
+            self._cond.notify_all()
+            listeners = list(self._listeners)
+
+        for listener in listeners:
+            try:
+                listener(generation_id, data)
+            except Exception as e:
+                logger.error(f"Webhook listener error: {e}")
+
+    def subscribe(self, listener):
+        """
+        웹훅 수신 시 호출할 콜백 등록 (스레드 없이 기다려야 하는 asyncio 쪽에서 사용)
+        :param listener: listener(generation_id, data), 웹훅 서버 스레드에서 호출됨
+        """
+        with self._cond:
+            self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        with self._cond:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def get(self, generation_id: str) -> dict:
+        with self._cond:
+            return self._results.get(generation_id)
+
+    def wait(self, generation_id: str, timeout: float = None) -> dict:
+        """
+        generation_id의 최종 상태 웹훅이 올 때까지 대기
+        :return: generation 데이터, timeout이면 None
+        """
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._results.get(generation_id, {}).get("status") in self.TERMINAL_STATUSES,
+                timeout=timeout
+            )
+            data = self._results.get(generation_id)
+            if data and data.get("status") in self.TERMINAL_STATUSES:
+                return data
+            return None
+
+    def discard(self, generation_id: str):
+        with self._cond:
+            self._results.pop(generation_id, None)
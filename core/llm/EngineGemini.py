@@ -2,6 +2,7 @@ import os
 import google.generativeai as genai
 
 from common.Logger import logger
+from prompt.PromptRegistry import PromptRegistry
 
 class EngineGemini:
     """
@@ -15,29 +16,50 @@ class EngineGemini:
         # gemini-2.0-flash-exp'
         # gemini-1.5-flash
         # self.client = genai.GenerativeModel(model_name='gemini-2.0-flash-exp')
-        self.client = genai.GenerativeModel(model_name='gemini-1.5-flash')
+        self.model = 'gemini-1.5-flash'
+        self.name = 'gemini'
+        self.client = genai.GenerativeModel(model_name=self.model)
+        # 템플릿은 시작할 때 한 번 읽고 검증 (호출마다 파일을 읽지 않음)
+        self.prompts = PromptRegistry.shared()
 
-    def _load_prompt(self, type='speech_time', who='', time=30, contents='') -> str:
-        project_root = os.getcwd()
-        prompt = ''
+    def render(self, type='speech_time', who='', time=30, contents='', **params) -> str:
+        """
+        API에 보낼 최종 프롬프트 (캐시 키에 사용). 템플릿은 PromptRegistry에 미리 로드되어 있음
+        """
+        return self.prompts.render(type, self.name, who=who, time=time, contents=contents, **params)
 
-        if type == 'speech_time':
-            prompt_path = os.path.join(project_root, 'prompt', 'SpeechTime_Gemini.txt')
-        
-            with open(prompt_path, 'r', encoding='utf-8') as f:
-                prompt = f.read()
-            prompt = prompt.format(who=who, time=time, contents=contents)
-        
-        return prompt
-        
-    def generate(self, type='speech_time', who='', time=30, contents='') -> str:
-        prompt = self._load_prompt(type, who=who, time=time, contents=contents)
-        if not prompt:
-            logger.error("프롬프트 준비 과정에서 오류가 발생했습니다.")
-            return None
-        
+    def complete(self, prompt: str) -> str:
         logger.info(f'Call Gemini API...')
         response = self.client.generate_content(str(prompt))
         logger.info(f'Done Gemini API.')
         return response.text
 
+    def stream(self, prompt: str):
+        """
+        응답을 토큰(조각) 단위로 yield
+        차단되었거나 candidate가 없는 조각은 건너뜀 (chunk.text가 ValueError를 내서 중간에 끊기지 않도록)
+        """
+        logger.info(f'Call Gemini API (stream)...')
+        for chunk in self.client.generate_content(str(prompt), stream=True):
+            if not chunk.candidates:
+                logger.warning(f'Gemini stream: 빈 조각을 건너뜁니다. ({chunk.prompt_feedback})')
+                continue
+            try:
+                text = chunk.text
+            except ValueError as e:
+                logger.warning(f'Gemini stream: 텍스트가 없는 조각을 건너뜁니다. ({e})')
+                continue
+            if text:
+                yield text
+        logger.info(f'Done Gemini API (stream).')
+
+    async def complete_async(self, prompt: str) -> str:
+        response = await self.client.generate_content_async(str(prompt))
+        return response.text
+
+    def generate(self, type='speech_time', who='', time=30, contents='') -> str:
+        prompt = self.render(type, who=who, time=time, contents=contents)
+        if not prompt:
+            logger.error("프롬프트 준비 과정에서 오류가 발생했습니다.")
+            return None
+        return self.complete(prompt)
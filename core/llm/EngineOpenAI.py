@@ -1,7 +1,8 @@
 import os
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 
 from common.Logger import logger
+from prompt.PromptRegistry import PromptRegistry
 
 class EngineOpenAI:
     """
@@ -19,28 +20,18 @@ class EngineOpenAI:
         # o1-mini
         # self.model = 'o1-mini'
         self.model = 'gpt-4o-mini'
+        self.name = 'openai'
+        self._async_client = None
+        # 템플릿은 시작할 때 한 번 읽고 검증 (호출마다 파일을 읽지 않음)
+        self.prompts = PromptRegistry.shared()
 
-    def _load_prompt(self, type='speech_time', who='', time=30, contents='') -> str:
-        project_root = os.getcwd()
-        prompt = ''
-        system_prompt = ''
-        user_prompt = ''
-
-        if type == 'speech_time':
-            prompt_path = os.path.join(project_root, 'prompt', 'SpeechTime_OpenAI.txt')
-        
-            with open(prompt_path, 'r', encoding='utf-8') as f:
-                prompt = f.read()
-            prompt = prompt.format(who=who, time=time, contents=contents)
-        
-        return prompt
+    def render(self, type='speech_time', who='', time=30, contents='', **params) -> str:
+        """
+        API에 보낼 최종 프롬프트 (캐시 키에 사용). 템플릿은 PromptRegistry에 미리 로드되어 있음
+        """
+        return self.prompts.render(type, self.name, who=who, time=time, contents=contents, **params)
 
-    def generate(self, type='speech_time', who='', time=30, contents='') -> str:
-        prompt = self._load_prompt(type, who=who, time=time, contents=contents)
-        if not prompt:
-            logger.error("프롬프트 준비 과정에서 오류가 발생했습니다.")
-            return None
-        
+    def complete(self, prompt: str) -> str:
         logger.info(f'Call OpenAI API...')        
         response = self.client.chat.completions.create(
             model=self.model,
@@ -48,4 +39,41 @@ class EngineOpenAI:
         )
         logger.info(f'Done OpenAI API.')
         
-        return response.choices[0].message.content.strip()
\ No newline at end of file
+        return response.choices[0].message.content.strip()
+
+    def stream(self, prompt: str):
+        """
+        응답을 토큰(조각) 단위로 yield
+        """
+        logger.info(f'Call OpenAI API (stream)...')
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            stream=True
+        )
+        for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+        logger.info(f'Done OpenAI API (stream).')
+
+    async def complete_async(self, prompt: str) -> str:
+        # AsyncOpenAI는 event loop에 묶인 커넥션 풀을 쓰므로 처음 호출할 때 생성
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        response = await self._async_client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}]
+        )
+        return response.choices[0].message.content.strip()
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+
+    def generate(self, type='speech_time', who='', time=30, contents='') -> str:
+        prompt = self.render(type, who=who, time=time, contents=contents)
+        if not prompt:
+            logger.error("프롬프트 준비 과정에서 오류가 발생했습니다.")
+            return None
+        return self.complete(prompt)
\ No newline at end of file
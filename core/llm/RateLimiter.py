@@ -0,0 +1,54 @@
+import os
+import time
+import asyncio
+import threading
+
+class TokenBucket:
+    """
+    provider별 요청 속도 제한 (token bucket).
+    rate(초당 토큰)로 채워지고 최대 capacity개까지 몰아서 쓸 수 있다.
+    상태는 스레드 lock으로 보호하므로 여러 스레드/event loop에서 같은 bucket을 공유할 수 있다.
+    """
+
+    _buckets = {}
+    _buckets_lock = threading.Lock()
+
+    def __init__(self, rate: float, capacity: float = None):
+        """
+        :param rate: 초당 허용 요청 수
+        :param capacity: 한 번에 몰아서 보낼 수 있는 최대 요청 수 (기본값: max(1, rate))
+        """
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_provider(cls, name: str):
+        """
+        provider 이름별 공유 bucket. 속도는 LLM_RPM_<NAME> 환경변수(분당 요청 수, 기본값 60)
+        """
+        with cls._buckets_lock:
+            bucket = cls._buckets.get(name)
+            if bucket is None:
+                rpm = float(os.getenv(f"LLM_RPM_{name.upper()}", "60"))
+                bucket = cls._buckets[name] = cls(rpm / 60)
+            return bucket
+
+    def _reserve(self) -> float:
+        """
+        토큰 하나를 예약하고, 그 토큰이 생길 때까지 기다려야 하는 시간(초)을 반환
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self):
+        time.sleep(self._reserve())
+
+    async def acquire_async(self):
+        await asyncio.sleep(self._reserve())
@@ -0,0 +1,138 @@
+import os
+import time
+import threading
+import unicodedata
+from concurrent.futures import Future
+from datetime import datetime
+
+from common.FileUtil import FileUtil
+from common.Logger import logger
+
+class ResponseCache:
+    """
+    LLM 응답을 디스크에 저장하는 캐시.
+
+    - 키: (engine, model, 렌더링이 끝난 프롬프트) 의 해시
+    - 저장: root_dir/<키 앞 2자리>/<키>.json, 임시 파일에 쓴 뒤 교체(atomic)
+    - 만료: ttl초가 지난 응답은 사용하지 않음
+    - 용량: 항목 수가 max_entries를 넘으면 가장 오래 사용하지 않은 것부터 삭제(LRU, mtime 기준)
+    - 같은 키로 동시에 들어온 요청은 한 번만 호출하고 결과를 나눠 받음
+    """
+
+    def __init__(self, root_dir: str = None, ttl: float = None, max_entries: int = None):
+        """
+        :param root_dir: 저장 디렉토리 (기본값: LLM_CACHE_DIR 또는 cache/llm)
+        :param ttl: 응답 유효 시간(초) (기본값: LLM_CACHE_TTL_HOURS 또는 168시간)
+        :param max_entries: 최대 항목 수 (기본값: LLM_CACHE_MAX_ENTRIES 또는 2000)
+        """
+        self.root_dir = root_dir or os.getenv("LLM_CACHE_DIR", "cache/llm")
+        self.ttl = ttl if ttl is not None else float(os.getenv("LLM_CACHE_TTL_HOURS", "168")) * 3600
+        self.max_entries = max_entries or int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2000"))
+        self.hits = 0
+        self.misses = 0
+        self._inflight = {}     # {key: Future} 진행 중인 요청
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(engine: str, model: str, prompt: str) -> str:
+        return FileUtil.sha256_json({
+            "engine": engine,
+            "model": model,
+            "prompt": unicodedata.normalize("NFC", prompt),
+        })
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> str:
+        """
+        :return: 캐시된 응답, 없거나 만료됐으면 None
+        """
+        path = self._path(key)
+        entry = FileUtil.read_json(path)
+        if entry and time.time() - entry.get("created_at", 0) > self.ttl:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            entry = None
+
+        with self._lock:
+            if not entry:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        # 최근 사용 시각 갱신 (LRU)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry["text"]
+
+    def put(self, key: str, text: str, model: str = ''):
+        FileUtil.write_json(self._path(key), {
+            "text": text,
+            "model": model,
+            "created_at": time.time(),
+            "created": datetime.now().isoformat(timespec="seconds"),
+        })
+        self._evict()
+
+    def get_or_create(self, key: str, create, model: str = '') -> str:
+        """
+        캐시에 있으면 반환하고, 없으면 create()를 호출해 저장.
+        같은 키로 이미 진행 중인 요청이 있으면 새로 호출하지 않고 그 결과를 기다린다.
+        """
+        text = self.get(key)
+        if text is not None:
+            return text
+
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+
+        if not owner:
+            logger.debug(f"LLM 요청 합침: {key[:12]}")
+            return future.result()
+
+        try:
+            text = create()
+            if text:
+                self.put(key, text, model)
+            future.set_result(text)
+            return text
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _evict(self):
+        """
+        항목 수가 max_entries를 넘으면 오래된 것부터 삭제
+        """
+        entries = []
+        for dirpath, _, filenames in os.walk(self.root_dir):
+            for name in filenames:
+                if name.startswith(".tmp_"):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    entries.append((os.stat(path).st_mtime, path))
+                except FileNotFoundError:
+                    continue
+
+        for _, path in sorted(entries)[:max(0, len(entries) - self.max_entries)]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            logger.debug(f"LLM 캐시 삭제: {path}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
@@ -0,0 +1,102 @@
+import os
+import re
+import threading
+
+from common.FileUtil import FileUtil
+
+class SpeechTimer:
+    """
+    한국어 대본의 발화 시간을 TTS 없이 추정하는 로컬 estimator.
+
+    시간 = 음절 수 × 음절당 시간 + 문장 끝 수 × 문장 쉼 + 쉼표 수 × 쉼표 쉼
+    음절당 시간은 voice별로 실제 TTS 결과(문장별 길이)에서 보정한다.
+
+    보정 파일 형식: {voice_id: [[음절 수, 문장 끝 수, 쉼표 수, 실제 길이(초)], ...], ...}
+    """
+
+    # 보정 전 기본값: 보통 속도의 한국어 낭독(초당 약 6.5음절)
+    SEC_PER_SYLLABLE = 0.155
+    SENTENCE_PAUSE = 0.45
+    COMMA_PAUSE = 0.2
+
+    MIN_SAMPLES = 3         # 이보다 적으면 기본 속도 사용
+    MAX_SAMPLES = 200       # voice별 최근 표본만 유지
+
+    def __init__(self, path: str = None):
+        """
+        :param path: 보정 파일 경로 (기본값: SPEECH_TIMER_PATH 또는 cache/speech_timer.json)
+        """
+        self.path = path or os.getenv("SPEECH_TIMER_PATH", "cache/speech_timer.json")
+        self._lock = threading.Lock()
+        self._rates = {}    # {voice_id: 음절당 시간} 계산 결과 캐시
+
+    @staticmethod
+    def features(text: str) -> tuple:
+        """
+        :return: (음절 수, 문장 끝 수, 쉼표 수)
+        """
+        syllables = len(re.findall(r"[가-힣]", text))
+        # 영어 단어는 모음 묶음 수, 숫자는 자리당 약 1.3음절(예: 2025 → 이천이십오)로 계산
+        for word in re.findall(r"[A-Za-z]+", text):
+            syllables += max(1, len(re.findall(r"[aeiouyAEIOUY]+", word)))
+        syllables += len(re.findall(r"\d", text)) * 1.3
+
+        # 문장부호 뒤 공백/줄바꿈은 같은 경계 하나로 계산 ("문장.\n다음"은 쉼 1번)
+        sentences = len(re.findall(r"[.?!。？！]+\s*|\n+", text.strip()))
+        commas = len(re.findall(r"[,，、·…]", text))
+        return syllables, sentences, commas
+
+    def _load(self) -> dict:
+        return FileUtil.read_json(self.path, default={})
+
+    def sec_per_syllable(self, voice_id: str = None) -> float:
+        """
+        voice의 음절당 시간 (표본이 부족하면 기본값)
+        """
+        if not voice_id:
+            return self.SEC_PER_SYLLABLE
+        with self._lock:
+            if voice_id in self._rates:
+                return self._rates[voice_id]
+
+        samples = self._load().get(voice_id, [])
+        rate = self.SEC_PER_SYLLABLE
+        syllables = sum(s[0] for s in samples)
+        if len(samples) >= self.MIN_SAMPLES and syllables > 0:
+            speech = sum(s[3] - s[1] * self.SENTENCE_PAUSE - s[2] * self.COMMA_PAUSE for s in samples)
+            rate = min(0.4, max(0.08, speech / syllables))
+
+        with self._lock:
+            self._rates[voice_id] = rate
+        return rate
+
+    def estimate(self, text: str, voice_id: str = None) -> float:
+        """
+        :return: 예상 발화 시간(초)
+        """
+        syllables, sentences, commas = self.features(text)
+        return (syllables * self.sec_per_syllable(voice_id)
+                + sentences * self.SENTENCE_PAUSE + commas * self.COMMA_PAUSE)
+
+    def calibrate(self, voice_id: str, samples: list):
+        """
+        실제 TTS 결과로 voice 보정
+        :param samples: [(텍스트, 실제 길이(초)), ...]
+        """
+        if not voice_id or not samples:
+            return
+        with self._lock:
+            data = self._load()
+            entries = data.get(voice_id, [])
+            for text, duration in samples:
+                if duration > 0 and text.strip():
+                    entries.append([*self.features(text), duration])
+            data[voice_id] = entries[-self.MAX_SAMPLES:]
+            FileUtil.write_json(self.path, data)
+            self._rates.pop(voice_id, None)
+
+    def calibrate_timings(self, voice_id: str, timings: list):
+        """
+        ElevenlabsClient.generate_sentences의 문장별 타이밍으로 보정
+        """
+        self.calibrate(voice_id, [(t["text"], t["end"] - t["start"]) for t in timings])
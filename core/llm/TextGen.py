@@ -1,21 +1,44 @@
 import os
+import asyncio
+from time import perf_counter
 from core.llm.EngineOpenAI import EngineOpenAI
 from core.llm.EngineGemini import EngineGemini
+from core.llm.ResponseCache import ResponseCache
+from core.llm.RateLimiter import TokenBucket
+from core.llm.SpeechTimer import SpeechTimer
+from common.Logger import logger
 
 class TextGen:
     """
     공통 인터페이스: api='gemini' or 'openai' 등
     - 초기화 시 해당 provider 객체를 생성
-    - genText(contents) 호출 시 prompt load -> provider.generate(...)
+    - genText(contents) 호출 시 prompt render -> (캐시 확인) -> provider.complete(...)
+    - genText는 로컬 발화 시간 추정으로 길이를 확인하고, 목표를 벗어나면 LLM에 다시 요청 (TTS 전에 길이 맞춤)
+    - genTextStream은 응답을 생성되는 대로 yield (provider.stream), TTFT 기록
+    - genTextBatch(items) 는 여러 요청을 동시에 처리 (provider.complete_async)
     """
 
-    def __init__(self, engine: str = 'gemini'):
+    # 목표 시간 대비 최소 길이 비율 (예: 30초 목표면 24~30초)
+    FIT_MIN_RATIO = 0.8
+
+    def __init__(self, engine: str = 'gemini', cache: ResponseCache = None, provider=None,
+                 timer: SpeechTimer = None):
         """
         :param engine: 'gemini' or 'openai' 등
+        :param cache: 응답 캐시 (기본값: ResponseCache())
+        :param provider: 직접 만든 provider (render, complete, complete_async, model 필요. 테스트용 가짜 provider 등)
+        :param timer: 발화 시간 estimator (기본값: SpeechTimer())
         """
         self.engine = engine
-        self.provider = None
+        self.provider = provider
+        self.cache = cache or ResponseCache()
+        self.limiter = TokenBucket.for_provider(engine)
+        self.timer = timer or SpeechTimer()
+        self.last_estimate = None
+        self.last_metrics = None
 
+        if provider is not None:
+            return
         if engine == 'gemini':
             self.provider = EngineGemini()
         elif engine == 'openai':
@@ -23,10 +46,152 @@ class TextGen:
         else:
             raise ValueError(f"지원하지 않는 API: {engine}")
 
-    def genText(self, type='speech_time', who='', time=30, contents='') -> str:
+    def _complete(self, type, who, time, contents, use_cache=True, **params) -> str:
+        """
+        prompt render -> (캐시 확인) -> provider.complete
+        """
+        prompt = self.provider.render(type=type, who=who, time=time, contents=contents, **params)
+        if not prompt:
+            logger.error("프롬프트 준비 과정에서 오류가 발생했습니다.")
+            return None
+
+        def complete():
+            self.limiter.acquire()
+            return self.provider.complete(prompt)
 
+        if not use_cache:
+            return complete()
+
+        key = ResponseCache.make_key(self.engine, self.provider.model, prompt)
+        response_text = self.cache.get_or_create(key, complete, model=self.provider.model)
+        logger.info(f"LLM 캐시: {self.cache.stats()}")
+        return response_text
+
+    def genText(self, type='speech_time', who='', time=30, contents='', use_cache=True,
+                voice_id=None, fit=True, max_attempts=None) -> str:
+        """
+        :param use_cache: 같은 (engine, model, 프롬프트)로 받은 응답이 있으면 API를 호출하지 않음.
+                          동시에 들어온 같은 요청도 한 번만 호출한다.
+        :param voice_id: 발화 시간 추정에 쓸 voice (보정 데이터가 있으면 그 속도로 계산)
+        :param fit: 예상 발화 시간이 목표(time × FIT_MIN_RATIO ~ time초)를 벗어나면 LLM에 고쳐 쓰기를 요청
+        :param max_attempts: 고쳐 쓰기 최대 횟수 (기본값: LLM_FIT_MAX_ATTEMPTS 또는 3)
+        예상 발화 시간은 self.last_estimate 에 기록된다.
+        """
         if not self.provider:
             raise RuntimeError("Provider가 설정되지 않았습니다.")
 
-        response_text = self.provider.generate(type='speech_time', who=who, time=time, contents=contents)
-        return response_text
\ No newline at end of file
+        response_text = self._complete(type, who, time, contents, use_cache)
+        if not fit or type != 'speech_time' or not response_text:
+            return response_text
+
+        max_attempts = max_attempts if max_attempts is not None else int(os.getenv("LLM_FIT_MAX_ATTEMPTS", "3"))
+        min_time = round(time * self.FIT_MIN_RATIO)
+        for attempt in range(max_attempts + 1):
+            self.last_estimate = self.timer.estimate(response_text, voice_id)
+            if min_time <= self.last_estimate <= time or attempt == max_attempts:
+                break
+
+            action = "Shorten" if self.last_estimate > time else "Lengthen"
+            logger.info(f"대본 길이 조정 ({attempt + 1}/{max_attempts}): "
+                        f"예상 {self.last_estimate:.1f}s, 목표 {min_time}~{time}s")
+            response_text = self._complete('revise', who, time, response_text, use_cache,
+                                           estimate=round(self.last_estimate, 1), min_time=min_time,
+                                           action=action) or response_text
+
+        logger.info(f"예상 발화 시간: {self.last_estimate:.1f}s (목표 {min_time}~{time}s)")
+        return response_text
+
+    def genTextStream(self, type='speech_time', who='', time=30, contents='', use_cache=True, voice_id=None):
+        """
+        응답을 생성되는 대로 조각(str) 단위로 yield (UI에서 바로 보여주기 위함)
+        캐시에 있으면 전체 응답을 한 번에 yield 하고, 끝까지 받은 응답은 캐시에 저장한다.
+        스트리밍 중에는 다시 요청할 수 없으므로 길이는 확인만 해서 self.last_estimate 에 기록.
+        첫 조각까지 걸린 시간(TTFT)과 전체 시간은 self.last_metrics 에 기록된다.
+        """
+        if not self.provider:
+            raise RuntimeError("Provider가 설정되지 않았습니다.")
+
+        prompt = self.provider.render(type=type, who=who, time=time, contents=contents)
+        if not prompt:
+            logger.error("프롬프트 준비 과정에서 오류가 발생했습니다.")
+            return
+
+        started = perf_counter()
+        key = ResponseCache.make_key(self.engine, self.provider.model, prompt)
+        cached = self.cache.get(key) if use_cache else None
+        if cached is not None:
+            chunks = [cached]
+        else:
+            self.limiter.acquire()
+            chunks = self.provider.stream(prompt)
+
+        ttft = None
+        parts = []
+        for chunk in chunks:
+            if ttft is None:
+                ttft = perf_counter() - started
+            parts.append(chunk)
+            yield chunk
+
+        response_text = "".join(parts)
+        self.last_metrics = {"ttft": ttft, "total_time": perf_counter() - started,
+                             "chunks": len(parts), "cached": cached is not None}
+        logger.info(f"LLM stream: TTFT {ttft or 0:.2f}s, total {self.last_metrics['total_time']:.2f}s, "
+                    f"{len(parts)} chunks")
+
+        if use_cache and cached is None and response_text:
+            self.cache.put(key, response_text, self.provider.model)
+        if type == 'speech_time' and response_text:
+            self.last_estimate = self.timer.estimate(response_text, voice_id)
+
+    def genTextBatch(self, items: list, type='speech_time', max_concurrency: int = None, use_cache=True) -> list:
+        """
+        여러 요청을 동시에 생성 (동기 함수에서 호출, 이미 event loop 안이면 genTextBatchAsync 사용)
+        :param items: [{"who", "time", "contents"}, ...]
+        :return: 입력 순서대로 [{"text": str, "error": None} 또는 {"text": None, "error": str}, ...]
+        """
+        return asyncio.run(self.genTextBatchAsync(items, type=type, max_concurrency=max_concurrency,
+                                                  use_cache=use_cache))
+
+    async def genTextBatchAsync(self, items: list, type='speech_time', max_concurrency: int = None,
+                                use_cache=True) -> list:
+        """
+        동시 요청 수는 max_concurrency(기본값: LLM_MAX_CONCURRENCY 또는 8)로,
+        요청 속도는 provider별 token bucket(LLM_RPM_<ENGINE>)으로 제한.
+        배치 안에서 프롬프트가 같은 항목은 한 번만 호출한다.
+        """
+        max_concurrency = max_concurrency or int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+        semaphore = asyncio.Semaphore(max_concurrency)
+        tasks = {}  # {cache key: Task} 배치 안 중복 요청 합침
+
+        async def complete(key, prompt):
+            if use_cache:
+                text = self.cache.get(key)
+                if text is not None:
+                    return text
+            async with semaphore:
+                await self.limiter.acquire_async()
+                text = await self.provider.complete_async(prompt)
+            if use_cache and text:
+                self.cache.put(key, text, self.provider.model)
+            return text
+
+        async def run(item):
+            try:
+                prompt = self.provider.render(type=type, who=item.get("who", ''),
+                                              time=item.get("time", 30), contents=item.get("contents", ''))
+                if not prompt:
+                    raise ValueError("프롬프트 준비 과정에서 오류가 발생했습니다.")
+                key = ResponseCache.make_key(self.engine, self.provider.model, prompt)
+                if key not in tasks:
+                    tasks[key] = asyncio.ensure_future(complete(key, prompt))
+                return {"text": await tasks[key], "error": None}
+            except Exception as e:
+                logger.error(f"LLM 생성 실패: {e}")
+                return {"text": None, "error": str(e)}
+
+        try:
+            return await asyncio.gather(*(run(item) for item in items))
+        finally:
+            if hasattr(self.provider, "aclose"):
+                await self.provider.aclose()
@@ -0,0 +1,421 @@
+import os
+import json
+import shutil
+import subprocess
+import tempfile
+from functools import lru_cache
+from typing import Optional
+
+
+class FFmpeg:
+    """
+    ffmpeg / ffprobe 커맨드라인을 직접 호출하는 헬퍼.
+    MoviePy를 거치지 않고 컨테이너 수준(stream copy, concat 등)의 작업을 할 때 사용한다.
+    """
+
+    # stream copy 가 가능한 코덱 (mp4 컨테이너 기준)
+    COPYABLE_VIDEO_CODECS = ("h264",)
+    COPYABLE_AUDIO_CODECS = ("aac", "mp3")
+
+    # 조각별로 인코딩한 뒤 재인코딩 없이 이어 붙일 때 모든 조각이 공유하는 인코더 파라미터
+    SEGMENT_ENCODER_ARGS = ["-c:v", "libx264", "-preset", "medium", "-profile:v", "high",
+                            "-pix_fmt", "yuv420p"]
+
+    @staticmethod
+    def ffmpeg_bin() -> str:
+        """
+        ffmpeg 실행 파일 경로. 환경변수 FFMPEG_BINARY > MoviePy 설정 > PATH 순서로 찾는다.
+        """
+        binary = os.getenv("FFMPEG_BINARY")
+        if binary:
+            return binary
+        try:
+            from moviepy.config import FFMPEG_BINARY
+            return FFMPEG_BINARY
+        except ImportError:
+            return shutil.which("ffmpeg") or "ffmpeg"
+
+    @staticmethod
+    def ffprobe_bin() -> Optional[str]:
+        """
+        ffprobe 실행 파일 경로. 없으면 None
+        """
+        binary = os.getenv("FFPROBE_BINARY")
+        if binary:
+            return binary
+        return shutil.which("ffprobe")
+
+    @staticmethod
+    def run(args: list) -> subprocess.CompletedProcess:
+        """
+        ffmpeg 실행. 실패하면 RuntimeError
+        """
+        cmd = [FFmpeg.ffmpeg_bin(), "-hide_banner", "-loglevel", "error", "-y", *args]
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg 실행 실패: {result.stderr.strip()}")
+        return result
+
+    @staticmethod
+    def probe(path: str) -> dict:
+        """
+        컨테이너/스트림 메타데이터를 읽는다. 디코더를 띄우지 않으며,
+        결과는 (경로, mtime, size) 단위로 캐시되므로 같은 파일은 두 번째 호출부터 비용이 없다.
+        URL 등 로컬 파일이 아닌 경우는 캐시하지 않는다.
+        :return: {"duration", "video_codec", "audio_codec", "fps", "resolution", "pix_fmt", "time_base",
+                  "profile", "level", "sar", "ffprobe"} (ffprobe가 없으면 코덱/프로파일 정보는 None)
+        """
+        if not os.path.isfile(path):
+            return dict(FFmpeg._probe(path))
+
+        stat = os.stat(path)
+        return dict(FFmpeg._probe_cached(os.path.abspath(path), stat.st_mtime_ns, stat.st_size))
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _probe_cached(path: str, mtime_ns: int, size: int) -> dict:
+        # mtime/size는 캐시 키로만 사용 (파일이 바뀌면 새로 probe)
+        return FFmpeg._probe(path)
+
+    @staticmethod
+    def _probe(path: str) -> dict:
+        ffprobe = FFmpeg.ffprobe_bin()
+        if not ffprobe:
+            return FFmpeg._probe_with_ffmpeg(path)
+
+        cmd = [ffprobe, "-v", "error", "-show_format", "-show_streams", "-of", "json", path]
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffprobe 실행 실패: {result.stderr.strip()}")
+        data = json.loads(result.stdout or "{}")
+
+        info = {
+            "duration": float(data.get("format", {}).get("duration", 0) or 0),
+            "video_codec": None,
+            "audio_codec": None,
+            "ffprobe": True,
+        }
+        for stream in data.get("streams", []):
+            codec_type = stream.get("codec_type")
+            if codec_type == "video" and info["video_codec"] is None:
+                info["video_codec"] = stream.get("codec_name")
+                info["resolution"] = (int(stream.get("width", 0)), int(stream.get("height", 0)))
+                info["pix_fmt"] = stream.get("pix_fmt")
+                info["time_base"] = stream.get("time_base")
+                info["profile"] = stream.get("profile")
+                info["level"] = stream.get("level")
+                info["sar"] = stream.get("sample_aspect_ratio")
+                num, _, den = (stream.get("avg_frame_rate") or "0/1").partition("/")
+                info["fps"] = float(num) / float(den) if float(den or 0) else 0.0
+            elif codec_type == "audio" and info["audio_codec"] is None:
+                info["audio_codec"] = stream.get("codec_name")
+                info["sample_rate"] = int(stream.get("sample_rate", 0) or 0)
+
+        return info
+
+    @staticmethod
+    def _probe_with_ffmpeg(path: str) -> dict:
+        """
+        ffprobe가 없는 환경: MoviePy의 `ffmpeg -i` 헤더 파싱으로 대체 (디코딩 없음)
+        코덱 정보는 알 수 없으므로 None (→ stream copy 불가로 판단됨)
+        """
+        from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+        infos = ffmpeg_parse_infos(path)
+        info = {
+            "duration": float(infos.get("duration") or 0),
+            "video_codec": None,
+            "audio_codec": None,
+            "ffprobe": False,
+        }
+        if infos.get("video_found"):
+            info["fps"] = infos.get("video_fps")
+            info["resolution"] = tuple(infos.get("video_size") or (0, 0))
+        if infos.get("audio_found"):
+            info["sample_rate"] = infos.get("audio_fps")
+        return info
+
+    @staticmethod
+    def keyframes(path: str, until: float) -> list:
+        """
+        첫 번째 비디오 스트림의 키프레임 시각(초) 목록. 0 ~ until(+여유) 구간만 읽는다.
+        패킷 플래그만 확인하므로 디코딩은 하지 않는다.
+        """
+        ffprobe = FFmpeg.ffprobe_bin()
+        if not ffprobe:
+            raise RuntimeError("ffprobe를 찾을 수 없습니다.")
+
+        cmd = [ffprobe, "-v", "error", "-select_streams", "v:0",
+               "-read_intervals", f"%+{until + 5:.3f}",
+               "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", path]
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffprobe 실행 실패: {result.stderr.strip()}")
+
+        times = []
+        for line in result.stdout.splitlines():
+            pts_time, _, flags = line.partition(",")
+            if "K" in flags and pts_time not in ("", "N/A"):
+                times.append(float(pts_time))
+        return sorted(times)
+
+    @staticmethod
+    def concat(pieces: list, output_path: str, extra_args: list = None):
+        """
+        concat demuxer로 조각 파일들을 재인코딩 없이 이어 붙인다.
+        :param pieces: 이어 붙일 파일 경로 목록 (코덱/파라미터가 동일해야 함)
+        :param extra_args: 출력 쪽에 추가할 인자 (추가 입력 -i 도 여기서 지정 가능)
+        """
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+            for piece in pieces:
+                escaped = os.path.abspath(piece).replace("'", r"'\''")
+                f.write(f"file '{escaped}'\n")
+            list_path = f.name
+
+        try:
+            FFmpeg.run(["-f", "concat", "-safe", "0", "-i", list_path, *(extra_args or []), output_path])
+        finally:
+            os.remove(list_path)
+
+    @staticmethod
+    def smart_cut(src: str, cutoff_seconds: float, output_path: str, info: dict,
+                  keyframe_tolerance: float = 0.1) -> str:
+        """
+        키프레임을 고려하여 src의 앞부분 [0, cutoff_seconds]만 잘라 output_path로 저장.
+
+        - cutoff 지점이 키프레임 근처(keyframe_tolerance 이내)면 전체를 stream copy → 'copy'
+        - 아니면 [0, 마지막 키프레임)은 copy, [키프레임, cutoff]의 짧은 GOP만 재인코딩 후 이어붙임 → 'smart'
+
+        재인코딩한 꼬리는 원본의 H.264 profile/level/해상도/SAR에 맞추며, 맞출 수 없으면 RuntimeError.
+        코덱이 copy 불가능한 경우는 호출 측에서 판단해야 한다. (FFmpeg.can_copy)
+        :return: 'copy' 또는 'smart'
+        """
+        keyframes = FFmpeg.keyframes(src, cutoff_seconds)
+        if not keyframes:
+            raise RuntimeError("키프레임 정보를 읽을 수 없습니다.")
+
+        # 1) cutoff 지점이 키프레임 근처면 GOP가 잘리지 않으므로 그대로 copy
+        if min(abs(cutoff_seconds - k) for k in keyframes) <= keyframe_tolerance:
+            FFmpeg.run(["-i", src, "-t", f"{cutoff_seconds:.3f}",
+                        "-map", "0:v:0", "-map", "0:a:0?", "-c", "copy",
+                        "-avoid_negative_ts", "make_zero", "-movflags", "+faststart", output_path])
+            return "copy"
+
+        last_key = max([k for k in keyframes if k < cutoff_seconds], default=0.0)
+        if last_key <= 0:
+            # 재인코딩해야 할 꼬리가 곧 전체 길이라면 smart cut의 이득이 없음
+            raise RuntimeError("cutoff 이전에 키프레임이 없어 smart cut을 할 수 없습니다.")
+        # 원본과 같은 profile/level로 인코딩할 수 없으면 이음매에서 재생이 깨질 수 있으므로 포기 (→ 전체 재인코딩)
+        tail_args = FFmpeg._tail_encoder_args(info)
+
+        audio_args = ["-map", "1:a:0?", "-c:a", "copy"] if info.get("audio_codec") else []
+
+        # 2) head(copy) + tail(재인코딩) 을 MPEG-TS 로 만들어 이어 붙인다.
+        #    TS는 SPS/PPS가 키프레임마다 in-band로 들어가므로 인코더 파라미터가 달라도 안전하게 concat 가능
+        work_dir = tempfile.mkdtemp(prefix="smartcut_")
+        head_path = os.path.join(work_dir, "head.ts")
+        tail_path = os.path.join(work_dir, "tail.ts")
+        try:
+            FFmpeg.run(["-i", src, "-t", f"{last_key:.6f}", "-map", "0:v:0", "-an",
+                        "-c:v", "copy", "-bsf:v", "h264_mp4toannexb", "-f", "mpegts", head_path])
+
+            encode_args = ["-ss", f"{last_key:.6f}", "-i", src,
+                           "-t", f"{cutoff_seconds - last_key:.6f}",
+                           "-map", "0:v:0", "-an", *tail_args, "-f", "mpegts", tail_path]
+            FFmpeg.run(encode_args)
+
+            FFmpeg.concat([head_path, tail_path], output_path,
+                          extra_args=["-i", src, "-map", "0:v:0", *audio_args,
+                                      "-t", f"{cutoff_seconds:.3f}", "-c:v", "copy",
+                                      "-movflags", "+faststart"])
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        return "smart"
+
+    # ffprobe profile 이름 → libx264 -profile:v
+    X264_PROFILES = {
+        "Constrained Baseline": "baseline",
+        "Baseline": "baseline",
+        "Main": "main",
+        "High": "high",
+        "High 10": "high10",
+        "High 4:2:2": "high422",
+        "High 4:4:4 Predictive": "high444",
+    }
+
+    @staticmethod
+    def _tail_encoder_args(info: dict) -> list:
+        """
+        smart cut 꼬리 구간을 원본(head)과 같은 H.264 파라미터로 인코딩하기 위한 인자.
+        mp4의 avcC는 stream copy한 head 쪽 것을 쓰므로 profile/level/해상도/SAR/pix_fmt/fps를 맞춰야 한다.
+        맞출 수 없으면 RuntimeError
+        """
+        profile = FFmpeg.X264_PROFILES.get(info.get("profile"))
+        level = info.get("level")
+        width, height = info.get("resolution") or (0, 0)
+        if not profile or not isinstance(level, int) or level <= 0 or not (width and height):
+            raise RuntimeError(f"원본 H.264 파라미터를 맞출 수 없습니다: "
+                               f"profile={info.get('profile')}, level={level}, resolution={info.get('resolution')}")
+
+        args = ["-c:v", "libx264", "-profile:v", profile, "-level:v", f"{level / 10:.1f}", "-s", f"{width}x{height}"]
+        sar = info.get("sar")
+        if sar and sar not in ("0:1", "N/A"):
+            args += ["-vf", f"setsar={sar.replace(':', '/')}"]
+        if info.get("pix_fmt"):
+            args += ["-pix_fmt", info["pix_fmt"]]
+        if info.get("fps"):
+            args += ["-r", f"{info['fps']:.6f}"]
+        return args
+
+    @staticmethod
+    def can_copy(info: dict) -> bool:
+        """
+        stream copy(smart cut)가 가능한 코덱 조합인지 확인
+        """
+        if info.get("video_codec") not in FFmpeg.COPYABLE_VIDEO_CODECS:
+            return False
+        audio_codec = info.get("audio_codec")
+        return audio_codec is None or audio_codec in FFmpeg.COPYABLE_AUDIO_CODECS
+
+    @staticmethod
+    def encode_segment(input_args: list, output_path: str, frames: int, fps: float,
+                       size: tuple, vf: str = '', threads: int = 0, encoder_args: list = None):
+        """
+        비디오 조각 하나를 SEGMENT_ENCODER_ARGS로 인코딩 (오디오 없음, MPEG-TS)
+        같은 fps/size/인코더 파라미터로 만든 조각들은 FFmpeg.concat으로 재인코딩 없이 이어 붙일 수 있다.
+        :param input_args: 입력 쪽 인자 (예: ["-ss", "3.0", "-i", "video.mp4"])
+        :param frames: 출력 프레임 수 (조각 길이 = frames / fps)
+        :param size: 출력 크기 (width, height)
+        :param vf: 추가 비디오 필터 (크기/fps 맞춤 앞에 적용)
+        :param threads: 인코더 스레드 수 (0 = 자동)
+        :param encoder_args: SEGMENT_ENCODER_ARGS 뒤에 추가할 인코더 옵션
+        """
+        width, height = size
+        filters = [f for f in (vf, f"fps={fps:.6f}", f"scale={width}:{height}", "setsar=1") if f]
+        FFmpeg.run([*input_args, "-an", "-vf", ",".join(filters),
+                    "-frames:v", str(frames), *FFmpeg.SEGMENT_ENCODER_ARGS, *(encoder_args or []),
+                    "-threads", str(threads), "-f", "mpegts", output_path])
+
+    @staticmethod
+    def encode_still(image, output_path: str, frames: int, fps: float, threads: int = 0):
+        """
+        정지 이미지 한 장으로 frames 길이의 조각을 인코딩 (encode_segment와 이어 붙일 수 있는 형식)
+
+        이미지는 이미 출력 크기에 맞춰져 있어야 한다. (PIL.Image)
+        이미지를 yuv420p 원시 프레임으로 한 번만 변환해 두고 그 한 프레임을 반복 입력하므로,
+        프레임마다 이미지 디코딩/스케일/색변환이 일어나지 않는다.
+        GOP 하나(-g frames)에 stillimage 튜닝이라 첫 프레임 이후는 거의 skip 블록만 인코딩된다.
+        """
+        width, height = image.size
+        work_dir = tempfile.mkdtemp(prefix="still_")
+        try:
+            png_path = os.path.join(work_dir, "frame.png")
+            yuv_path = os.path.join(work_dir, "frame.yuv")
+            image.convert("RGB").save(png_path)
+            FFmpeg.run(["-i", png_path, "-frames:v", "1", "-pix_fmt", "yuv420p", "-f", "rawvideo", yuv_path])
+
+            input_args = ["-stream_loop", "-1", "-f", "rawvideo", "-pix_fmt", "yuv420p",
+                          "-s", f"{width}x{height}", "-framerate", f"{fps:.6f}", "-i", yuv_path]
+            FFmpeg.encode_segment(input_args, output_path, frames, fps, (width, height), threads=threads,
+                                  encoder_args=["-tune", "stillimage", "-g", str(frames)])
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    @staticmethod
+    def _overlay_lanes(overlays: list) -> list:
+        """
+        시간이 겹치지 않는 오버레이끼리 한 레인으로 묶는다 (먼저 비는 레인에 배정).
+        레인 수 = 동시에 보이는 최대 자막 수 (상단 고정 + 하단 자막이면 2개), 자막 개수와 무관
+        :return: [[(start, end, sprite, x, y), ...], ...] 레인별로 시작 시각 순
+        """
+        lanes = []
+        for overlay in sorted(overlays, key=lambda o: (o[0], o[1])):
+            for lane in lanes:
+                if lane[-1][1] <= overlay[0] + 1e-6:
+                    lane.append(overlay)
+                    break
+            else:
+                lanes.append([overlay])
+        return lanes
+
+    @staticmethod
+    def _write_lane(lane: list, work_dir: str, index: int) -> tuple:
+        """
+        레인 하나를 시간순 이미지 목록(ffconcat)으로 저장. 이미지는 레인의 모든 스프라이트를 덮는 크기의 캔버스이며
+        자막이 없는 구간은 투명 이미지. 같은 (스프라이트, 위치)는 PNG를 한 번만 저장한다.
+        :return: (ffconcat 파일 경로, 캔버스 x, 캔버스 y)
+        """
+        import numpy as np
+        from PIL import Image
+
+        left = min(x for _, _, _, x, _ in lane)
+        top = min(y for _, _, _, _, y in lane)
+        width = max(x + sprite.shape[1] for _, _, sprite, x, _ in lane) - left
+        height = max(y + sprite.shape[0] for _, _, sprite, _, y in lane) - top
+
+        def save(canvas, name):
+            path = os.path.join(work_dir, f"lane{index}_{name}.png")
+            Image.fromarray(canvas, "RGBA").save(path)
+            return path
+
+        blank = save(np.zeros((height, width, 4), dtype=np.uint8), "blank")
+        images = {}
+        lines = ["ffconcat version 1.0"]
+        t = 0.0
+        for start, end, sprite, x, y in lane:
+            if start > t:
+                lines += [f"file '{blank}'", f"duration {start - t:.6f}"]
+            key = (id(sprite), x, y)
+            if key not in images:
+                canvas = sprite
+                if sprite.shape[:2] != (height, width):
+                    canvas = np.zeros((height, width, 4), dtype=np.uint8)
+                    canvas[y - top:y - top + sprite.shape[0], x - left:x - left + sprite.shape[1]] = sprite
+                images[key] = save(canvas, f"{len(images):04d}")
+            lines += [f"file '{images[key]}'", f"duration {end - max(start, t):.6f}"]
+            t = end
+        # 끝난 뒤에는 투명 (concat demuxer는 마지막 항목의 duration을 쓰지 않으므로 한 번 더 적음)
+        lines += [f"file '{blank}'", "duration 1", f"file '{blank}'"]
+
+        list_path = os.path.join(work_dir, f"lane{index}.ffconcat")
+        with open(list_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        return list_path, left, top
+
+    @staticmethod
+    def burn_overlays(src: str, output_path: str, overlays: list, duration: float = 0,
+                      encoder_args: list = None):
+        """
+        src(로컬 파일 또는 URL)를 읽으면서 RGBA 스프라이트들을 overlay 필터로 합성해
+        한 번의 인코딩으로 최종 파일을 만든다. 오디오는 재인코딩하지 않고 copy.
+
+        겹치지 않는 자막들은 레인 하나(시간순 이미지 목록 입력 하나 + overlay 하나)로 합치므로,
+        입력 수와 필터 길이는 자막 개수가 아니라 동시에 보이는 자막 수에 비례한다.
+        :param overlays: [(start, end, sprite(np.ndarray RGBA), x, y), ...]
+        :param duration: 0보다 크면 출력 길이 제한
+        :param encoder_args: 비디오 인코더 옵션 (기본값: libx264 / yuv420p)
+        """
+        work_dir = tempfile.mkdtemp(prefix="overlay_")
+        try:
+            inputs = ["-i", src]
+            filters = []
+            last = "0:v"
+            for i, lane in enumerate(FFmpeg._overlay_lanes(overlays), start=1):
+                list_path, x, y = FFmpeg._write_lane(lane, work_dir, i)
+                inputs += ["-f", "concat", "-safe", "0", "-i", list_path]
+                filters.append(f"[{last}][{i}:v]overlay={x}:{y}:eof_action=pass[v{i}]")
+                last = f"v{i}"
+
+            args = [*inputs]
+            if filters:
+                args += ["-filter_complex", ";".join(filters), "-map", f"[{last}]"]
+            else:
+                args += ["-map", "0:v:0"]
+            args += ["-map", "0:a:0?", "-c:a", "copy",
+                     *(encoder_args or ["-c:v", "libx264", "-pix_fmt", "yuv420p"])]
+            if duration > 0:
+                args += ["-t", f"{duration:.3f}"]
+            FFmpeg.run([*args, "-movflags", "+faststart", output_path])
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
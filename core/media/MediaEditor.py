@@ -3,26 +3,31 @@ from datetime import datetime
 
 from moviepy import VideoFileClip, AudioFileClip
 
+from common.Logger import logger
+from core.media.FFmpeg import FFmpeg
+
 class MediaEditor:
-    def __init__(self, media_path: str):
+    def __init__(self, media_path: str, probe_only: bool = False):
         """
         :param media_path: 편집할 미디어(오디오/비디오) 파일의 경로
+        :param probe_only: True면 메타데이터(get_info)만 사용. 편집 함수 호출 시 RuntimeError
         """
         self.path = media_path
-        self.clip = None     # 이후 로딩된 MoviePy clip 객체 (VideoFileClip 또는 AudioFileClip)
+        self.probe_only = probe_only
+        self._clip = None    # 편집이 필요할 때 로딩되는 MoviePy clip 객체 (VideoFileClip 또는 AudioFileClip)
         self.is_video = False
+        self.last_cut_mode = None   # 마지막 cut_duration 처리 방식 ('copy' | 'smart' | 'reencode')
         
-        # 미디어 파일 로드
-        self._load_media()
+        # 파일/확장자 확인 (clip 로딩은 편집 시점까지 미룸)
+        self._check_media()
 
     def __del__(self):
-        if self.clip:
-            self.clip.close()
+        if self._clip:
+            self._clip.close()
 
-    def _load_media(self):
+    def _check_media(self):
         """
-        내부 메서드: 파일 확장자를 체크하고,
-        VideoFileClip 또는 AudioFileClip으로 로드
+        내부 메서드: 파일 존재 여부와 확장자를 체크
         """
         if not os.path.exists(self.path):
             raise FileNotFoundError(f"파일을 찾을 수 없습니다: {self.path}")
@@ -31,35 +36,49 @@ class MediaEditor:
         # 단순 분류 (mp4 -> video, m4a/mp3 -> audio)
         # 필요 시 더 많은 확장자 대응 가능
         if ext == ".mp4":
-            self.clip = VideoFileClip(self.path)
             self.is_video = True
         elif ext in (".m4a", ".mp3"):
-            self.clip = AudioFileClip(self.path)
+            self.is_video = False
         else:
             raise ValueError(f"지원하지 않는 파일 형식입니다: {ext}")
 
+    @property
+    def clip(self):
+        """
+        MoviePy clip. 처음 접근할 때 VideoFileClip 또는 AudioFileClip으로 로드 (ffmpeg reader 프로세스 시작)
+        """
+        if self._clip is None:
+            if self.probe_only:
+                raise RuntimeError("probe_only 모드에서는 편집 기능을 사용할 수 없습니다.")
+            self._clip = VideoFileClip(self.path) if self.is_video else AudioFileClip(self.path)
+        return self._clip
+
+    @staticmethod
+    def probe(media_path: str) -> dict:
+        """
+        MediaEditor 객체 없이 메타데이터만 읽기 (get_info와 같은 형식)
+        """
+        return MediaEditor(media_path, probe_only=True).get_info()
+
     def get_info(self):
         """
         미디어 정보 읽기:
          - 총 재생 시간(초)
          - 비디오의 경우 프레임 수, FPS 등 추가 정보
+        ffprobe로 컨테이너 정보만 읽으므로 디코더를 띄우지 않는다. (결과는 파일 단위로 캐시)
         """
         info = {}
-
-        if self.clip is None:
-            raise RuntimeError("미디어 클립이 로드되지 않았습니다.")
+        probed = FFmpeg.probe(self.path)
 
         # 공통: 총 재생 시간
-        duration = self.clip.duration  # 초 단위 float
-        info["duration"] = duration
+        info["duration"] = probed["duration"]  # 초 단위 float
 
         if self.is_video:
-            # VideoFileClip이라면, fps, size 등 확인 가능
-            info["fps"] = self.clip.fps
-            info["resolution"] = (self.clip.w, self.clip.h)  # (width, height)
+            info["fps"] = probed.get("fps")
+            info["resolution"] = probed.get("resolution")  # (width, height)
         else:
             # 오디오 파일이라면, 필요한 경우 샘플레이트 등 추가
-            pass
+            info["sample_rate"] = probed.get("sample_rate")
 
         return info
     
@@ -78,31 +97,54 @@ class MediaEditor:
         file_path = os.path.join(dirpath, filename)
         return file_path
 
-    def cut_duration(self, cutoff_seconds: float, output_path: str = ''):
+    def cut_duration(self, cutoff_seconds: float, output_path: str = '', mode: str = 'auto'):
         """
         미디어 파일을 'cutoff_seconds'초까지만 남기고 잘라낸 뒤 저장.
         :param cutoff_seconds: 잘라낼 기준 초(예: 30.0)
         :param output_path: 결과물을 저장할 파일 경로
+        :param mode: 'auto'   - 비디오면 키프레임 기반 stream copy(smart cut)를 먼저 시도하고,
+                                불가능하면 전체 재인코딩으로 대체
+                     'reencode' - 항상 MoviePy로 디코딩 후 libx264/aac 재인코딩
+        처리 방식은 self.last_cut_mode 에 기록된다. ('copy' | 'smart' | 'reencode')
         """
-        if self.clip is None:
-            raise RuntimeError("미디어 클립이 로드되지 않았습니다.")
+        if self.probe_only:
+            raise RuntimeError("probe_only 모드에서는 편집 기능을 사용할 수 없습니다.")
 
         if cutoff_seconds <= 0:
             raise ValueError("잘라낼 초(cutoff_seconds)는 0보다 커야 합니다.")
 
-        # 원본 길이와 비교
-        original_duration = self.clip.duration
+        if mode not in ('auto', 'reencode'):
+            raise ValueError(f"지원하지 않는 mode 입니다: {mode}")
+
+        # 원본 길이와 비교 (clip을 열지 않고 probe 정보 사용)
+        original_duration = self.get_info()["duration"]
         if cutoff_seconds >= original_duration:
             # cutoff_seconds가 원본 길이 이상이면, 편집할 필요가 없음
             print("원본 길이보다 짧거나 같으므로, 전체 미디어를 그대로 저장합니다.")
             cutoff_seconds = original_duration
 
-        # subclip(0, cutoff_seconds)를 이용해 앞부분만 남기기
-        sub = self.clip.subclipped(0, cutoff_seconds)
-
         if output_path == '':
             output_path = self.getNewMediaPath(ext='mp4' if self.is_video else 'mp3')
 
+        # 비디오일 경우 재인코딩 없이 자르기를 먼저 시도
+        if self.is_video and mode == 'auto':
+            try:
+                info = FFmpeg.probe(self.path)
+                if not info.get("ffprobe"):
+                    # ffprobe 없이 ffmpeg 출력만으로는 코덱을 알 수 없음
+                    logger.info("ffprobe를 찾을 수 없어 전체 재인코딩합니다.")
+                elif FFmpeg.can_copy(info):
+                    self.last_cut_mode = FFmpeg.smart_cut(self.path, cutoff_seconds, output_path, info)
+                    logger.info(f"cut_duration 처리 방식: {self.last_cut_mode} ({output_path})")
+                    return output_path
+                else:
+                    logger.info(f"stream copy 불가 코덱입니다: {info.get('video_codec')}/{info.get('audio_codec')}")
+            except RuntimeError as e:
+                logger.warning(f"stream copy 자르기 실패, 전체 재인코딩으로 대체합니다: {e}")
+
+        # subclip(0, cutoff_seconds)를 이용해 앞부분만 남기기
+        sub = self.clip.subclipped(0, cutoff_seconds)
+
         # 비디오일 경우
         if self.is_video:
             sub.write_videofile(output_path, codec="libx264", audio_codec="aac")
@@ -111,6 +153,8 @@ class MediaEditor:
             sub.write_audiofile(output_path)
         
         sub.close()
+        self.last_cut_mode = 'reencode'
+        logger.info(f"cut_duration 처리 방식: {self.last_cut_mode} ({output_path})")
         return output_path
 
     def extract_audio(self, output_path: str):
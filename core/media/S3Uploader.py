@@ -1,10 +1,17 @@
 import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
-import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import ClientError
 
+from common.AwsClients import AwsClients
+from common.FileUtil import FileUtil
+from common.Logger import logger
+
 class S3Uploader:
     """
     S3Uploader 클래스:
@@ -18,37 +25,69 @@ class S3Uploader:
        - 파일을 업로드한 뒤, 그 object_name으로 곧바로 presigned URL을 생성하고 return
     4) download:
        - S3에서 특정 object를 지정된 로컬 경로에 다운로드
+
+    content_addressed=True 이면 object key를 파일 내용의 해시로 만들고(cas/<sha256>.<ext>),
+    같은 key가 이미 있으면(head_object) 업로드를 건너뛴다. 반복 사용하는 템플릿은 HEAD 요청 한 번으로 끝난다.
+
+    presigned URL은 (bucket, key, expiration)별로 프로세스 전역 캐시에 보관되며,
+    남은 유효 시간이 min_validity 이상이면 다시 서명하지 않고 재사용한다.
     """
-    def __init__(self):
+    # {(bucket, key, expiration): (url, expires_at)}
+    _presigned_cache = {}
+    _presigned_lock = threading.Lock()
+    def __init__(self, content_addressed: bool = False):
         self.bucket_name = os.getenv('AWS_BUCKET_NAME')  # 고정 버킷 이름
         self.base_dir = os.getenv('AWS_BASE_MEDIA_DIR')
-        aws_access_key_id = os.getenv("AWS_ACCESS_KEY_ID")
-        aws_secret_access_key = os.getenv("AWS_SECRET_ACCESS_KEY")
-        region_name="ap-northeast-2"  # 필요 시 변경
-
-        self.s3_client = boto3.client(
-            "s3",
-            region_name=region_name,
-            aws_access_key_id=aws_access_key_id,
-            aws_secret_access_key=aws_secret_access_key,
-            endpoint_url='https://s3.ap-northeast-2.amazonaws.com'
+        # 프로세스 전역 공유 client (커넥션 풀/keep-alive 재사용)
+        self.s3_client = AwsClients.s3()
+        self.content_addressed = content_addressed
+
+        # multipart 업로드 설정 (chunk 크기/동시 전송 수)
+        mb = 1024 * 1024
+        self.transfer_config = TransferConfig(
+            multipart_threshold=int(os.getenv("AWS_S3_MULTIPART_THRESHOLD_MB", "8")) * mb,
+            multipart_chunksize=int(os.getenv("AWS_S3_MULTIPART_CHUNKSIZE_MB", "8")) * mb,
+            max_concurrency=int(os.getenv("AWS_S3_MAX_CONCURRENCY", "10")),
+            use_threads=True
         )
 
-    def upload_av(self, audio_path: str, video_path: str, duration:float=0, s3_key: str = None) -> dict:
+    def upload_av(self, audio_path: str, video_path: str, duration:float=0, s3_key: str = None,
+                  min_validity: int = None) -> dict:
         """
         오디오와 비디오 파일을 S3에 업로드하고, presigned URL을 생성하여 반환
         
         :param audio_path: 업로드할 오디오 파일 경로
         :param video_path: 업로드할 비디오 파일 경로
-        :param s3_key: S3 업로드 시 사용할 object key (경로). None이면 파일명으로 사용
-        :return: {"audio": {"object_key": s3_key, "presigned_url": url},
-                  "video": {"object_key": s3_key, "presigned_url": url}}
+        :param s3_key: S3 업로드 시 사용할 object key의 기본 경로. 확장자를 떼고 각 파일의 확장자를 붙여
+                       오디오/비디오가 서로 다른 key가 되도록 함 (확장자가 같으면 _audio/_video 추가).
+                       None이면 파일명으로 사용
+        :param min_validity: presigned URL이 최소한 유효해야 하는 시간(초), 예: LipSync 최대 폴링 시간
+                             (기본값: expiration의 절반)
+        :return: {"audio": {"object_key": s3_key, "presigned_url": url, "expires_at": epoch},
+                  "video": {"object_key": s3_key, "presigned_url": url, "expires_at": epoch}}
         """
-        audio_info = self.upload_presigned_url(audio_path, duration, s3_key=s3_key)
-        video_info = self.upload_presigned_url(video_path, duration, s3_key=s3_key)
+        audio_key, video_key = self._get_av_keys(s3_key, audio_path, video_path) if s3_key else (None, None)
+
+        # 오디오/비디오를 동시에 업로드
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            audio_future = executor.submit(self.upload_presigned_url, audio_path, duration, s3_key=audio_key,
+                                           min_validity=min_validity)
+            video_future = executor.submit(self.upload_presigned_url, video_path, duration, s3_key=video_key,
+                                           min_validity=min_validity)
+            audio_info = audio_future.result()
+            video_info = video_future.result()
         
         return {"audio": audio_info, "video": video_info}
     
+    @staticmethod
+    def _get_av_keys(s3_key: str, audio_path: str, video_path: str):
+        # 같은 key로 동시에 올리면 나중에 끝난 쪽만 남으므로 파일별로 key를 나눔
+        base = os.path.splitext(s3_key)[0]
+        audio_ext, video_ext = Path(audio_path).suffix, Path(video_path).suffix
+        if audio_ext == video_ext:
+            return f"{base}_audio{audio_ext}", f"{base}_video{video_ext}"
+        return f"{base}{audio_ext}", f"{base}{video_ext}"
+
     def _get_new_media_path(self, duration=0, ext='mp3'):
         # 현재 날짜와 시간 가져오기
         now = datetime.now()
@@ -59,7 +98,26 @@ class S3Uploader:
         new_file_name = f"{date_str}/{datetime_str}_{int(duration)}Sec.{ext}"
         return new_file_name
 
-    def upload(self, file_path: str, duration, s3_key: str = None) -> str:
+    def _get_content_key(self, file_path: str) -> str:
+        # 파일 내용 해시 기반 key (같은 파일은 항상 같은 key)
+        ext = Path(file_path).suffix[1:]
+        digest = FileUtil.sha256_file(file_path)
+        prefix = f"{self.base_dir}/" if self.base_dir else ''
+        return f"{prefix}cas/{digest[:2]}/{digest}.{ext}"
+
+    def exists(self, object_name: str) -> bool:
+        """
+        head_object로 object 존재 여부 확인
+        """
+        try:
+            self.s3_client.head_object(Bucket=self.bucket_name, Key=object_name)
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise RuntimeError(f"S3 head_object failed: {e}")
+
+    def upload(self, file_path: str, duration=0, s3_key: str = None) -> str:
         """
         지정된 파일을 S3에 업로드합니다.
         
@@ -70,27 +128,60 @@ class S3Uploader:
         if not os.path.isfile(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
 
+        if s3_key is None and self.content_addressed:
+            s3_key = self._get_content_key(file_path)
+            if self.exists(s3_key):
+                logger.info(f"이미 업로드된 파일입니다: {s3_key}")
+                return s3_key
+
         if s3_key is None:
             # s3_key = 'media/' + os.path.basename(file_path)
             ext = Path(file_path).suffix[1:]
             s3_key = self._get_new_media_path(duration=duration, ext=ext)
 
         try:
-            self.s3_client.upload_file(file_path, self.bucket_name, s3_key)
+            self.s3_client.upload_file(file_path, self.bucket_name, s3_key, Config=self.transfer_config)
         except ClientError as e:
             raise RuntimeError(f"S3 upload failed: {e}")
 
         return s3_key
 
-    def gen_presigned_url(self, object_name: str, expiration: int = 3600) -> str:
+    def gen_presigned_url(self, object_name: str, expiration: int = 3600, min_validity: int = None) -> str:
         """
         해당 object_name (S3 상의 key)에 대한 presigned URL을 반환
         presined url은 완전 public한 url을 expiration 시간만큼 제한하여 사용 가능하게 합니다.
+        이전에 서명한 URL의 남은 유효 시간이 min_validity 이상이면 그 URL을 그대로 반환합니다.
 
         :param object_name: S3에 업로드된 파일의 key
         :param expiration: URL 만료 시간(초), 기본 3600(1시간)
+        :param min_validity: 반환되는 URL이 최소한 유효해야 하는 시간(초) (기본값: expiration의 절반)
         :return: presigned URL (str)
         """
+        return self._presigned(object_name, expiration, min_validity)[0]
+
+    def _cached_presigned(self, object_name: str, expiration: int, min_validity: int):
+        """
+        :return: 캐시에 남은 (url, expires_at), 없거나 유효 시간이 부족하면 None
+        """
+        if min_validity is None:
+            # 지정하지 않으면 만료 직전 URL을 받아 나중에 403이 나지 않도록 절반 이상 남은 것만 재사용
+            min_validity = expiration // 2
+        if min_validity > expiration:
+            raise ValueError(f"min_validity({min_validity})가 expiration({expiration})보다 큽니다.")
+
+        cache_key = (self.bucket_name, object_name, expiration)
+        with self._presigned_lock:
+            cached = self._presigned_cache.get(cache_key)
+        if cached and cached[1] - time.time() >= min_validity:
+            return cached
+        return None
+
+    def _presigned(self, object_name: str, expiration: int, min_validity: int):
+        cached = self._cached_presigned(object_name, expiration, min_validity)
+        if cached:
+            return cached
+
+        signed_at = time.time()
         try:
             response = self.s3_client.generate_presigned_url(
                 "get_object",
@@ -100,26 +191,39 @@ class S3Uploader:
         except ClientError as e:
             raise RuntimeError(f"Presigned URL generation failed: {e}")
 
-        return response
+        entry = (response, signed_at + expiration)
+        with self._presigned_lock:
+            self._presigned_cache[(self.bucket_name, object_name, expiration)] = entry
+        return entry
 
-    def upload_presigned_url(self, file_path: str, duration: float, s3_key: str = None, expiration: int = 3600) -> dict:
+    def upload_presigned_url(self, file_path: str, duration: float, s3_key: str = None, expiration: int = 3600,
+                             min_validity: int = None) -> dict:
         """
         1) 파일을 S3에 업로드
         2) 업로드된 object key로 presigned URL을 생성
         3) object key, presigned URL을 리턴
+
+        content_addressed 모드에서 같은 파일의 URL이 캐시에 충분히 남아 있으면 업로드/HEAD/서명 모두 생략
         
         :param file_path: 업로드할 로컬 파일 경로
         :param s3_key: S3 상에서 사용할 key (경로). 미지정 시 로컬 파일명 사용
         :param expiration: presigned URL 만료 시간(초)
-        :return: {"object_key": s3_key, "presigned_url": url}
+        :param min_validity: presigned URL이 최소한 유효해야 하는 시간(초) (기본값: expiration의 절반)
+        :return: {"object_key": s3_key, "presigned_url": url, "expires_at": epoch}
         """
+        if s3_key is None and self.content_addressed:
+            key = self._get_content_key(file_path)
+            cached = self._cached_presigned(key, expiration, min_validity)
+            if cached:
+                return {"object_key": key, "presigned_url": cached[0], "expires_at": cached[1]}
+
         # 1) upload
         key = self.upload(file_path, duration, s3_key=s3_key)
         
         # 2) generate presigned URL
-        url = self.gen_presigned_url(key, expiration=expiration)
+        url, expires_at = self._presigned(key, expiration, min_validity)
         
-        return {"object_key": key, "presigned_url": url}
+        return {"object_key": key, "presigned_url": url, "expires_at": expires_at}
 
     def download(self, object_name: str, download_path: str):
         """
@@ -129,6 +233,7 @@ class S3Uploader:
         :param download_path: 다운로드할 로컬 파일 경로
         """
         try:
-            self.s3_client.download_file(self.bucket_name, object_name, download_path)
+            self.s3_client.download_file(self.bucket_name, object_name, download_path,
+                                         Config=self.transfer_config)
         except ClientError as e:
             raise RuntimeError(f"S3 download failed: {e}")
\ No newline at end of file
@@ -1,14 +1,20 @@
 import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
+from PIL import Image, ImageOps
 from moviepy import (
     VideoFileClip,
     ImageClip,
-    AudioFileClip,
-    CompositeVideoClip
+    AudioFileClip
 )
 
 from common.Logger import logger
 from common.Paths import Paths
+from core.media.FFmpeg import FFmpeg
+from core.media.Timeline import SequenceClip
 
 class SceneMixer:
     def __init__(self, video, audio, images):
@@ -23,6 +29,9 @@ class SceneMixer:
             if not os.path.isfile(img):
                 raise FileNotFoundError(f"이미지 파일을 찾을 수 없습니다: {img}")
             
+        self.video_path = video
+        self.audio_path = audio
+
         # 로드
         self.video_clip = VideoFileClip(video)
         self.audio_clip = AudioFileClip(audio)
@@ -33,7 +42,7 @@ class SceneMixer:
         # 오디오 총 길이(초)
         self.audio_duration = self.audio_clip.duration
 
-    def create_edited_video(self, output_path: str = ''):
+    def create_edited_video(self, output_path: str = '', parallel: bool = False, max_workers: int = None):
         """
         - 최종 영상 길이 = 오디오 길이 (audio_duration)
         - 이미지가 0개면 비디오+오디오 (영상은 audio_duration까지, 부족하면 반복(loop))
@@ -43,11 +52,19 @@ class SceneMixer:
           => 비디오 segment_len씩 N+1개 (loop로 부족분 채움),
              이미지 segment_len씩 N개
           => 번갈아(concat) => 최종 영상
+        세그먼트는 겹치지 않으므로 SequenceClip으로 프레임마다 현재 세그먼트 하나만 렌더링한다.
+
+        :param parallel: True면 세그먼트마다 별도 ffmpeg 프로세스로 동시에 인코딩한 뒤
+                         재인코딩 없이 이어 붙이고 오디오는 마지막에 한 번만 mux (_render_parallel)
+        :param max_workers: parallel 모드의 동시 인코딩 수 (기본값: CPU 코어 수)
         """
         if not output_path:
             # output_path = self.getNewMediaPath(ext='mp4')
             output_path = Paths.get_scenemixed_video()
 
+        if parallel:
+            return self._render_parallel(output_path, max_workers)
+
         final_duration = self.audio_duration  # 오디오 길이에 맞춤
         N = len(self.image_paths)
 
@@ -57,11 +74,11 @@ class SceneMixer:
             sub_video = self._get_subclip_with_loop(0, final_duration)
             
             if self.audio_duration >= final_duration:
-                sub_audio = self.audio_clip.subclip(0, final_duration)
+                sub_audio = self.audio_clip.subclipped(0, final_duration)
             else:
                 sub_audio = self.audio_clip  # 여기서는 거의 없을 시나리오
 
-            merged = sub_video.set_audio(sub_audio)
+            merged = sub_video.with_audio(sub_audio)
             merged.write_videofile(output_path, codec="libx264", audio_codec="aac")
 
             sub_video.close()
@@ -89,22 +106,19 @@ class SceneMixer:
                 clip = self._get_subclip_with_loop(start_t, end_t)
                 final_sequence.append(clip)
             else:
-                iclip = ImageClip(images.pop(0))
+                # 템플릿 해상도로 미리 맞춰 둔 프레임 한 장 → 프레임마다 합성/리사이즈 없음
+                iclip = ImageClip(np.array(self._fit_image(images.pop(0))))
                 iclip.duration = segment_len
                 final_sequence.append(iclip)
 
-        # merged_clips = concatenate_videoclips(final_sequence, method="compose")
-        merged_clips = CompositeVideoClip(final_sequence)
-        # merged_clips = merged_clips.set_audio(self.audio_clip)
-        merged_clips.audio = self.audio_clip
-        merged_clips.duration = final_duration
+        # 세그먼트를 순서대로 이어 붙임 (캔버스 크기 = 템플릿 비디오 크기)
+        merged_clips = SequenceClip(final_sequence, size=self.video_clip.size, fps=self.video_clip.fps)
+        merged_clips = merged_clips.with_audio(self.audio_clip).with_duration(final_duration)
 
         merged_clips.write_videofile(output_path, codec="libx264", audio_codec="aac", threads=0)
 
-        # 자원 해제
+        # 자원 해제 (SequenceClip.close가 세그먼트까지 닫음)
         merged_clips.close()
-        for c in final_sequence:
-            c.close()
 
         logger.info(f"최종 Scene Mix 영상 생성 완료: {output_path}")
 
@@ -139,7 +153,6 @@ class SceneMixer:
             clips.append(sub)
 
             leftover -= sub_duration
-            sub.close()
 
             if leftover <= 0:
                 break
@@ -147,10 +160,93 @@ class SceneMixer:
             # 한 바퀴 loop -> 다시 비디오 처음(0초)부터 사용
             current_start = 0.0
 
-        # 모든 clips를 합쳐 하나의 클립으로
-        final_clip = CompositeVideoClip(clips)
-        # final_clip = final_clip.set_duration(needed_duration)
-        final_clip = final_clip.with_duration(needed_duration)
+        # 루프 조각들을 순서대로 이어 하나의 클립으로
+        final_clip = SequenceClip(clips)
         # 혹시 float 오차가 있으면 정확히 needed_duration로 set
         final_clip = final_clip.with_duration(needed_duration)
-        return final_clip
\ No newline at end of file
+        return final_clip
+
+    def _plan_segments(self, final_duration: float, fps: float) -> list:
+        """
+        create_edited_video와 같은 배치(비디오/이미지 교차)를 프레임 단위로 나눈 세그먼트 목록.
+        조각을 이어 붙였을 때 길이 오차가 누적되지 않도록 경계를 프레임에 맞춘다.
+        :return: [{"type": 'video'|'image', "start": 초, "frames": 프레임 수, "path": 이미지 경로}, ...]
+        """
+        N = len(self.image_paths)
+        segment_count = 2*N + 1
+        total_frames = max(1, round(final_duration * fps))
+        bounds = [round(total_frames * i / segment_count) for i in range(segment_count + 1)]
+
+        images = self.image_paths.copy()
+        plan = []
+        for i in range(segment_count):
+            frames = bounds[i+1] - bounds[i]
+            if frames <= 0:
+                continue
+            if i % 2 == 0:
+                plan.append({"type": 'video', "start": bounds[i] / fps, "frames": frames, "path": self.video_path})
+            else:
+                plan.append({"type": 'image', "start": bounds[i] / fps, "frames": frames, "path": images.pop(0)})
+        return plan
+
+    def _render_segment(self, seg: dict, output_path: str, fps: float, size: tuple, threads: int):
+        """
+        세그먼트 하나를 ffmpeg으로 인코딩 (worker에서 호출)
+        이미지 세그먼트는 _fit_image로 한 번만 맞춘 뒤 정지 이미지 인코더로 처리
+        """
+        if seg["type"] == 'image':
+            FFmpeg.encode_still(self._fit_image(seg["path"], size), output_path, seg["frames"], fps, threads=threads)
+            return output_path
+
+        # -stream_loop: 원본이 부족하면 처음(0초)부터 반복 (_get_subclip_with_loop와 동일)
+        start = seg["start"] % self.video_duration
+        input_args = ["-stream_loop", "-1", "-ss", f"{start:.6f}", "-i", seg["path"]]
+        FFmpeg.encode_segment(input_args, output_path, seg["frames"], fps, size, threads=threads)
+        return output_path
+
+    def _fit_image(self, image_path: str, size: tuple = None):
+        """
+        이미지를 템플릿 해상도에 맞춰 비율 유지 축소/확대 후 가운데 정렬, 남는 부분은 검정으로 채움
+        :return: PIL.Image (RGB, size 크기)
+        """
+        size = tuple(size or self.video_clip.size)
+        with Image.open(image_path) as img:
+            return ImageOps.pad(img.convert("RGB"), size, color=(0, 0, 0))
+
+    def _render_parallel(self, output_path: str, max_workers: int = None) -> str:
+        """
+        세그먼트별 병렬 인코딩 → concat(copy) → 오디오 mux 1회
+        """
+        info = FFmpeg.probe(self.video_path)
+        fps = info.get("fps") or self.video_clip.fps
+        size = info.get("resolution") or tuple(self.video_clip.size)
+
+        final_duration = self.audio_duration
+        plan = self._plan_segments(final_duration, fps)
+
+        workers = max(1, min(max_workers or os.cpu_count() or 1, len(plan)))
+        # 코어를 worker끼리 나눠 쓰도록 인코더 스레드 수 제한
+        threads = max(1, (os.cpu_count() or 1) // workers)
+
+        work_dir = tempfile.mkdtemp(prefix="scenemix_")
+        try:
+            pieces = [os.path.join(work_dir, f"seg_{i:04d}.ts") for i in range(len(plan))]
+            logger.info(f"Scene Mix 병렬 렌더링: 세그먼트 {len(plan)}개, worker {workers}개")
+
+            # 각 worker는 ffmpeg 프로세스를 띄워 인코딩하므로 스레드 풀로 충분
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(self._render_segment, seg, piece, fps, size, threads)
+                           for seg, piece in zip(plan, pieces)]
+                for f in futures:
+                    f.result()
+
+            # 재인코딩 없이 이어 붙이고, 오디오는 여기서 한 번만 인코딩
+            FFmpeg.concat(pieces, output_path,
+                          extra_args=["-i", self.audio_path, "-map", "0:v:0", "-map", "1:a:0",
+                                      "-c:v", "copy", "-c:a", "aac",
+                                      "-t", f"{final_duration:.3f}", "-movflags", "+faststart"])
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        logger.info(f"최종 Scene Mix 영상 생성 완료: {output_path}")
+        return output_path
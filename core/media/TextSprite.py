@@ -0,0 +1,124 @@
+import os
+import math
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image, ImageColor, ImageDraw, ImageFont
+
+
+class TextSprite:
+    """
+    자막 텍스트를 RGBA 스프라이트(numpy 배열)로 한 번만 래스터화하고,
+    프레임에는 스프라이트 영역(bounding box)만 NumPy 알파 블렌딩으로 합성하는 헬퍼.
+
+    스프라이트는 (text, font, size, color, width, method) 키로 프로세스 전역 LRU 캐시에 보관되므로
+    같은 채널의 상단 자막처럼 반복되는 자막은 여러 작업에서 재사용된다.
+    """
+
+    # 기본 폰트 (한글 자막이면 한글 글리프가 있는 폰트 경로를 지정해야 함)
+    DEFAULT_FONT = os.getenv("SUBTITLE_FONT", "")
+
+    @staticmethod
+    def render(text: str, font: str = '', size: int = 50, color='white', width: int = 0,
+               method: str = 'label') -> np.ndarray:
+        """
+        텍스트를 RGBA 스프라이트로 래스터화 (캐시됨, 반환 배열은 읽기 전용)
+        :param font: 폰트 파일 경로 (빈 문자열이면 DEFAULT_FONT, 그것도 없으면 Pillow 기본 폰트)
+        :param width: method='caption'일 때 줄바꿈 기준 폭(px)
+        :param method: 'label' - 한 줄 그대로 / 'caption' - width에 맞춰 자동 줄바꿈 후 가운데 정렬
+        :return: (h, w, 4) uint8 배열
+        """
+        return TextSprite._render_cached(text, font or TextSprite.DEFAULT_FONT, int(size),
+                                         color if isinstance(color, str) else tuple(color),
+                                         int(width), method)
+
+    @staticmethod
+    @lru_cache(maxsize=int(os.getenv("SUBTITLE_SPRITE_CACHE_SIZE", "256")))
+    def _render_cached(text, font, size, color, width, method):
+        pil_font = ImageFont.truetype(font, size) if font else ImageFont.load_default(size=size)
+
+        lines = TextSprite._wrap(text, pil_font, width) if method == 'caption' and width > 0 \
+            else text.split("\n")
+        body = "\n".join(lines)
+
+        # 텍스트 크기 측정
+        measure = ImageDraw.Draw(Image.new("L", (1, 1)))
+        # Pillow 10+는 float bbox를 돌려주므로 정수 픽셀로 올림
+        left, top, right, bottom = measure.multiline_textbbox((0, 0), body, font=pil_font, align="center")
+        left, top = math.floor(left), math.floor(top)
+        right, bottom = math.ceil(right), math.ceil(bottom)
+        sprite_w = max(1, right - left)
+        if method == 'caption' and width > 0:
+            sprite_w = max(sprite_w, width)
+        sprite_h = max(1, bottom - top)
+
+        image = Image.new("RGBA", (sprite_w, sprite_h), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(image)
+        fill = ImageColor.getrgb(color) if isinstance(color, str) else color
+        fill = tuple(fill) if len(fill) == 4 else tuple(fill) + (255,)
+        draw.multiline_text(((sprite_w - (right - left)) // 2 - left, -top), body,
+                            font=pil_font, fill=fill, align="center")
+
+        sprite = np.asarray(image, dtype=np.uint8).copy()
+        sprite.setflags(write=False)
+        return sprite
+
+    @staticmethod
+    def _wrap(text: str, font, width: int) -> list:
+        """
+        폭(width) 안에 들어가도록 줄바꿈. 공백 단위로 나누고, 한 단어가 너무 길면 글자 단위로 자른다.
+        """
+        lines = []
+        for paragraph in text.split("\n"):
+            current = ''
+            for word in paragraph.split(" "):
+                candidate = f"{current} {word}" if current else word
+                if font.getlength(candidate) <= width:
+                    current = candidate
+                    continue
+                if current:
+                    lines.append(current)
+                current = ''
+                for ch in word:
+                    if current and font.getlength(current + ch) > width:
+                        lines.append(current)
+                        current = ''
+                    current += ch
+            lines.append(current)
+        return lines
+
+    @staticmethod
+    def position(sprite: np.ndarray, frame_size: tuple, pos=("center", "bottom")) -> tuple:
+        """
+        MoviePy의 with_position과 같은 표기("center"/"top"/"bottom"/"left"/"right" 또는 px)로 좌상단 좌표 계산
+        :param frame_size: (width, height)
+        :return: (x, y)
+        """
+        frame_w, frame_h = frame_size
+        sprite_h, sprite_w = sprite.shape[:2]
+        pos_x, pos_y = pos
+
+        x = {"left": 0, "center": (frame_w - sprite_w) // 2, "right": frame_w - sprite_w}.get(pos_x, pos_x)
+        y = {"top": 0, "center": (frame_h - sprite_h) // 2, "bottom": frame_h - sprite_h}.get(pos_y, pos_y)
+        return int(x), int(y)
+
+    @staticmethod
+    def blend(frame: np.ndarray, sprite: np.ndarray, x: int, y: int):
+        """
+        frame(RGB, in-place)에 sprite(RGBA)를 (x, y) 위치로 알파 블렌딩.
+        스프라이트가 덮는 영역만 계산하며, 프레임 밖으로 나가는 부분은 잘린다.
+        """
+        frame_h, frame_w = frame.shape[:2]
+        sprite_h, sprite_w = sprite.shape[:2]
+
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + sprite_w, frame_w), min(y + sprite_h, frame_h)
+        if x0 >= x1 or y0 >= y1:
+            return frame
+
+        src = sprite[y0 - y:y1 - y, x0 - x:x1 - x]
+        alpha = src[:, :, 3:4].astype(np.uint32)
+        region = frame[y0:y1, x0:x1, :3].astype(np.uint32)
+        # (src * a + dst * (255 - a)) / 255, 정수 연산
+        frame[y0:y1, x0:x1, :3] = ((src[:, :, :3] * alpha + region * (255 - alpha) + 127) // 255).astype(np.uint8)
+        return frame
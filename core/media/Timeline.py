@@ -0,0 +1,74 @@
+from bisect import bisect_right
+
+import numpy as np
+from moviepy import VideoClip
+
+
+class SequenceClip(VideoClip):
+    """
+    서로 겹치지 않고 앞뒤로 이어지는(back-to-back) 클립들을 재생하는 타임라인 렌더러.
+
+    CompositeVideoClip은 프레임마다 모든 레이어를 검사/합성하지만,
+    SequenceClip은 시각 t에 해당하는 클립 하나만 찾아(bisect) 그 프레임만 가져온다.
+    따라서 세그먼트 수가 늘어나도 프레임당 비용은 일정하다.
+
+    배치 규칙은 CompositeVideoClip과 동일:
+     - 캔버스 크기는 size(기본값: 첫 번째 클립 크기), 배경은 검정
+     - 각 클립은 좌상단(0, 0)에 배치되고 캔버스를 벗어나는 부분은 잘림
+     - mask가 있는 클립은 배경 위에 알파 합성
+    """
+
+    def __init__(self, clips: list, size: tuple = None, bg_color=(0, 0, 0), fps: float = None):
+        """
+        :param clips: 순서대로 이어 붙일 클립 목록 (각 클립의 duration 필수)
+        :param size: 출력 크기 (width, height)
+        :param bg_color: 클립이 캔버스보다 작을 때 채울 배경색
+        :param fps: 클립들에 fps가 없을 때(ImageClip만 있는 경우 등) 사용할 fps. 출력 fps는 클립들의 fps 중 최댓값
+        """
+        if not clips:
+            raise ValueError("SequenceClip에는 최소 1개의 클립이 필요합니다.")
+
+        self.clips = clips
+        self.offsets = []       # 각 클립의 시작 시각
+        total = 0.0
+        for c in clips:
+            if c.duration is None:
+                raise ValueError("duration이 없는 클립은 이어 붙일 수 없습니다.")
+            self.offsets.append(total)
+            total += c.duration
+
+        width, height = size or clips[0].size
+        self.canvas_size = (width, height)
+        self.bg_color = np.array(bg_color, dtype=np.uint8)
+
+        super().__init__(self._frame_at, duration=total)
+        # write_videofile은 fps가 없으면 실패하므로 자식 클립의 fps를 물려받음
+        self.fps = max([c.fps for c in clips if getattr(c, "fps", None)], default=fps)
+
+    def _frame_at(self, t):
+        # t 시점에 보이는 클립 하나만 선택
+        idx = max(0, min(bisect_right(self.offsets, t) - 1, len(self.clips) - 1))
+        clip = self.clips[idx]
+        local_t = min(max(t - self.offsets[idx], 0), clip.duration)
+
+        frame = clip.get_frame(local_t)
+        width, height = self.canvas_size
+        if clip.mask is None and frame.shape[:2] == (height, width):
+            # 캔버스와 크기가 같고 투명도가 없으면 합성할 필요가 없음
+            return frame
+
+        canvas = np.empty((height, width, 3), dtype=np.uint8)
+        canvas[:] = self.bg_color
+        h = min(height, frame.shape[0])
+        w = min(width, frame.shape[1])
+        region = frame[:h, :w, :3]
+        if clip.mask is not None:
+            alpha = clip.mask.get_frame(local_t)[:h, :w, np.newaxis]
+            region = region * alpha + canvas[:h, :w] * (1 - alpha)
+        canvas[:h, :w] = region
+        return canvas
+
+    def close(self):
+        for c in self.clips:
+            c.close()
+        super().close()
@@ -1,10 +1,10 @@
 import os
-import time
 from datetime import datetime
 
-import boto3
 from botocore.exceptions import ClientError
 
+from common.AwsClients import AwsClients
+from common.JobPoller import JobPoller, RetryableError
 from common.Logger import logger
 
 
@@ -15,13 +15,8 @@ class Transcript:
     """
 
     def __init__(self, audio_path: str = None):
-        # boto3 client 생성
-        self.transcribe_client = boto3.client(
-            'transcribe',
-            region_name='ap-northeast-2',
-            aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY')
-        )
+        # 프로세스 전역 공유 boto3 client
+        self.transcribe_client = AwsClients.transcribe()
         self.audio_s3key = self._upload_to_s3(audio_path, 
                                               os.getenv('AWS_BUCKET_NAME'), 
                                               os.path.basename(audio_path))
@@ -36,7 +31,7 @@ class Transcript:
         :param key: S3 키(파일 경로)
         :return: 업로드가 성공하면 s3://bucket_name/key 형태의 URI 문자열, 실패하면 None
         """
-        s3 = boto3.client('s3')
+        s3 = AwsClients.s3()
 
         try:
             bucket_name = os.getenv('AWS_BUCKET_NAME')
@@ -90,49 +85,62 @@ class Transcript:
             logger.error(f"Transcription job start error: {str(e)}")
             return None
 
-    def get_transcription_job_status(self):
+    def get_transcription_job_status(self, job_name: str = None, raise_retryable: bool = False):
         """
         특정 job_name의 상태를 가져온다.
+        :param job_name: 잡 이름 (기본값: 이 객체가 시작한 잡)
+        :param raise_retryable: True면 throttling 등 일시적 오류를 RetryableError로 전달
         :return: { 'TranscriptionJobName': ..., 'TranscriptionJobStatus': 'IN_PROGRESS'|'FAILED'|'COMPLETED', ...}
         """
         try:
             response = self.transcribe_client.get_transcription_job(
-                TranscriptionJobName=self.job_name
+                TranscriptionJobName=job_name or self.job_name
             )
             return response.get('TranscriptionJob', {})
         except ClientError as e:
+            error = e.response.get("Error", {})
+            status_code = e.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+            if raise_retryable and (JobPoller.is_retryable_status(status_code)
+                                    or "Throttl" in error.get("Code", "")
+                                    or error.get("Code") == "LimitExceededException"):
+                raise RetryableError(str(e))
             print(f"Error getting job status: {str(e)}")
             return {}
 
     def wait_for_completion(self, job_name: str, poll_interval=30, timeout=3600):
         """
         job_name에 해당하는 Transcribe 잡이 COMPLETED 혹은 FAILED 될 때까지 폴링.
+        짧은 간격부터 시작해 poll_interval까지 늘려가며 확인한다. (JobPoller)
         :param job_name: 잡 이름
-        :param poll_interval: 폴링 주기(초)
+        :param poll_interval: 최대 폴링 주기(초)
         :param timeout: 최대 대기 시간(초)
-        :return: 최종 job status dict (COMPLETED or FAILED)
+        :return: 최종 job status dict (COMPLETED or FAILED), 시간 초과거나 상태 조회가 계속 실패하면 None
         """
-        start_time = time.time()
-        while True:
-            elapsed = time.time() - start_time
-            if elapsed > timeout:
-                logger.info(f"Transcription job {job_name} timed out after {timeout} seconds.")
-                return None
-
-            job_info = self.get_transcription_job_status(job_name)
+        poller = JobPoller("transcribe", max_interval=poll_interval, timeout=timeout)
+
+        def is_done(job_info):
             status = job_info.get('TranscriptionJobStatus')
             if not status:
                 logger.info("No job status found, waiting...")
-            elif status == 'COMPLETED':
-                logger.info(f"Job {job_name} completed.")
-                return job_info
-            elif status == 'FAILED':
-                logger.info(f"Job {job_name} failed.")
-                return job_info
-            else:
+            elif status not in ('COMPLETED', 'FAILED'):
                 logger.info(f"Job {job_name} status: {status}, waiting...")
+            return status in ('COMPLETED', 'FAILED')
+
+        try:
+            job_info = poller.poll(
+                lambda: self.get_transcription_job_status(job_name, raise_retryable=True),
+                is_done,
+                is_success=lambda job_info: job_info.get('TranscriptionJobStatus') == 'COMPLETED'
+            )
+        except RuntimeError as e:
+            logger.error(f"Transcription job {job_name} status check failed: {e}")
+            return None
+        if job_info is None:
+            logger.info(f"Transcription job {job_name} timed out after {timeout} seconds.")
+            return None
 
-            time.sleep(poll_interval)
+        logger.info(f"Job {job_name} {job_info.get('TranscriptionJobStatus', '').lower()}.")
+        return job_info
 
     def fetch_transcript(
         self,
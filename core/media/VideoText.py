@@ -1,39 +1,44 @@
 import os
-from moviepy import VideoFileClip, TextClip, CompositeVideoClip
+import re
+from moviepy import VideoFileClip
+
+from common.Logger import logger
+from core.media.FFmpeg import FFmpeg
+from core.media.TextSprite import TextSprite
 
 class VideoText:
     def __init__(self, video_path: str):
-        if not os.path.isfile(video_path):
+        """
+        :param video_path: 동영상 파일 경로 또는 URL (예: LipSync 결과 outputUrl)
+                           URL이면 다운로드 없이 최종 인코딩 시 바로 읽는다.
+        """
+        is_url = video_path.startswith(("http://", "https://"))
+        if not is_url and not os.path.isfile(video_path):
             raise FileNotFoundError(f"동영상 파일을 찾을 수 없습니다: {video_path}")
 
-        self.video_clip = VideoFileClip(video_path)
-        self.video_duration = self.video_clip.duration
+        self.video_path = video_path
+        self._video_clip = None     # moviepy 모드에서만 로드
 
-        # 상단 자막용
-        self.top_text_clip = None
+        info = FFmpeg.probe(video_path)
+        self.video_duration = info["duration"]
+        self.video_size = tuple(info.get("resolution") or (0, 0))
+
+        # 상단 자막용 : {"text", "color", "fontsize", "font"}
+        self.top_text = None
 
         # 하단 자막용 : [(start, end, text, fontsize, color), ...]
         self.bottom_subtitle_data = []
 
-    def 상단자막(self, text: str, color='white', fontsize=50):
+    def 상단자막(self, text: str, color='white', fontsize=50, font=''):
         """
         상단 자막 (동영상 전체 구간 동안 고정)
         :param text: 자막 내용
         :param color: 글자 색상
         :param fontsize: 글자 크기
+        :param font: 폰트 파일 경로 (기본값: SUBTITLE_FONT 환경변수)
         """
-        # 전체 영상 길이만큼 고정 표시
-        dur = self.video_duration
-
-        txt_clip = (TextClip(txt=text,
-                             fontsize=fontsize,
-                             color=color,
-                             method='caption')  # or 'label'
-                    .set_position(("center", "top"))
-                    .set_duration(dur)
-                    .set_start(0)  # 처음부터 표시
-                    )
-        self.top_text_clip = txt_clip
+        # 전체 영상 길이만큼 고정 표시 (영상 폭에 맞춰 줄바꿈)
+        self.top_text = {"text": text, "color": color, "fontsize": fontsize, "font": font}
 
     def 하단자막(self, sub_list: list):
         """
@@ -43,18 +48,49 @@ class VideoText:
         # 예: [(0,5,"안녕하세요",40,"white"), (5,10,"다음 자막",40,"yellow"), ...]
         self.bottom_subtitle_data = sub_list
 
-    def make_final(self, output_path: str = "final_with_subtitles.mp4"):
+    def 하단자막_srt(self, srt_str: str, fontsize=40, color='white'):
         """
-        실제 자막을 합성하여 최종 영상을 저장.
-        CompositeVideoClip 사용 -> start=... offset/time을 통해 순차 표출.
+        SRT 문자열(예: Transcript.transcribe_and_get_srt 결과)로 하단 자막 설정
         """
-        base_clip = self.video_clip
+        def to_seconds(ts):
+            hours, mins, rest = ts.strip().split(":")
+            secs, _, millis = rest.partition(",")
+            return int(hours) * 3600 + int(mins) * 60 + int(secs) + int(millis or 0) / 1000
+
+        sub_list = []
+        for block in re.split(r"\n\s*\n", srt_str.strip()):
+            lines = block.strip().splitlines()
+            times = [i for i, line in enumerate(lines) if "-->" in line]
+            if not times:
+                continue
+            start_s, end_s = lines[times[0]].split("-->")
+            text = "\n".join(lines[times[0] + 1:]).strip()
+            if text:
+                sub_list.append((to_seconds(start_s), to_seconds(end_s), text, fontsize, color))
+
+        self.하단자막(sub_list)
+
+    @property
+    def video_clip(self):
+        if self._video_clip is None:
+            self._video_clip = VideoFileClip(self.video_path)
+        return self._video_clip
 
-        overlay_clips = []
+    def _build_overlays(self) -> list:
+        """
+        자막을 스프라이트로 래스터화(캐시 사용)하고 위치까지 계산
+        :return: [(start, end, sprite, x, y), ...]
+        """
+        frame_size = self.video_size
+        overlays = []
 
         # 1) 상단 자막(고정)
-        if self.top_text_clip:
-            overlay_clips.append(self.top_text_clip)
+        if self.top_text:
+            sprite = TextSprite.render(self.top_text["text"], font=self.top_text["font"],
+                                       size=self.top_text["fontsize"], color=self.top_text["color"],
+                                       width=frame_size[0], method='caption')
+            x, y = TextSprite.position(sprite, frame_size, ("center", "top"))
+            overlays.append((0, self.video_duration, sprite, x, y))
 
         # 2) 하단 자막
         #   sub_list 각 항목: (start, end, text, fontsize, color)
@@ -63,32 +99,45 @@ class VideoText:
             if end_sec <= start_sec:
                 continue
 
-            segment_duration = end_sec - start_sec
-            if segment_duration <= 0:
-                continue
+            sprite = TextSprite.render(text, size=fsize, color=col, method='label')
+            x, y = TextSprite.position(sprite, frame_size, ("center", "bottom"))
+            overlays.append((start_sec, end_sec, sprite, x, y))
+
+        return overlays
+
+    def make_final(self, output_path: str = "final_with_subtitles.mp4", mode: str = 'ffmpeg'):
+        """
+        실제 자막을 합성하여 최종 영상을 저장.
+        자막은 미리 래스터화한 스프라이트를 해당 구간(start~end)에만 알파 블렌딩한다.
+
+        :param mode: 'ffmpeg'  - 원본(또는 URL)을 읽으며 overlay 필터로 합성, 인코딩은 이 한 번뿐 (오디오 copy)
+                     'moviepy' - MoviePy로 프레임마다 블렌딩 후 인코딩
+        """
+        overlays = self._build_overlays()
+
+        if mode == 'ffmpeg':
+            FFmpeg.burn_overlays(self.video_path, output_path, overlays)
+            logger.info(f"자막 합성 영상 생성 완료: {output_path}")
+            return output_path
+
+        if mode != 'moviepy':
+            raise ValueError(f"지원하지 않는 mode 입니다: {mode}")
+
+        base_clip = self.video_clip
+
+        def draw_subtitles(get_frame, t):
+            frame = get_frame(t)
+            active = [o for o in overlays if o[0] <= t < o[1]]
+            if not active:
+                return frame
+            frame = frame.copy()
+            for _, _, sprite, x, y in active:
+                TextSprite.blend(frame, sprite, x, y)
+            return frame
+
+        final_comp = base_clip.transform(draw_subtitles)
 
-            # TextClip 생성
-            sub_txtclip = (TextClip(txt=text,
-                                    fontsize=fsize,
-                                    color=col,
-                                    method='label')
-                           # 하단 위치
-                           .set_position(("center", "bottom"))
-                           # 이 자막이 표시될 시간(길이)
-                           .set_duration(segment_duration)
-                           # CompositeVideoClip에서 시작 시점
-                           .set_start(start_sec)
-                           )
-
-            overlay_clips.append(sub_txtclip)
-
-        # 3) CompositeVideoClip
-        final_comp = CompositeVideoClip([base_clip, *overlay_clips],
-                                        size=base_clip.size)
-        # 전체 길이는 원본 비디오 길이
-        final_comp = final_comp.set_duration(base_clip.duration)
-
-        # 4) 결과 저장
+        # 결과 저장
         final_comp.write_videofile(output_path,
                                    codec="libx264",
                                    audio_codec="aac",
@@ -97,10 +146,7 @@ class VideoText:
         # 자원 해제
         final_comp.close()
         base_clip.close()
-        if self.top_text_clip:
-            self.top_text_clip.close()
-        for c in overlay_clips:
-            if hasattr(c, 'close'):
-                c.close()
+        self._video_clip = None
 
-        print(f"자막 합성 영상 생성 완료: {output_path}")
\ No newline at end of file
+        logger.info(f"자막 합성 영상 생성 완료: {output_path}")
+        return output_path
@@ -0,0 +1,205 @@
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import yaml
+
+from common.Logger import logger
+from core.elevenlabs.ElevenlabsClient import ElevenlabsClient
+from core.elevenlabs.VoiceRegistry import VoiceRegistry
+from core.media.FFmpeg import FFmpeg
+from core.pipeline.Checkpoint import CheckpointStore
+from core.pipeline.Pipeline import PipelineError
+
+class BatchRunner:
+    """
+    manifest(YAML/JSONL)에 적힌 여러 숏폼 작업을 한 번에 처리하는 배치 러너.
+
+    - 작업(job)들은 max_jobs개까지 동시에 진행되고, 각 작업은 build_pipeline()으로 만든 pipeline으로 실행
+    - 모든 작업이 자원별 semaphore(limits)를 공유하므로 렌더링(CPU)과 외부 API별 동시 실행 수가 배치 전체에서 제한됨
+    - 같은 배치 안에서 voice 복제, 템플릿 probe 등 무거운 공용 결과는 한 번만 만들어 재사용
+    - 작업이 끝날 때마다 결과와 stage별 소요 시간을 output(JSONL)에 한 줄씩 기록
+
+    manifest 형식 (YAML):
+        defaults: {who: "...", time: 30, engine: gemini, voice: <voice_id>}
+        jobs:
+          - id: vaccine
+            txt: data/script.txt                    # 또는 contents(초안), script(완성 대본), audio(음성 파일)
+            templates: [data/a.mp4, data/b.mp4]    # 템플릿마다 작업 하나씩 (또는 template 하나)
+            voice: {name: dr_m, description: "", files: [data/sample.mp3]}    # 복제할 voice
+            title: 임신 중 예방접종
+    JSONL은 한 줄에 작업 하나 (defaults 없음)
+    """
+
+    def __init__(self, build_pipeline, limits: dict = None, max_jobs: int = None,
+                 checkpoint: CheckpointStore = None, workdir: str = None):
+        """
+        :param build_pipeline: build_pipeline(checkpoint=, limits=) → Pipeline
+        :param limits: {resource: 동시 실행 수} (기본값: default_limits())
+        :param max_jobs: 동시에 진행할 작업 수 (기본값: BATCH_MAX_JOBS 또는 8)
+        :param checkpoint: stage 결과 저장소 (배치를 다시 실행하면 끝난 stage는 재사용)
+        :param workdir: 작업별 결과 디렉토리의 상위 경로 (기본값: result/batch)
+        """
+        self.build_pipeline = build_pipeline
+        self.limits = {name: threading.BoundedSemaphore(n) for name, n in (limits or self.default_limits()).items()}
+        self.max_jobs = max_jobs or int(os.getenv("BATCH_MAX_JOBS", "8"))
+        self.checkpoint = checkpoint
+        self.workdir = workdir or "result/batch"
+
+        self._voices = {}   # {registry key: voice_id}
+        self._voice_locks = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def default_limits() -> dict:
+        """
+        자원별 기본 동시 실행 수
+        - render: ffmpeg 인코딩 (CPU 코어의 절반, 인코더 자체도 멀티스레드)
+        - tts: 한 작업이 문장 단위로 ELEVENLABS_MAX_CONCURRENCY개씩 요청하므로 작업 단위로는 1
+        """
+        return {
+            "render": int(os.getenv("BATCH_RENDER_WORKERS", max(1, (os.cpu_count() or 2) // 2))),
+            "llm": int(os.getenv("BATCH_LLM_CONCURRENCY", "4")),
+            "tts": int(os.getenv("BATCH_TTS_CONCURRENCY", "1")),
+            "s3": int(os.getenv("BATCH_S3_CONCURRENCY", "8")),
+            "lipsync": int(os.getenv("SYNC_SO_MAX_CONCURRENCY", "10")),
+        }
+
+    @staticmethod
+    def load_manifest(path: str) -> list:
+        """
+        manifest를 읽어 작업 목록으로 펼침 (defaults 병합, templates 목록은 템플릿별 작업으로 분리)
+        템플릿별로 나눈 작업은 id와 output에 템플릿 이름을 붙인다.
+        작업마다 workdir(id)가 달라야 하므로 id가 겹치거나 템플릿이 없으면 ValueError
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            if path.endswith((".yaml", ".yml")):
+                data = yaml.safe_load(f) or {}
+            else:
+                data = [json.loads(line) for line in f if line.strip()]
+
+        if isinstance(data, list):
+            defaults, entries = {}, data
+        else:
+            defaults, entries = data.get("defaults", {}), data.get("jobs", [])
+
+        jobs = []
+        seen = set()
+        for i, entry in enumerate(entries):
+            job = {**defaults, **entry}
+            job_id = str(job.get("id") or f"{i:04d}")
+            templates = job.pop("templates", None) or ([job["template"]] if job.get("template") else [])
+            if not templates:
+                raise ValueError(f"작업 '{job_id}'에 template(또는 templates)이 없습니다.")
+
+            for template in templates:
+                expanded = {**job, "template": template}
+                if len(templates) > 1:
+                    suffix = f"_{os.path.splitext(os.path.basename(template))[0]}"
+                    expanded["id"] = job_id + suffix
+                    if job.get("output"):
+                        root, ext = os.path.splitext(job["output"])
+                        expanded["output"] = f"{root}{suffix}{ext}"
+                else:
+                    expanded["id"] = job_id
+
+                if expanded["id"] in seen:
+                    raise ValueError(f"작업 id가 중복됩니다: {expanded['id']} (템플릿: {template})")
+                seen.add(expanded["id"])
+                jobs.append(expanded)
+        return jobs
+
+    def _voice_id(self, voice) -> str:
+        """
+        voice_id 문자열은 그대로, {name, description, files}는 배치 안에서 한 번만 복제
+        """
+        if not voice or isinstance(voice, str):
+            return voice or os.getenv("ELEVENLABS_VOICE_ID")
+
+        key = VoiceRegistry.make_key(voice["files"], voice["name"], voice.get("description", ""))
+        with self._lock:
+            lock = self._voice_locks.setdefault(key, threading.Lock())
+        with lock:
+            if key not in self._voices:
+                client = ElevenlabsClient()
+                client.clone(voice["name"], voice.get("description", ""), voice["files"])
+                self._voices[key] = client.voice_id
+            return self._voices[key]
+
+    def _inputs(self, job: dict) -> dict:
+        workdir = os.path.join(self.workdir, job["id"])
+        os.makedirs(workdir, exist_ok=True)
+        inputs = {
+            "who": job.get("who", ""),
+            "time": job.get("time", 30),
+            "engine": job.get("engine", "gemini"),
+            "video_path": job["template"],
+            "workdir": workdir,
+            "title": job.get("title", ""),
+            "output": job.get("output") or os.path.join(workdir, "final.mp4"),
+        }
+        if job.get("audio"):
+            inputs["tts"] = {"path": job["audio"], "timings": []}
+            # 길이를 이미 알고 있으므로 추정 없이 바로 템플릿을 자름
+            inputs["estimate"] = FFmpeg.probe(job["audio"]).get("duration", 0)
+            return inputs
+
+        inputs["voice_id"] = self._voice_id(job.get("voice"))
+        if job.get("script"):
+            inputs["script"] = job["script"]
+        elif job.get("contents"):
+            inputs["contents"] = job["contents"]
+        elif job.get("txt"):
+            with open(job["txt"], "r", encoding="utf-8") as f:
+                inputs["contents"] = f.read()
+        else:
+            raise ValueError("txt, contents, script, audio 중 하나가 필요합니다.")
+        return inputs
+
+    def _run_job(self, job: dict) -> dict:
+        started = time.time()
+        try:
+            result = self.build_pipeline(checkpoint=self.checkpoint, limits=self.limits).run(**self._inputs(job))
+            return {"id": job["id"], "status": "ok", "output": result["outputs"].get("final"),
+                    "timings": result["timings"], "total_time": result["total_time"]}
+        except PipelineError as e:
+            return {"id": job["id"], "status": "error", "stage": e.stage, "error": str(e.error),
+                    "timings": e.result.get("timings", {}), "total_time": time.time() - started}
+        except Exception as e:
+            return {"id": job["id"], "status": "error", "stage": None, "error": str(e),
+                    "timings": {}, "total_time": time.time() - started}
+
+    def run(self, manifest: str, output: str) -> dict:
+        """
+        :param manifest: 작업 목록 파일 (.yaml/.yml 또는 .jsonl)
+        :param output: 결과를 기록할 JSONL 파일 (작업이 끝나는 순서대로 기록)
+        :return: {"total", "ok", "failed", "total_time"}
+        """
+        jobs = self.load_manifest(manifest)
+        started = time.time()
+        logger.info(f"Batch start: {len(jobs)} jobs, max_jobs={self.max_jobs}")
+
+        # 템플릿 probe는 한 번만 (FFmpeg.probe 결과는 프로세스 안에서 캐시됨)
+        for template in {job["template"] for job in jobs if job.get("template")}:
+            try:
+                FFmpeg.probe(template)
+            except (RuntimeError, OSError) as e:
+                logger.warning(f"템플릿 probe 실패: {template} ({e})")
+
+        summary = {"total": len(jobs), "ok": 0, "failed": 0}
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, "w", encoding="utf-8") as f, ThreadPoolExecutor(max_workers=self.max_jobs) as executor:
+            futures = [executor.submit(self._run_job, job) for job in jobs]
+            for future in as_completed(futures):
+                result = future.result()
+                summary["ok" if result["status"] == "ok" else "failed"] += 1
+                f.write(json.dumps(result, ensure_ascii=False) + "\n")
+                f.flush()
+                logger.info(f"Batch [{summary['ok'] + summary['failed']}/{len(jobs)}] {result['id']} "
+                            f"{result['status']} ({result['total_time']:.1f}s)")
+
+        summary["total_time"] = time.time() - started
+        logger.info(f"Batch done: {summary}")
+        return summary
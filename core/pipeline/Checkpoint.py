@@ -0,0 +1,124 @@
+import os
+import time
+from datetime import datetime
+
+from common.FileUtil import FileUtil
+from common.Logger import logger
+
+class CheckpointStore:
+    """
+    pipeline stage 결과를 입력 해시로 저장해 두는 로컬 저장소.
+    같은 입력으로 다시 실행하면 아직 유효한 결과(파일이 그대로 있고, presigned URL이 만료되지 않은)를
+    재사용하므로, 마지막 stage에서 실패해도 앞 stage를 다시 만들 필요가 없다.
+
+    파일 형식: {root_dir}/{key[:2]}/{key}.json
+        {"pipeline", "stage", "value", "files": {path: [size, mtime_ns]}, "created_at"}
+    """
+
+    def __init__(self, root_dir: str = None):
+        """
+        :param root_dir: 저장 디렉토리 (기본값: PIPELINE_CHECKPOINT_DIR 또는 cache/checkpoints)
+        """
+        self.root_dir = root_dir or os.getenv("PIPELINE_CHECKPOINT_DIR", "cache/checkpoints")
+
+    @staticmethod
+    def fingerprint(value):
+        """
+        입력 파일 값을 키로 쓸 수 있는 형태로 변환. 로컬 파일 경로는 경로 대신 내용 해시를 사용한다.
+        """
+        if isinstance(value, str) and os.path.isfile(value):
+            return {"file": FileUtil.sha256_file(value)}
+        if isinstance(value, dict):
+            return {k: CheckpointStore.fingerprint(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [CheckpointStore.fingerprint(v) for v in value]
+        return value
+
+    @staticmethod
+    def make_key(pipeline: str, stage: str, inputs: dict, files=()) -> str:
+        """
+        :param files: 내용 해시로 비교할 입력 파일 이름들. 나머지 입력(출력 경로 등)은 값 그대로 사용
+                      (출력 경로를 해시하면 stage가 결과를 쓰는 순간 키가 바뀌어 재사용되지 않음)
+        """
+        return FileUtil.sha256_json({
+            "pipeline": pipeline,
+            "stage": stage,
+            "inputs": {k: CheckpointStore.fingerprint(v) if k in files else v for k, v in inputs.items()},
+        })
+
+    @staticmethod
+    def _files(value) -> list:
+        """
+        결과값 안의 로컬 파일 경로 목록
+        """
+        if isinstance(value, str):
+            return [value] if os.path.isfile(value) else []
+        if isinstance(value, dict):
+            value = list(value.values())
+        if isinstance(value, (list, tuple)):
+            return [f for v in value for f in CheckpointStore._files(v)]
+        return []
+
+    @staticmethod
+    def not_expired(value, min_validity: float = 0) -> bool:
+        """
+        결과값 안의 모든 expires_at(epoch)이 min_validity초 이상 남아 있는지 (presigned URL 등)
+        """
+        if isinstance(value, dict):
+            expires_at = value.get("expires_at")
+            if expires_at is not None and expires_at - time.time() < min_validity:
+                return False
+            value = list(value.values())
+        if isinstance(value, (list, tuple)):
+            return all(CheckpointStore.not_expired(v, min_validity) for v in value)
+        return True
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root_dir, key[:2], f"{key}.json")
+
+    def load(self, key: str, validate=None) -> dict:
+        """
+        :param validate: 추가 검증 함수 validate(value) -> bool
+        :return: 저장된 항목 {"value", ...}, 없거나 더 이상 유효하지 않으면 None
+        """
+        entry = FileUtil.read_json(self._path(key))
+        if not entry:
+            return None
+
+        for path, (size, mtime_ns) in entry.get("files", {}).items():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                logger.info(f"checkpoint 무효 (파일 없음): {entry['stage']} {path}")
+                return None
+            if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+                logger.info(f"checkpoint 무효 (파일 변경): {entry['stage']} {path}")
+                return None
+
+        if not self.not_expired(entry["value"]) or (validate and not validate(entry["value"])):
+            logger.info(f"checkpoint 무효 (만료): {entry['stage']}")
+            return None
+        return entry
+
+    def save(self, key: str, pipeline: str, stage: str, value):
+        files = {}
+        for path in self._files(value):
+            stat = os.stat(path)
+            files[path] = [stat.st_size, stat.st_mtime_ns]
+        try:
+            FileUtil.write_json(self._path(key), {
+                "pipeline": pipeline,
+                "stage": stage,
+                "value": value,
+                "files": files,
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+            })
+        except TypeError as e:
+            # JSON으로 저장할 수 없는 결과는 checkpoint 하지 않음
+            logger.warning(f"checkpoint 저장 생략: {stage} ({e})")
+
+    def discard(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
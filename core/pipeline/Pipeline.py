@@ -0,0 +1,152 @@
+import os
+import time
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from common.Logger import logger
+from core.pipeline.Checkpoint import CheckpointStore
+
+class PipelineError(RuntimeError):
+    """
+    stage 실행 중 발생한 오류. 어느 stage에서 실패했는지(stage)와 그때까지의 결과(result)를 함께 담는다.
+    """
+    def __init__(self, stage: str, error: Exception, result: dict = None):
+        super().__init__(f"[{stage}] {error}")
+        self.stage = stage
+        self.error = error
+        self.result = result or {}
+
+
+class Pipeline:
+    """
+    stage들을 의존성 그래프(DAG)로 선언하고, 서로 의존하지 않는 stage는 동시에 실행하는 러너.
+
+        pipe = Pipeline("short")
+        pipe.add("tts", make_tts, deps=["script"])
+        pipe.add("cut", cut_video, deps=["video_path", "duration"])
+        result = pipe.run(script="...", video_path="...")
+
+    - stage 함수는 deps 이름을 키워드 인자로 받는다 (run()에 넘긴 입력도 deps로 쓸 수 있음)
+    - run()의 입력에 stage 이름과 같은 값이 있으면 그 stage는 실행하지 않고 입력값을 결과로 사용
+      (그 stage에만 필요한 상위 stage도 실행하지 않음)
+    - stage에 resource를 지정하면 limits의 같은 이름 semaphore로 동시 실행 수를 제한
+      (여러 pipeline이 같은 limits를 공유하면 배치 전체에서 외부 API/CPU 사용량이 제한됨)
+    - checkpoint를 지정하면 stage 결과를 입력 해시로 저장하고, 다시 실행할 때 유효한 결과는 재사용
+    - 결과: {"outputs": {이름: 값}, "timings": {stage: {"start", "end", "duration", "cached"}}, "total_time"}
+    """
+
+    def __init__(self, name: str = "pipeline", max_workers: int = None, checkpoint: CheckpointStore = None,
+                 limits: dict = None):
+        """
+        :param name: 로그에 표시할 이름 (checkpoint 키에도 사용)
+        :param max_workers: 동시에 실행할 stage 수 (기본값: PIPELINE_MAX_WORKERS 또는 4)
+        :param checkpoint: stage 결과 저장소 (없으면 매번 모두 실행)
+        :param limits: {resource: threading.Semaphore} 자원별 동시 실행 제한
+        """
+        self.name = name
+        self.max_workers = max_workers or int(os.getenv("PIPELINE_MAX_WORKERS", "4"))
+        self.checkpoint = checkpoint
+        self.limits = limits or {}
+        self.stages = {}    # {name: (fn, deps, options)} 추가 순서 유지
+
+    def add(self, name: str, fn, deps=(), cache: bool = True, validate=None, resource: str = None, files=()):
+        """
+        :param name: stage 이름 (결과 키)
+        :param fn: fn(**{dep: 값}) 형태로 호출할 함수
+        :param deps: 의존하는 stage 또는 입력 이름 목록
+        :param cache: checkpoint 사용 여부 (결과가 JSON으로 저장 가능해야 함)
+        :param validate: 저장된 결과를 재사용해도 되는지 판단하는 함수 validate(value) -> bool
+                         (파일 존재/변경, expires_at 만료는 기본으로 검사)
+        :param resource: 사용하는 자원 이름 (예: 'render', 'tts', 'lipsync'), limits에 없으면 제한 없음
+        :param files: 입력 파일(또는 파일 경로를 담은 값)인 deps. checkpoint 키에 경로 대신 내용 해시를 사용
+        """
+        if name in self.stages:
+            raise ValueError(f"이미 등록된 stage입니다: {name}")
+        self.stages[name] = (fn, tuple(deps), {"cache": cache, "validate": validate,
+                                                "resource": resource, "files": tuple(files)})
+        return self
+
+    def _order(self, inputs: dict) -> list:
+        """
+        최종 stage(다른 stage가 의존하지 않는 stage)에 필요한 stage만 위상 정렬해서 반환.
+        입력으로 주어진 이름에서는 더 거슬러 올라가지 않는다. 없는 입력이나 순환 의존성이면 ValueError
+        """
+        used = {dep for _, deps, _ in self.stages.values() for dep in deps}
+        order, visiting, done = [], set(), set()
+
+        def visit(name, parent):
+            if name in done or name in inputs:
+                return
+            if name not in self.stages:
+                raise ValueError(f"stage '{parent}'의 입력이 없습니다: {name}")
+            if name in visiting:
+                raise ValueError(f"순환 의존성: {name}")
+            visiting.add(name)
+            for dep in self.stages[name][1]:
+                visit(dep, name)
+            visiting.discard(name)
+            done.add(name)
+            order.append(name)
+
+        for name in self.stages:
+            if name not in used:
+                visit(name, None)
+        return order
+
+    def run(self, **inputs) -> dict:
+        order = self._order(inputs)
+        outputs = dict(inputs)
+        timings = {}
+        pending = list(order)
+        running = {}    # {future: stage}
+        started = time.time()
+
+        def call(name):
+            fn, deps, options = self.stages[name]
+            kwargs = {dep: outputs[dep] for dep in deps}
+            t0 = time.time()
+
+            key = None
+            if self.checkpoint and options["cache"]:
+                key = self.checkpoint.make_key(self.name, name, kwargs, options["files"])
+                entry = self.checkpoint.load(key, options["validate"])
+                if entry:
+                    return entry["value"], t0, time.time(), True
+
+            with self.limits.get(options["resource"]) or nullcontext():
+                value = fn(**kwargs)
+            if key:
+                self.checkpoint.save(key, self.name, name, value)
+            return value, t0, time.time(), False
+
+        logger.info(f"[{self.name}] start: {pending}")
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            while pending or running:
+                for name in [n for n in pending if all(d in outputs for d in self.stages[n][1])]:
+                    pending.remove(name)
+                    running[executor.submit(call, name)] = name
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        value, t0, t1, cached = future.result()
+                    except Exception as e:
+                        logger.error(f"[{self.name}] {name} failed: {e}")
+                        raise PipelineError(name, e, {"outputs": outputs, "timings": timings,
+                                                      "total_time": time.time() - started}) from e
+                    outputs[name] = value
+                    timings[name] = {"start": t0 - started, "end": t1 - started, "duration": t1 - t0,
+                                     "cached": cached}
+                    logger.info(f"[{self.name}] {name} {'checkpoint' if cached else 'done'} ({t1 - t0:.2f}s)")
+        except BaseException:
+            # 이미 실행 중인 stage(예: lipsync 폴링)는 기다리지 않고 바로 실패를 반환
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
+
+        total_time = time.time() - started
+        logger.info(f"[{self.name}] done ({total_time:.2f}s): "
+                    + ", ".join(f"{k}={v['duration']:.2f}s" for k, v in timings.items()))
+        return {"outputs": outputs, "timings": timings, "total_time": total_time}
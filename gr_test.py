@@ -1,12 +1,42 @@
+import os
 import numpy as np
 import gradio as gr
+from dotenv import load_dotenv
 
-# open ai api를 이용해서 메세지를 생성합니다.
+from common.Logger import logger
+from core.llm.TextGen import TextGen
+from prompt.PromptRegistry import PromptRegistry
+
+# .env 파일 로드
+load_dotenv(override=True)
+
+# 개발용 UI: 프롬프트 파일을 고치면 재시작 없이 반영 (PROMPT_RELOAD_INTERVAL=0이면 끔)
+_reload_interval = float(os.getenv("PROMPT_RELOAD_INTERVAL") or 2)
+if _reload_interval > 0:
+    PromptRegistry.shared().watch(_reload_interval)
+
+_textgen = None
+
+def get_textgen() -> TextGen:
+    # provider/prompt 로드는 한 번만
+    global _textgen
+    if _textgen is None:
+        _textgen = TextGen(engine=os.getenv("LLM_ENGINE", "gemini"))
+    return _textgen
+
+# LLM api를 이용해서 메세지를 생성합니다. (생성되는 대로 화면에 표시)
 # draft : 사용자가 입력한 초안
 # draft_time : 사용자가 원하는 shorts의 재생시간
-# return : ai가 사용자가 입력한 초안을 기초로 설정한 시간분량의 shorts 초안
-def generate_message(draft, draft_time):
-    return f"AI로 생성된 메시지: {draft} (시간: {draft_time}초)"
+# who : 대본 첫 인사에 들어갈 화자
+# return(yield) : ai가 사용자가 입력한 초안을 기초로 설정한 시간분량의 shorts 초안 (지금까지 생성된 부분)
+def generate_message(draft, draft_time, who):
+    tgen = get_textgen()
+    text = ""
+    for chunk in tgen.genTextStream(who=who or "", time=draft_time or 30, contents=draft):
+        text += chunk
+        yield text
+    if tgen.last_metrics:
+        logger.info(f"TTFT: {tgen.last_metrics['ttft'] or 0:.2f}s, 예상 발화 시간: {tgen.last_estimate or 0:.1f}s")
 
 # Video 생성 버튼
 def generate_video(shorts_text, video_file):
@@ -33,6 +63,7 @@ with gr.Blocks() as demo:
                         label="Time (Sec)",
                         type="value"
                     )
+                    who_input = gr.Textbox(label="Who", placeholder="예: 유재석 원장")
                     draft_output = gr.Textbox(lines=10, label="Msg조정완료")
         generate_message_button = gr.Button("AI로 시간에 맞는 메시지 생성")
         # text_output = gr.Textbox()
@@ -50,10 +81,10 @@ with gr.Blocks() as demo:
             audio_input = gr.Audio(label="Audio Input")
         clone_button = gr.Button("Voice를 복제합니다.")
 
-    # generate_message_button 클릭 시 draft_input과 draft_time_input을 전달
+    # generate_message_button 클릭 시 draft_input, draft_time_input, who_input을 전달 (생성되는 대로 draft_output 갱신)
     generate_message_button.click(
         generate_message, 
-        inputs=[draft_input, draft_time_input],  # 두 개의 입력값을 전달
+        inputs=[draft_input, draft_time_input, who_input],
         outputs=draft_output
     )
     # video_file.change(video_file_selected, inputs=video_file, outputs=origin_video)
@@ -0,0 +1,176 @@
+import os
+import glob
+import re
+import string
+import threading
+
+from common.Logger import logger
+
+class PromptTemplate:
+    """
+    미리 읽어 둔 프롬프트 템플릿 하나 (파일: <Type>_<Engine>.txt, 예: SpeechTime_Gemini.txt)
+    """
+
+    def __init__(self, type: str, engine: str, path: str, text: str):
+        self.type = type
+        self.engine = engine
+        self.path = path
+        self.text = text
+        # str.format 문법 검사 + 사용하는 placeholder 목록
+        self.fields = {field.split(".")[0].split("[")[0]
+                       for _, field, _, _ in string.Formatter().parse(text) if field}
+        if any(not f.isidentifier() for f in self.fields):
+            raise ValueError(f"{path}: 잘못된 placeholder {sorted(self.fields)}")
+
+    def render(self, **params) -> str:
+        missing = self.fields - params.keys()
+        if missing:
+            raise KeyError(f"{os.path.basename(self.path)}: 값이 없는 placeholder {sorted(missing)}")
+        return self.text.format(**params)
+
+
+class PromptRegistry:
+    """
+    prompt 디렉토리의 템플릿을 시작할 때 한 번 읽고 검증해 두는 레지스트리.
+
+    - 파일 이름으로 type/engine 결정: SpeechTime_Gemini.txt → ('speech_time', 'gemini')
+      engine이 없는 파일(Revise.txt)은 해당 type의 기본 템플릿
+    - 검증: str.format 문법, type별 필수 placeholder, 모든 engine에 템플릿(또는 기본 템플릿)이 있는지
+    - 렌더링은 메모리에서만 하고, watch()를 켜면 파일이 바뀔 때 다시 읽음 (검증 실패 시 이전 템플릿 유지)
+      hot reload는 개발용이라 기본으로는 꺼져 있음 (gr_test.py 또는 PROMPT_RELOAD_INTERVAL로 켬)
+    - 새 prompt type은 파일만 추가하면 render(type, engine, ...)로 사용 가능 (engine 코드 변경 불필요)
+    """
+
+    ENGINES = ("gemini", "openai")
+
+    # type별 필수 placeholder
+    REQUIRED = {
+        "speech_time": {"time", "contents"},
+        "revise": {"time", "contents", "estimate", "min_time", "action"},
+    }
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, root_dir: str = None):
+        """
+        :param root_dir: 템플릿 디렉토리 (기본값: 이 모듈이 있는 prompt 디렉토리, 실행 위치와 무관)
+        """
+        self.root_dir = root_dir or os.path.dirname(os.path.abspath(__file__))
+        self._templates = {}    # {(type, engine): PromptTemplate}, engine이 None이면 기본 템플릿
+        self._snapshot = None
+        self._watcher = None
+        self._stop = threading.Event()
+        self.load()
+
+    @classmethod
+    def shared(cls):
+        """
+        프로세스 전역 레지스트리 (처음 호출 시 로드, PROMPT_RELOAD_INTERVAL초마다 변경 확인, 기본값 0 = 끔)
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+                interval = float(os.getenv("PROMPT_RELOAD_INTERVAL", "0"))
+                if interval > 0:
+                    cls._shared.watch(interval)
+            return cls._shared
+
+    @staticmethod
+    def _parse_name(path: str) -> tuple:
+        """
+        SpeechTime_OpenAI.txt → ('speech_time', 'openai'), Revise.txt → ('revise', None)
+        """
+        name = os.path.splitext(os.path.basename(path))[0]
+        base, _, engine = name.partition("_")
+        type = re.sub(r"(?<!^)(?=[A-Z])", "_", base).lower()
+        return type, engine.lower() or None
+
+    def _files(self) -> list:
+        return sorted(glob.glob(os.path.join(self.root_dir, "*.txt")))
+
+    def _take_snapshot(self) -> tuple:
+        snapshot = []
+        for path in self._files():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            snapshot.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(snapshot)
+
+    def load(self):
+        """
+        모든 템플릿을 읽고 검증한 뒤 한 번에 교체. 문제가 있으면 ValueError (기존 템플릿은 그대로)
+        """
+        snapshot = self._take_snapshot()
+        templates = {}
+        for path, _, _ in snapshot:
+            type, engine = self._parse_name(path)
+            with open(path, "r", encoding="utf-8") as f:
+                template = PromptTemplate(type, engine, path, f.read())
+
+            missing = self.REQUIRED.get(type, set()) - template.fields
+            if missing:
+                raise ValueError(f"{path}: 필수 placeholder 없음 {sorted(missing)}")
+            templates[(type, engine)] = template
+
+        for type in {t for t, _ in templates}:
+            if (type, None) in templates:
+                continue
+            missing = [e for e in self.ENGINES if (type, e) not in templates]
+            if missing:
+                raise ValueError(f"prompt '{type}'에 engine별 템플릿이 없습니다: {missing}")
+
+        self._templates = templates
+        self._snapshot = snapshot
+        logger.debug(f"Prompt templates loaded: {sorted(self.types())}")
+
+    def reload_if_changed(self) -> bool:
+        """
+        파일이 바뀌었으면 다시 읽음
+        :return: 다시 읽었으면 True
+        """
+        if self._take_snapshot() == self._snapshot:
+            return False
+        try:
+            self.load()
+            logger.info("Prompt templates reloaded")
+            return True
+        except (ValueError, OSError) as e:
+            logger.error(f"Prompt reload 실패, 이전 템플릿 유지: {e}")
+            return False
+
+    def watch(self, interval: float = 2):
+        """
+        interval초마다 파일 변경을 확인하는 daemon 스레드 시작
+        """
+        def run():
+            while not self._stop.wait(interval):
+                self.reload_if_changed()
+
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=run, daemon=True)
+            self._watcher.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def types(self) -> set:
+        return {type for type, _ in self._templates}
+
+    def get(self, type: str, engine: str = None) -> PromptTemplate:
+        templates = self._templates
+        template = templates.get((type, engine)) or templates.get((type, None))
+        if template is None:
+            raise KeyError(f"등록되지 않은 prompt입니다: {type} ({engine})")
+        return template
+
+    def render(self, type: str, engine: str = None, **params) -> str:
+        """
+        :param type: prompt 종류 (예: 'speech_time', 'revise')
+        :param engine: 'gemini', 'openai' (해당 engine 템플릿이 없으면 기본 템플릿)
+        :param params: placeholder 값 (템플릿에 없는 값은 무시)
+        """
+        return self.get(type, engine).render(**params)
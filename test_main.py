@@ -1,15 +1,39 @@
 import os
 import sys
+import json
+import time
+import asyncio
 import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
+import pytest
 from dotenv import load_dotenv
 
 from common.Logger import logger
 from core.media.MediaEditor import MediaEditor
+from core.media.FFmpeg import FFmpeg
 from core.lipsync.LipSync import LibSync
+from core.lipsync.AsyncLipSync import AsyncLibSync
+from core.lipsync.WebhookServer import WebhookServer
+from common.JobPoller import JobPoller, RetryableError
 from core.media.S3Uploader import S3Uploader
 from core.media.SceneMixer import SceneMixer
+from core.media.VideoText import VideoText
+from core.media.Timeline import SequenceClip
+from core.media.TextSprite import TextSprite
 from core.elevenlabs.ElevenlabsClient import ElevenlabsClient
+from core.elevenlabs.TTSCache import TTSCache
+from core.elevenlabs.VoiceRegistry import VoiceRegistry
+from core.llm.TextGen import TextGen
+from core.llm.ResponseCache import ResponseCache
+from core.llm.RateLimiter import TokenBucket
+from core.llm.SpeechTimer import SpeechTimer
+from prompt.PromptRegistry import PromptRegistry
+from core.pipeline.Pipeline import Pipeline, PipelineError
+from core.pipeline.Checkpoint import CheckpointStore
+from core.pipeline.Batch import BatchRunner
+from aishorts import build_short_pipeline
 
 # .env 파일 로드
 load_dotenv(override=True)
@@ -24,6 +48,21 @@ def test_S3Upload():
     s3uploader.download(s3_key, "downloaded.mp4")
     print('1')
 
+def test_presigned_cache_validity(monkeypatch):
+    monkeypatch.setenv("AWS_BUCKET_NAME", "test-bucket")
+    uploader = S3Uploader()
+    cache_key = ("test-bucket", "cas/ab/old.mp4", 3600)
+    monkeypatch.setitem(S3Uploader._presigned_cache, cache_key, ("https://example.com/old", time.time() + 60))
+
+    # 기본값: 절반(1800초) 이상 남지 않은 URL은 재사용하지 않음
+    assert uploader._cached_presigned("cas/ab/old.mp4", 3600, None) is None
+    # 명시적으로 짧은 유효 시간을 허용하면 재사용
+    assert uploader._cached_presigned("cas/ab/old.mp4", 3600, 30)[0] == "https://example.com/old"
+
+    # upload_av에 같은 s3_key를 주어도 오디오/비디오는 서로 다른 key로 올라감
+    assert S3Uploader._get_av_keys("media/short.mp4", "a.mp3", "v.mp4") == ("media/short.mp3", "media/short.mp4")
+    assert S3Uploader._get_av_keys("media/short", "a.mp4", "v.mp4") == ("media/short_audio.mp4", "media/short_video.mp4")
+
 def test_LipSync():
     # video_url = 'https://videos.files.wordpress.com/C7ZiEpy8/dr_m_02_vertical.mp4'
     # audio_url = 'https://klutz91.com/wp-content/uploads/2025/01/woman_voice_50sec.mp3'
@@ -32,6 +71,175 @@ def test_LipSync():
     # response = lipsync.runSyncAndMonitor(video_url, audio_url)
     pass
 
+def _start_fake_syncso(delay=0.2):
+    """
+    sync.so API 대역: POST로 생성 요청을 받으면 delay초 뒤 webhookUrl로 완료 알림을 보낸다.
+    """
+    import requests
+    state = {"status": "PROCESSING"}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            body = json.dumps({"id": "gen_1", "status": "PENDING"}).encode()
+            self.send_response(201)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+            def notify():
+                time.sleep(delay)
+                state["status"] = "COMPLETED"
+                requests.post(payload["webhookUrl"], json={"id": "gen_1", "status": "COMPLETED",
+                                                           "outputUrl": "https://example.com/out.mp4"})
+            threading.Thread(target=notify, daemon=True).start()
+
+        def do_GET(self):
+            data = {"id": "gen_1", "status": state["status"]}
+            if state["status"] == "COMPLETED":
+                data["outputUrl"] = "https://example.com/out.mp4"
+            body = json.dumps(data).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+def test_LipSync_webhook(monkeypatch):
+    fake = _start_fake_syncso()
+    monkeypatch.setenv("SYNC_SO_API_ENDPOINT", f"http://127.0.0.1:{fake.server_address[1]}/v2/generate")
+    monkeypatch.delenv("SYNC_SO_WEBHOOK", raising=False)
+
+    webhook = WebhookServer(host="127.0.0.1", port=0, path="/webhook").start()
+    try:
+        lipsync = LibSync(webhook=webhook)
+        started = time.time()
+        response = lipsync.runSyncAndMonitor("https://example.com/v.mp4", "https://example.com/a.mp3")
+        assert response["status"] == "COMPLETED"
+        assert response["outputUrl"] == "https://example.com/out.mp4"
+        assert time.time() - started < 5
+    finally:
+        webhook.stop()
+        fake.shutdown()
+
+def test_LipSync_webhook_fallback_error():
+    webhook = WebhookServer(host="127.0.0.1", port=0, path="/webhook").start()
+    try:
+        lipsync = LibSync(webhook=webhook)
+        # 웹훅이 오지 않고 fallback 조회가 재시도할 수 없는 오류면 max_duration까지 기다리지 않음
+        lipsync._fetchGeneration = lambda generation_id: {"status": "ERROR"}
+        started = time.time()
+        response = lipsync.wait_webhook("gen_missing", fallback_interval=0.1, max_duration=30)
+        assert response["status"] == "ERROR"
+        assert time.time() - started < 5
+    finally:
+        webhook.stop()
+
+def test_webhook_auth():
+    import requests
+
+    webhook = WebhookServer(host="127.0.0.1", port=0, path="/webhook", secret="s3cret").start()
+    try:
+        base = f"http://127.0.0.1:{webhook.port}/webhook"
+        # token이 없거나 틀리면 거절
+        assert requests.post(base, json={"id": "gen_1", "status": "COMPLETED"}).status_code == 403
+        assert requests.post(f"{base}?token=wrong", json={"id": "gen_1", "status": "COMPLETED"}).status_code == 403
+        assert webhook.get("gen_1") is None
+
+        # generation이 아닌 result는 무시
+        assert requests.post(webhook.url, json={"result": ["gen_1"]}).status_code == 200
+        assert webhook.get("gen_1") is None
+
+        # 웹훅의 outputUrl은 쓰지 않고 API에서 다시 조회한 값을 반환
+        requests.post(webhook.url, json={"id": "gen_1", "status": "COMPLETED", "outputUrl": "https://evil.example.com/x.mp4"})
+        lipsync = LibSync(webhook=webhook)
+        lipsync._fetchGeneration = lambda generation_id: {"id": generation_id, "status": "COMPLETED",
+                                                          "outputUrl": "https://example.com/out.mp4"}
+        response = lipsync.wait_webhook("gen_1", fallback_interval=5, max_duration=10)
+        assert response["outputUrl"] == "https://example.com/out.mp4"
+    finally:
+        webhook.stop()
+
+def test_AsyncLipSync_webhook(monkeypatch):
+    fake = _start_fake_syncso()
+    monkeypatch.setenv("SYNC_SO_API_ENDPOINT", f"http://127.0.0.1:{fake.server_address[1]}/v2/generate")
+    monkeypatch.delenv("SYNC_SO_WEBHOOK", raising=False)
+
+    webhook = WebhookServer(host="127.0.0.1", port=0, path="/webhook").start()
+
+    async def main():
+        sync = AsyncLibSync(max_concurrency=1, webhook=webhook)
+        try:
+            return await sync.run("https://example.com/v.mp4", "https://example.com/a.mp3")
+        finally:
+            await sync.close()
+
+    try:
+        started = time.time()
+        response = asyncio.run(main())
+        assert response["status"] == "COMPLETED"
+        assert response["outputUrl"] == "https://example.com/out.mp4"
+        assert time.time() - started < 5
+    finally:
+        webhook.stop()
+        fake.shutdown()
+
+def test_job_poller(monkeypatch):
+    poller = JobPoller("test_job", initial_interval=0.01, max_interval=0.05, timeout=5, max_retries=2)
+    responses = [RetryableError("HTTP 503"), {"status": "PENDING"}, {"status": "PROCESSING"},
+                 {"status": "COMPLETED"}]
+
+    def fetch():
+        item = responses.pop(0)
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    # PENDING은 종료 상태가 아님
+    data = poller.poll(fetch, lambda d: d["status"] == "COMPLETED")
+    assert data == {"status": "COMPLETED"}
+
+    # async 버전도 같은 규칙, sleep을 지정하면 그걸로 기다림
+    responses = [RetryableError("HTTP 503"), {"status": "PENDING"}, {"status": "COMPLETED"}]
+    delays = []
+
+    async def fetch_async():
+        return fetch()
+
+    async def sleep(delay):
+        delays.append(delay)
+
+    data = asyncio.run(poller.poll_async(fetch_async, lambda d: d["status"] == "COMPLETED", sleep=sleep))
+    assert data == {"status": "COMPLETED"} and len(delays) == 2
+
+    # 실패로 끝난 작업은 소요 시간 기록(percentile)에 넣지 않음
+    poller = JobPoller("test_failed", initial_interval=0.01, timeout=5)
+    poller.poll(lambda: {"status": "REJECTED"}, lambda d: True, is_success=lambda d: d["status"] == "COMPLETED")
+    assert len(JobPoller._history["test_failed"]) == 0
+    poller.poll(lambda: {"status": "COMPLETED"}, lambda d: True, is_success=lambda d: d["status"] == "COMPLETED")
+    assert len(JobPoller._history["test_failed"]) == 1
+
+    # 재시도를 다 써도 monitor_status는 예외 대신 상태 dict 반환
+    lipsync = LibSync()
+    def unavailable(generation_id):
+        raise RetryableError("HTTP 503")
+    lipsync._fetchGeneration = unavailable
+    monkeypatch.setattr(JobPoller, "next_delay", lambda self, *args: 0)
+    assert lipsync.monitor_status("gen_1")["status"] == "ERROR"
+
+    # 진행률이 높을수록 다음 확인이 빨라짐
+    monkeypatch.undo()
+    poller = JobPoller("test_progress", initial_interval=1, max_interval=100, jitter=0)
+    assert poller.next_delay(5, 10, progress=0.9) < poller.next_delay(5, 10, progress=0.1)
+
 def test_cut_audio():
     # 현재디렉토리 가져오기
     current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -40,31 +248,177 @@ def test_cut_audio():
 
     me.cut_duration(15)
 
+def test_cut_video():
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    media_path = os.path.join(current_dir, "data", "dr_m_02_vertical.mp4")
+    me = MediaEditor(media_path=media_path)
+
+    # 키프레임 기반 자르기 (copy/smart), 불가능하면 reencode
+    output_path = me.cut_duration(12.3)
+    logger.info(f"{output_path} ({me.last_cut_mode})")
+    assert me.last_cut_mode in ('copy', 'smart', 'reencode')
+
+def test_probe():
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    media_path = os.path.join(current_dir, "data", "woman_voice.m4a")
+
+    # clip을 열지 않고 메타데이터만 읽음 (두 번째 호출은 캐시)
+    info = MediaEditor.probe(media_path)
+    assert info["duration"] > 0
+    assert MediaEditor.probe(media_path) == info
+
+def test_smart_cut_tail_args():
+    info = {"profile": "High", "level": 31, "resolution": (720, 1280), "sar": "1:1", "pix_fmt": "yuv420p", "fps": 30.0}
+    args = FFmpeg._tail_encoder_args(info)
+    # head(stream copy)와 같은 profile/level/해상도/SAR로 인코딩해야 이음매가 깨지지 않음
+    assert args[args.index("-profile:v") + 1] == "high"
+    assert args[args.index("-level:v") + 1] == "3.1"
+    assert args[args.index("-s") + 1] == "720x1280"
+    assert args[args.index("-vf") + 1] == "setsar=1/1"
+
+    # profile/level을 모르면 smart cut 대신 전체 재인코딩
+    for missing in ("profile", "level"):
+        with pytest.raises(RuntimeError):
+            FFmpeg._tail_encoder_args({**info, missing: None})
+
 def test_genshorts():
-    video_path = "temp/experiment2/dr_m_02_vertical.mp4"
-    audio_path = "temp/experiment2/1.mp3"
+    # 이미 만든 음성으로 시작 (script/tts stage 생략)
+    # 다시 실행하면 유효한 자르기/업로드/lipsync 결과는 checkpoint에서 재사용
+    result = build_short_pipeline(CheckpointStore()).run(
+        tts={"path": "temp/experiment2/1.mp3", "timings": []},
+        estimate=MediaEditor.probe("temp/experiment2/1.mp3")["duration"],
+        video_path="temp/experiment2/dr_m_02_vertical.mp4",
+        workdir="result",
+        title="임신 중 예방접종",
+        output="result/final.mp4",
+    )
+    logger.info(f"Final video: {result['outputs']['final']}")
+    logger.info(f"Stage timings: {result['timings']}")
 
-    audio_editor = MediaEditor(audio_path)
-    info = audio_editor.get_info()
-    audio_duration = info.get("duration", 0)
+def test_pipeline():
+    def stage(value):
+        def run(**kwargs):
+            time.sleep(0.2)
+            return value
+        return run
 
-    if audio_duration <= 0:
-        logger.error("Audio duration should be less than 10 seconds")
-        return
+    pipe = (Pipeline("test")
+            .add("a", stage("a"), deps=["x"])
+            .add("b", stage("b"), deps=["a"])
+            .add("c", stage("c"), deps=["a"])
+            .add("d", lambda b, c: b + c, deps=["b", "c"]))
 
-    video_editor = MediaEditor(video_path)
-    cutoff_video_path = video_editor.cut_duration(audio_duration)
-    logger.info(f"{cutoff_video_path}")
+    # b, c는 동시에 실행
+    result = pipe.run(x=1)
+    assert result["outputs"]["d"] == "bc"
+    assert result["total_time"] < 0.55
+    assert set(result["timings"]) == {"a", "b", "c", "d"}
 
-    # upload to s3
-    uploader = S3Uploader()
-    s3_paths = uploader.upload_av(audio_path, cutoff_video_path, audio_duration)
-    logger.info(f"Uploaded to S3: {s3_paths}")
+    # 입력으로 준 stage와 그 상위 stage는 실행하지 않음
+    result = pipe.run(a="A")
+    assert set(result["timings"]) == {"b", "c", "d"}
 
-    # lipsync
-    lipsync = LibSync()
-    response = lipsync.runSyncAndMonitor(s3_paths["video"]["presigned_url"], s3_paths["audio"]["presigned_url"])
-    logger.info(f"LipSync response: {response}")
+    # 실패하면 실행 중인 다른 stage(예: lipsync 폴링)를 기다리지 않고 바로 반환
+    def fail():
+        raise ValueError("boom")
+    pipe = Pipeline("test").add("slow", lambda: time.sleep(2)).add("bad", fail)
+    started = time.time()
+    with pytest.raises(PipelineError) as e:
+        pipe.run()
+    assert e.value.stage == "bad"
+    assert time.time() - started < 1
+
+def test_pipeline_checkpoint(tmp_path):
+    calls = []
+    source = tmp_path / "source.txt"
+    source.write_text("hello")
+    output = tmp_path / "final.txt"
+
+    def upper(path):
+        calls.append("upper")
+        out = tmp_path / "upper.txt"
+        out.write_text(open(path).read().upper())
+        return str(out)
+
+    def upload(upper):
+        calls.append("upload")
+        return {"object_key": "k", "presigned_url": "https://example.com/k", "expires_at": time.time() + 3600}
+
+    def save(upload, output):
+        calls.append("save")
+        with open(output, "w") as f:
+            f.write(upload["object_key"])
+        return output
+
+    def build():
+        return (Pipeline("test", checkpoint=CheckpointStore(str(tmp_path / "checkpoints")))
+                .add("upper", upper, deps=["path"], files=["path"])
+                .add("upload", upload, deps=["upper"], files=["upper"],
+                     validate=lambda v: CheckpointStore.not_expired(v, 1200))
+                .add("save", save, deps=["upload", "output"]))
+
+    build().run(path=str(source), output=str(output))
+    # 출력 경로(output)는 파일이 생겨도 값 그대로 비교하므로 바로 재사용
+    result = build().run(path=str(source), output=str(output))
+    assert calls == ["upper", "upload", "save"]
+    assert all(t["cached"] for t in result["timings"].values())
+
+    # 출력 파일이 지워지면 해당 stage만 다시 실행 (내용이 같으면 하위 stage는 재사용)
+    os.remove(tmp_path / "upper.txt")
+    build().run(path=str(source), output=str(output))
+    assert calls == ["upper", "upload", "save", "upper"]
+
+    # 입력 파일 내용이 바뀌면 다시 실행
+    source.write_text("world")
+    build().run(path=str(source), output=str(output))
+    assert calls == ["upper", "upload", "save", "upper", "upper", "upload", "save"]
+
+def test_batch(tmp_path):
+    manifest = tmp_path / "jobs.yaml"
+    manifest.write_text(
+        "defaults: {script: 안녕하세요.}\n"
+        "jobs:\n"
+        "  - {id: one, templates: [t1.mp4, t2.mp4, t3.mp4]}\n"
+        "  - {id: broken, template: t4.mp4, script: null}\n"
+    )
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def render(script, output):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.1)
+        with lock:
+            active[0] -= 1
+        return output
+
+    def build(checkpoint=None, limits=None):
+        return Pipeline("test", limits=limits).add("final", render, deps=["script", "output"], resource="render")
+
+    output = tmp_path / "results.jsonl"
+    runner = BatchRunner(build, limits={"render": 1}, max_jobs=4, workdir=str(tmp_path / "batch"))
+    summary = runner.run(str(manifest), str(output))
+
+    results = {r["id"]: r for r in map(json.loads, output.read_text().splitlines())}
+    assert summary["ok"] == 3 and summary["failed"] == 1
+    assert set(results) == {"one_t1", "one_t2", "one_t3", "broken"}
+    assert results["broken"]["status"] == "error"
+    assert "final" in results["one_t1"]["timings"]
+    # 렌더링은 배치 전체에서 한 번에 하나씩
+    assert peak[0] == 1
+
+    # 템플릿별로 나눈 작업은 output도 나뉨
+    manifest.write_text("jobs:\n  - {id: one, output: out/a.mp4, templates: [t1.mp4, t2.mp4]}\n")
+    assert [job["output"] for job in BatchRunner.load_manifest(str(manifest))] == ["out/a_t1.mp4", "out/a_t2.mp4"]
+
+    # workdir가 겹치는 작업(중복 id, 같은 템플릿 반복)과 템플릿 없는 작업은 읽을 때 거절
+    for jobs in ("  - {id: one, template: t1.mp4}\n  - {id: one, template: t2.mp4}\n",
+                 "  - {id: one, templates: [a/t1.mp4, b/t1.mp4]}\n",
+                 "  - {id: one}\n"):
+        manifest.write_text("jobs:\n" + jobs)
+        with pytest.raises(ValueError, match="one"):
+            BatchRunner.load_manifest(str(manifest))
 
 def test_scenemixer():
     root = os.getcwd()
@@ -75,6 +429,73 @@ def test_scenemixer():
     mixed_video = smixer.create_edited_video()
     print(mixed_video)
 
+def test_scenemixer_parallel():
+    root = os.getcwd()
+    video = os.path.join(root, "data", "dr_m_02_vertical.mp4")
+    audio = os.path.join(root, "temp", "woman_voice_30sec.mp3")
+    images = [os.path.join(root, "temp", "scene1.jpeg"), os.path.join(root, "temp", "scene2.jpeg")]
+    smixer = SceneMixer(video, audio, images)
+    mixed_video = smixer.create_edited_video(parallel=True)
+    info = MediaEditor.probe(mixed_video)
+    assert abs(info["duration"] - smixer.audio_duration) < 0.1
+    print(mixed_video)
+
+def test_sequence_clip_render(tmp_path):
+    from moviepy import ColorClip, ImageClip
+    import numpy as np
+
+    red = ColorClip((64, 48), color=(255, 0, 0), duration=0.5).with_fps(10)
+    still = ImageClip(np.zeros((48, 64, 3), dtype=np.uint8), duration=0.5)
+    seq = SequenceClip([red, still, red])
+    assert seq.fps == 10
+
+    output = str(tmp_path / "sequence.mp4")
+    seq.write_videofile(output, codec="libx264", audio=False, logger=None)
+    info = MediaEditor.probe(output)
+    assert abs(info["duration"] - 1.5) < 0.2
+    assert info["resolution"] == (64, 48)
+
+    # 이미지만 있으면 지정한 fps 사용
+    assert SequenceClip([still], fps=25).fps == 25
+
+def test_text_sprite():
+    import numpy as np
+
+    label = TextSprite.render("Hello", size=30, color="red")
+    assert label.dtype == np.uint8 and label.ndim == 3 and label.shape[2] == 4
+    assert label[:, :, 3].max() == 255
+    assert TextSprite.render("Hello", size=30, color="red") is label    # 캐시
+
+    caption = TextSprite.render("one two three four five six", size=30, width=120, method='caption')
+    assert caption.shape[1] >= 120
+    assert caption.shape[0] > label.shape[0]                            # 여러 줄
+
+    frame = np.zeros((200, 300, 3), dtype=np.uint8)
+    x, y = TextSprite.position(label, (300, 200), ("center", "bottom"))
+    assert x == (300 - label.shape[1]) // 2 and y == 200 - label.shape[0]
+
+    TextSprite.blend(frame, label, x, y)
+    opaque = label[:, :, 3] == 255
+    region = frame[y:y + label.shape[0], x:x + label.shape[1]]
+    assert (region[opaque] == [255, 0, 0]).all()
+    assert (region[label[:, :, 3] == 0] == 0).all()
+    # 스프라이트 밖은 그대로
+    assert frame[:y].max() == 0
+
+def test_overlay_lanes():
+    import numpy as np
+
+    title = np.zeros((40, 300, 4), dtype=np.uint8)
+    subs = [(i, i + 1, np.zeros((30, 100, 4), dtype=np.uint8), 100, 600) for i in range(300)]
+    lanes = FFmpeg._overlay_lanes([(0, 300, title, 0, 0), *subs])
+    # 자막이 수백 개여도 입력/overlay는 동시에 보이는 수(상단 + 하단)만큼
+    assert len(lanes) == 2
+    assert sorted(lanes, key=len) == [[(0, 300, title, 0, 0)], subs]
+
+    # 겹치는 자막은 다른 레인
+    overlapping = [(0, 2, title, 0, 0), (1, 3, title, 0, 50), (2, 4, title, 0, 100)]
+    assert [len(lane) for lane in FFmpeg._overlay_lanes(overlapping)] == [2, 1]
+
 def test_genaudio():
     resource_path = "./temp/experiment2/1.mp3"
     target_path = "./result/test01.mp3"
@@ -97,6 +518,259 @@ def test_genaudio():
     # save
     el_client.saveAudio()
 
+def test_split_sentences():
+    content = "안녕하세요? 유재석 원장입니다. 오늘은 예방주사에 대해 알아볼게요!\n감사합니다."
+    sentences = ElevenlabsClient.splitSentences(content)
+    assert sentences == ["안녕하세요?", "유재석 원장입니다.", "오늘은 예방주사에 대해 알아볼게요!", "감사합니다."]
+
+def test_tts_cache(tmp_path):
+    cache = TTSCache(root_dir=str(tmp_path), max_bytes=10)
+    key = TTSCache.make_key("voice", "안녕하세요?\n  반갑습니다.", {"stability": 0.71}, "model")
+    # 공백 차이는 같은 키
+    assert key == TTSCache.make_key("voice", "안녕하세요? 반갑습니다.", {"stability": 0.71}, "model")
+
+    assert cache.get(key) is None
+    path = cache.put(key, b"12345")
+    assert cache.get(key) == path
+    assert cache.stats() == {"hits": 1, "misses": 1}
+
+    # 용량 초과 시 오래된 항목부터 삭제
+    other = TTSCache.make_key("voice", "다른 문장", {"stability": 0.71}, "model")
+    os.utime(path, (0, 0))
+    cache.put(other, b"123456789")
+    assert cache.get(key) is None
+    assert cache.get(other) is not None
+
+def test_generate_stream(tmp_path, monkeypatch):
+    client = ElevenlabsClient(cache=TTSCache(root_dir=str(tmp_path / "cache")),
+                              registry=VoiceRegistry(path=str(tmp_path / "voices.json")))
+    client.setVoiceId("voice")
+    chunks = [b"a" * 1000, b"", b"b" * 2000, b"c" * 3000]
+    monkeypatch.setattr(client, "_request", lambda content, stream=False: iter(chunks))
+
+    # 청크마다 파일에 기록되고 길이가 늘어남
+    path = str(tmp_path / "out" / "stream.mp3")
+    progress = []
+    stream = client.generate_stream("안녕하세요.", path, background=False,
+                                    on_chunk=lambda s: progress.append((os.path.getsize(path), s.duration)))
+    assert [size for size, _ in progress] == [1000, 3000, 6000]
+    assert progress[0][1] < progress[1][1] < progress[2][1]
+    assert stream.done and stream.wait() == path
+
+    # 끝까지 받은 뒤에만 캐시에 저장
+    key = client._cacheKey("안녕하세요.")
+    assert client.audio_path == client.cache.get(key)
+    with open(client.audio_path, "rb") as f:
+        assert f.read() == b"".join(chunks)
+
+    # 백그라운드: 완료 신호를 받은 시점에는 캐시 저장까지 끝나 있음
+    stream = client.generate_stream("반갑습니다.", str(tmp_path / "bg.mp3"))
+    assert stream.wait(timeout=5)
+    assert client.audio == b"".join(chunks)
+    assert client.audio_path == client.cache.get(client._cacheKey("반갑습니다."))
+
+    # 캐시 히트: 스트리밍 없이 바로 완료
+    monkeypatch.setattr(client, "_request", lambda content, stream=False: iter(()))
+    stream = client.generate_stream("안녕하세요.", str(tmp_path / "hit.mp3"), background=False)
+    assert stream.done and stream.bytes_written == 6000
+
+    # 도중에 실패하면 예외를 전달하고 캐시에는 아무것도 남기지 않음
+    def broken(content, stream=False):
+        yield b"a" * 1000
+        raise ConnectionError("stream closed")
+    monkeypatch.setattr(client, "_request", broken)
+    stream = client.generate_stream("실패하는 문장.", str(tmp_path / "fail.mp3"), background=False)
+    assert stream.done and stream.bytes_written == 1000
+    with pytest.raises(ConnectionError):
+        stream.wait()
+    assert client.audio_path is None
+    assert client.cache.get(client._cacheKey("실패하는 문장.")) is None
+    cached = [name for _, _, names in os.walk(tmp_path / "cache") for name in names]
+    assert len(cached) == 2
+
+def test_synthesize_cached(tmp_path, monkeypatch):
+    client = ElevenlabsClient(cache=TTSCache(root_dir=str(tmp_path / "cache")),
+                              registry=VoiceRegistry(path=str(tmp_path / "voices.json")))
+    client.setVoiceId("voice")
+    monkeypatch.setattr(client, "_request", lambda content, stream=False: iter([b"audio"]))
+
+    # 캐시에서 가져온 문장은 보정 표본으로 다시 쓰지 않도록 새로 합성했는지 함께 반환
+    assert client._synthesize("안녕하세요.") == (b"audio", True)
+    assert client._synthesize("안녕하세요.") == (b"audio", False)
+
+def test_voice_registry(tmp_path):
+    sample = tmp_path / "sample.mp3"
+    sample.write_bytes(b"voice sample")
+    registry = VoiceRegistry(path=str(tmp_path / "voices.json"))
+
+    key = VoiceRegistry.make_key([str(sample)], "woman_voice")
+    assert registry.lookup(key) is None
+    registry.register(key, "voice_123", "woman_voice", files=[str(sample)])
+    assert registry.lookup(key) == "voice_123"
+    assert [v["voice_id"] for v in registry.list()] == ["voice_123"]
+
+    # 샘플 내용이 바뀌면 다른 키
+    sample.write_bytes(b"another sample")
+    assert VoiceRegistry.make_key([str(sample)], "woman_voice") != key
+
+    assert registry.invalidate(voice_id="voice_123") == 1
+    assert registry.lookup(key) is None
+
+def test_llm_cache(tmp_path):
+    cache = ResponseCache(root_dir=str(tmp_path), ttl=60, max_entries=2)
+    calls = []
+
+    def complete():
+        calls.append(1)
+        time.sleep(0.2)
+        return "대본"
+
+    key = ResponseCache.make_key("gemini", "gemini-1.5-flash", "prompt")
+    assert key != ResponseCache.make_key("openai", "gpt-4o-mini", "prompt")
+
+    # 동시에 들어온 같은 요청은 한 번만 호출
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_create(key, complete)))
+               for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == ["대본"] * 4
+    assert len(calls) == 1
+
+    assert cache.get_or_create(key, complete) == "대본"
+    assert len(calls) == 1
+
+    # 만료된 응답은 사용하지 않음
+    assert ResponseCache(root_dir=str(tmp_path), ttl=0).get(key) is None
+
+    # 항목 수 제한
+    for i in range(3):
+        cache.put(ResponseCache.make_key("gemini", "m", str(i)), str(i))
+    assert sum(len(files) for _, _, files in os.walk(tmp_path)) == 2
+
+class FakeProvider:
+    """
+    LLM provider 대역: 프롬프트를 그대로 돌려주고, 'fail'이 들어 있으면 실패
+    """
+    model = "fake-1"
+
+    def __init__(self):
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+
+    def render(self, type='speech_time', who='', time=30, contents='', **params):
+        if type == 'revise':
+            return f"revise:{params['action']}:{contents}"
+        return f"{who}:{contents}"
+
+    def complete(self, prompt):
+        self.calls += 1
+        if prompt.startswith("revise:Shorten:"):
+            # 마지막 문장을 뺀 대본
+            script = prompt.split(":", 2)[2]
+            return script.rsplit(". ", 1)[0] + "."
+        return prompt.upper()
+
+    def stream(self, prompt):
+        for word in prompt.upper().split(":"):
+            time.sleep(0.05)
+            yield word + ":"
+
+    async def complete_async(self, prompt):
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.05)
+        self.active -= 1
+        if "fail" in prompt:
+            raise RuntimeError("provider error")
+        return prompt.upper()
+
+def test_gentext_batch(tmp_path):
+    provider = FakeProvider()
+    tgen = TextGen(engine="fake", provider=provider, cache=ResponseCache(root_dir=str(tmp_path)))
+    tgen.limiter = TokenBucket(rate=100, capacity=5)
+    items = [{"who": "a", "contents": str(i)} for i in range(10)] + [{"who": "a", "contents": "fail"},
+                                                                      {"who": "a", "contents": "0"}]
+    results = tgen.genTextBatch(items, max_concurrency=3, use_cache=False)
+
+    # 입력 순서 유지, 항목별 오류
+    assert [r["text"] for r in results[:10]] == [f"A:{i}" for i in range(10)]
+    assert results[10]["text"] is None and "provider error" in results[10]["error"]
+    assert results[11]["text"] == "A:0"
+    # 같은 프롬프트는 한 번만, 동시 요청 수 제한
+    assert provider.calls == 11
+    assert provider.peak <= 3
+
+    # token bucket: 초당 20회, 한 번에 1개 → 5회에 0.2초 이상
+    bucket = TokenBucket(rate=20, capacity=1)
+    started = time.time()
+    for _ in range(5):
+        bucket.acquire()
+    assert time.time() - started >= 0.19
+
+def test_speech_timer(tmp_path):
+    timer = SpeechTimer(path=str(tmp_path / "timer.json"))
+    assert SpeechTimer.features("안녕하세요? 유재석 원장입니다.") == (13, 2, 0)
+    # 줄을 나눠도 문장 끝 쉼은 같음
+    assert SpeechTimer.features("안녕하세요.\n반갑습니다.") == SpeechTimer.features("안녕하세요. 반갑습니다.")
+    assert SpeechTimer.features("안녕하세요\n반갑습니다") == (10, 1, 0)
+
+    # 보정 전에는 기본 속도, 느린 voice로 보정하면 더 길게 추정
+    text = "임신 중에는 독감 예방접종을 꼭 맞으세요."
+    default = timer.estimate(text, "voice_slow")
+    timer.calibrate("voice_slow", [(text, default * 1.5)] * 3)
+    assert timer.estimate(text, "voice_slow") > default * 1.3
+    assert timer.estimate(text) == default
+
+    # 목표보다 길면 TTS 전에 LLM에 줄여 달라고 다시 요청
+    provider = FakeProvider()
+    tgen = TextGen(engine="fake", provider=provider, cache=ResponseCache(root_dir=str(tmp_path / "llm")),
+                   timer=timer)
+    script = tgen.genText(who="a", time=5, contents="가나다라마바사. " * 4 + "아자차카타파하.", use_cache=False)
+    assert tgen.last_estimate <= 5
+    assert provider.calls > 1
+    assert len(script) < len("가나다라마바사. " * 4)
+
+def test_gentext_stream(tmp_path):
+    provider = FakeProvider()
+    tgen = TextGen(engine="fake", provider=provider, cache=ResponseCache(root_dir=str(tmp_path)))
+    tgen.limiter = TokenBucket(rate=100)
+
+    chunks = list(tgen.genTextStream(who="a", contents="b"))
+    assert chunks == ["A:", "B:"]
+    assert 0.04 <= tgen.last_metrics["ttft"] < tgen.last_metrics["total_time"]
+
+    # 끝까지 받은 응답은 캐시에 저장, 다음에는 한 번에
+    assert list(tgen.genTextStream(who="a", contents="b")) == ["A:B:"]
+    assert tgen.last_metrics["cached"]
+
+def test_prompt_registry(tmp_path):
+    (tmp_path / "SpeechTime_Gemini.txt").write_text("{who} {time} {contents}", encoding="utf-8")
+    (tmp_path / "SpeechTime_OpenAI.txt").write_text("openai {time} {contents}", encoding="utf-8")
+    (tmp_path / "Summary.txt").write_text("요약: {contents}", encoding="utf-8")
+
+    registry = PromptRegistry(root_dir=str(tmp_path))
+    assert registry.types() == {"speech_time", "summary"}
+    assert registry.render("speech_time", "gemini", who="a", time=30, contents="b") == "a 30 b"
+    # engine별 템플릿이 없으면 기본 템플릿, 새 type은 파일만 추가하면 됨
+    assert registry.render("summary", "openai", contents="c") == "요약: c"
+
+    # 필수 placeholder가 빠진 파일로 바뀌면 이전 템플릿 유지
+    (tmp_path / "SpeechTime_OpenAI.txt").write_text("no placeholders", encoding="utf-8")
+    assert not registry.reload_if_changed()
+    assert registry.render("speech_time", "openai", time=30, contents="b") == "openai 30 b"
+
+    (tmp_path / "SpeechTime_OpenAI.txt").write_text("new {time} {contents}", encoding="utf-8")
+    assert registry.reload_if_changed()
+    assert registry.render("speech_time", "openai", time=30, contents="b") == "new 30 b"
+
+    # 저장소의 템플릿은 실행 위치와 무관하게 로드되고 검증을 통과해야 함
+    assert {"speech_time", "revise"} <= PromptRegistry().types()
+
 def test_gemini():
     tgen = TextGen(engine='gemini')
     who = '유재석 원장'